@@ -18,6 +18,7 @@ class TaskStatus(APIView):
                 "ready": ready,
                 "result": task.result if ready and not error else None,
                 "error": {"text": str(task.result)} if error else None,
+                "progress": task.info if task.state == "PROGRESS" else None,
             }
         )
 
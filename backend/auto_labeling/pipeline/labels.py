@@ -32,7 +32,8 @@ class LabelCollection(abc.ABC):
     def save(self, project: Project, example: Example, user: User):
         labels = self.transform(project, example, user)
         labels = self.model.objects.filter_annotatable_labels(labels, project)
-        self.model.objects.bulk_create(labels)
+        self.model.objects.stamp_project_version(labels)
+        return self.model.objects.bulk_create(labels)
 
 
 class Categories(LabelCollection):
@@ -284,6 +284,20 @@ if DEBUG:
 # Batch size for importing data
 IMPORT_BATCH_SIZE = env.int("IMPORT_BATCH_SIZE", 1000)
 
+# Cache of the analytics snapshots; local memory unless a Redis server is configured
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+if env("CACHE_REDIS_URL", None):
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": env("CACHE_REDIS_URL"),
+    }
+ANALYTICS_CACHE_TIMEOUT = env.int("ANALYTICS_CACHE_TIMEOUT", 600)
+EXAMPLE_COUNT_CACHE_TIMEOUT = env.int("EXAMPLE_COUNT_CACHE_TIMEOUT", 60)
+
 # Necessary for email verification of new accounts
 EMAIL_USE_TLS = env.bool("EMAIL_USE_TLS", False)
 EMAIL_HOST = env("EMAIL_HOST", None)
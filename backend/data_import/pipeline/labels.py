@@ -5,6 +5,7 @@ from typing import Dict, List, Tuple
 from .examples import Examples
 from .label import Label
 from .label_types import LabelTypes
+from labels.intervals import Intervals
 from labels.models import Category as CategoryModel
 from labels.models import Label as LabelModel
 from labels.models import Relation as RelationModel
@@ -38,7 +39,8 @@ class Labels(abc.ABC):
             for label in self.labels
             if label.example_uuid in examples
         ]
-        self.label_model.objects.bulk_create(labels)
+        self.label_model.objects.stamp_project_version(labels)
+        return self.label_model.objects.bulk_create(labels)
 
 
 class Categories(Labels):
@@ -61,11 +63,11 @@ class Spans(Labels):
         spans = []
         groups = groupby(self.labels, lambda label: label.example_uuid)
         for _, group in groups:
-            labels = sorted(group)
-            last_offset = -1
-            for label in labels:
-                if getattr(label, "start_offset") >= last_offset:
-                    last_offset = getattr(label, "end_offset")
+            intervals = Intervals()
+            for label in sorted(group):
+                start_offset, end_offset = getattr(label, "start_offset"), getattr(label, "end_offset")
+                if not intervals.overlaps(start_offset, end_offset):
+                    intervals.add(start_offset, end_offset)
                     spans.append(label)
         self.labels = spans
 
@@ -86,4 +88,4 @@ class Relations(Labels):
 
     def save(self, user, examples: Examples, **kwargs):
         id_to_span = kwargs["spans"].id_to_span
-        super().save(user, examples, id_to_span=id_to_span)
+        return super().save(user, examples, id_to_span=id_to_span)
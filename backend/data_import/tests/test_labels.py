@@ -51,6 +51,12 @@ class TestCategories(TestCase):
         self.categories.save(self.user, self.examples)
         self.assertEqual(Category.objects.count(), 2)
 
+    def test_save_with_current_version(self):
+        self.project.item.create_new_version()
+        self.categories.save_types(self.project.item)
+        self.categories.save(self.user, self.examples)
+        self.assertEqual(set(Category.objects.values_list("project_version", flat=True)), {2})
+
     def test_save_types(self):
         self.categories.save_types(self.project.item)
         self.assertEqual(CategoryType.objects.count(), 2)
@@ -1,7 +1,28 @@
-from django.db.models import Count, Q, QuerySet
+from typing import List, Optional, Tuple, Type
+
+from django.db.models import Exists, Model, OuterRef, Q, QuerySet
 from django_filters.rest_framework import BooleanFilter, CharFilter, FilterSet
 
-from .models import Example
+from .models import Assignment, Example, ExampleState
+from labels.models import BoundingBox, Category, Relation, Segmentation, Span
+from projects.models import Project, ProjectType
+
+# The label tables each project type annotates, with the field of their label type.
+LABEL_TABLES = {
+    ProjectType.DOCUMENT_CLASSIFICATION: [(Category, "label")],
+    ProjectType.SEQUENCE_LABELING: [(Span, "label"), (Relation, "type")],
+    ProjectType.INTENT_DETECTION_AND_SLOT_FILLING: [(Category, "label"), (Span, "label")],
+    ProjectType.IMAGE_CLASSIFICATION: [(Category, "label")],
+    ProjectType.BOUNDING_BOX: [(BoundingBox, "label")],
+    ProjectType.SEGMENTATION: [(Segmentation, "label")],
+}
+ALL_LABEL_TABLES = [
+    (Category, "label"),
+    (Span, "label"),
+    (Relation, "type"),
+    (BoundingBox, "label"),
+    (Segmentation, "label"),
+]
 
 
 class ExampleFilter(FilterSet):
@@ -9,32 +30,39 @@ class ExampleFilter(FilterSet):
     label = CharFilter(method="filter_by_label")
     assignee = CharFilter(method="filter_by_assignee")
 
+    @property
+    def project(self) -> Optional[Project]:
+        """The project (or version) of the list view, if the filter runs in one."""
+        context = getattr(self.request, "parser_context", None) or {}
+        project = getattr(context.get("view"), "project", None)
+        return project if isinstance(project, Project) else None
+
     def filter_by_state(self, queryset, field_name, is_confirmed: bool):
-        queryset = queryset.annotate(
-            num_confirm=Count(
-                expression=field_name,
-                filter=Q(**{f"{field_name}__confirmed_by": self.request.user})
-                | Q(project__collaborative_annotation=True),
+        # Lists built with `with_annotation_state` already carry the flag.
+        if "confirmed" in queryset.query.annotations:
+            return queryset.filter(confirmed=is_confirmed)
+        states = ExampleState.objects.filter(example=OuterRef("pk"))
+        project = self.project
+        if project is None:
+            states = states.filter(
+                Q(confirmed_by=self.request.user) | Q(example__project__collaborative_annotation=True)
             )
-        )
-        if is_confirmed:
-            queryset = queryset.filter(num_confirm__gte=1)
-        else:
-            queryset = queryset.filter(num_confirm__lte=0)
-        return queryset
+        elif not (project.original_project or project).collaborative_annotation:
+            states = states.filter(confirmed_by=self.request.user)
+        return queryset.filter(Exists(states) if is_confirmed else ~Exists(states))
 
     def filter_by_label(self, queryset: QuerySet, field_name: str, label: str) -> QuerySet:
         """Filter examples by a given label name.
 
-        This performs filtering on all of the following labels at once:
+        Only the label tables of the project type are checked, each with an
+        `EXISTS` subquery restricted to the version of the list. Outside of a
+        project list, the following labels of any version are checked:
         - categories
         - spans
         - relations
         - bboxes
         - segmentations
 
-        Todo: Consider project type to make filtering more efficient.
-
         Args:
             queryset (QuerySet): QuerySet to filter.
             field_name (str): This equals to `label`.
@@ -43,17 +71,23 @@ class ExampleFilter(FilterSet):
         Returns:
             QuerySet: Filtered examples.
         """
-        queryset = queryset.filter(
-            Q(categories__label__text=label)
-            | Q(spans__label__text=label)
-            | Q(relations__type__text=label)
-            | Q(bboxes__label__text=label)
-            | Q(segmentations__label__text=label)
-        )
-        return queryset
+        tables: List[Tuple[Type[Model], str]] = ALL_LABEL_TABLES
+        versions = {}
+        project = self.project
+        if project is not None:
+            tables = LABEL_TABLES.get(project.project_type, [])
+            versions = {"project_version": project.version}
+        if not tables:
+            return queryset.none()
+        condition = Q()
+        for model, type_field in tables:
+            labels = model.objects.filter(example=OuterRef("pk"), **versions, **{f"{type_field}__text": label})
+            condition |= Q(Exists(labels))
+        return queryset.filter(condition)
 
     def filter_by_assignee(self, queryset: QuerySet, field_name: str, assignee: str) -> QuerySet:
-        return queryset.filter(assignments__assignee__username=assignee)
+        assignments = Assignment.objects.filter(example=OuterRef("pk"), assignee__username=assignee)
+        return queryset.filter(Exists(assignments))
 
     class Meta:
         model = Example
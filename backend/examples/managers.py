@@ -1,9 +1,51 @@
-from django.db.models import Count, Manager
+from django.db.models import (
+    Count,
+    Exists,
+    IntegerField,
+    Manager,
+    OuterRef,
+    QuerySet,
+    Subquery,
+)
+from django.db.models.functions import Coalesce
 
 
-class ExampleManager(Manager):
+class ExampleQuerySet(QuerySet):
+    def with_annotation_state(self, user, collaborative: bool):
+        """Load what `ExampleSerializer` shows along with the examples.
+
+        Annotates `num_comments` and `confirmed` (by anyone when collaborative, otherwise by the user),
+        joins the approver and prefetches the assignments with their assignees,
+        so serializing a page costs the same number of queries whatever its size.
+        """
+        from .models import Comment, ExampleState
+
+        comments = (
+            Comment.objects.filter(example=OuterRef("pk"))
+            .order_by()
+            .values("example")
+            .annotate(count=Count("id"))
+            .values("count")
+        )
+        states = ExampleState.objects.filter(example=OuterRef("pk"))
+        if not collaborative:
+            states = states.filter(confirmed_by=user)
+        return (
+            self.select_related("annotations_approved_by")
+            .prefetch_related("assignments__assignee")
+            .annotate(
+                num_comments=Coalesce(Subquery(comments, output_field=IntegerField()), 0),
+                confirmed=Exists(states),
+            )
+        )
+
+
+class ExampleManager(Manager.from_queryset(ExampleQuerySet)):  # type: ignore
     def bulk_create(self, objs, batch_size=None, ignore_conflicts=False):
+        from labels.models import AnnotationRevision
+
         super().bulk_create(objs, batch_size=batch_size, ignore_conflicts=ignore_conflicts)
+        AnnotationRevision.objects.bump_projects({data.project_id for data in objs})
         uuids = [data.uuid for data in objs]
         examples = self.in_bulk(uuids, field_name="uuid")
         return [examples[uid] for uid in uuids]
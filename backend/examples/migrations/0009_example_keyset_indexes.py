@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("examples", "0008_assignment"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="example",
+            index=models.Index(fields=["project", "created_at", "id"], name="examples_ex_project_3ddcfb_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="example",
+            index=models.Index(fields=["project", "score", "id"], name="examples_ex_project_cd4a3e_idx"),
+        ),
+    ]
@@ -0,0 +1,14 @@
+from django.db import migrations
+
+from examples.search import create_search_indexes, drop_search_indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("examples", "0009_example_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, reverse_code=drop_search_indexes),
+    ]
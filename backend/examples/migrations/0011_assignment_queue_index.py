@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("examples", "0010_example_search_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="assignment",
+            index=models.Index(fields=["project", "assignee", "id"], name="examples_as_project_030ccd_idx"),
+        ),
+    ]
@@ -0,0 +1,14 @@
+from django.db import migrations
+
+from examples.search import rebuild_search_indexes
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("examples", "0011_assignment_queue_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_search_indexes, reverse_code=migrations.RunPython.noop),
+    ]
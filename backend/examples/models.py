@@ -23,6 +23,19 @@ class Example(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    def save(self, *args, **kwargs):
+        from labels.models import AnnotationRevision
+
+        super().save(*args, **kwargs)
+        AnnotationRevision.objects.bump_projects([self.project_id])
+
+    def delete(self, *args, **kwargs):
+        from labels.models import AnnotationRevision
+
+        deleted = super().delete(*args, **kwargs)
+        AnnotationRevision.objects.bump_projects([self.project_id])
+        return deleted
+
     @property
     def comment_count(self):
         return Comment.objects.filter(example=self.id).count()
@@ -36,6 +49,11 @@ class Example(models.Model):
 
     class Meta:
         ordering = ["created_at"]
+        # Keyset pagination walks these in order.
+        indexes = [
+            models.Index(fields=["project", "created_at", "id"]),
+            models.Index(fields=["project", "score", "id"]),
+        ]
 
 
 class Assignment(models.Model):
@@ -48,6 +66,8 @@ class Assignment(models.Model):
 
     class Meta:
         unique_together = (("example", "assignee"),)
+        # The annotation queue walks a user's assignments in order.
+        indexes = [models.Index(fields=["project", "assignee", "id"])]
 
     def clean(self):
         # assignee must be a member of the project
@@ -0,0 +1,147 @@
+import base64
+import hashlib
+import json
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from labels.models import AnnotationRevision
+
+
+class Cursor(NamedTuple):
+    value: object
+    id: int
+    reverse: bool
+
+
+class ExamplePagination(LimitOffsetPagination):
+    """Offset pagination with an opt-in keyset mode for large projects.
+
+    Passing `cursor` (empty for the first page) pages on the list's ordering
+    field and the example id instead of an offset, so a page costs O(page) at
+    any depth. The responses keep the `count`, `next`, `previous` and
+    `results` keys, `next` and `previous` carrying the cursors.
+
+    In keyset mode the total count is cached for `EXAMPLE_COUNT_CACHE_TIMEOUT`
+    seconds under the `AnnotationRevision` of the project: it follows added and
+    deleted examples at once, but may lag confirmations covered by filters.
+    Orderings on other fields, such as the random order of assignments, fall
+    back to offsets.
+    """
+
+    cursor_query_param = "cursor"
+    cursor_fields = ("created_at", "updated_at", "score")
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        ordering = self.get_keyset_ordering(queryset) if self.keyset else None
+        if ordering is None:
+            self.keyset = False
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.count = self.get_cached_count(queryset, view)
+        self.field, descending = ordering
+        cursor = self.decode_cursor(request, queryset.model)
+        self.reverse = cursor.reverse if cursor else False
+
+        prefix = "-" if descending != self.reverse else ""
+        queryset = queryset.order_by(f"{prefix}{self.field}", f"{prefix}id")
+        if cursor:
+            op = "lt" if prefix else "gt"
+            queryset = queryset.filter(
+                Q(**{f"{self.field}__{op}": cursor.value}) | Q(**{self.field: cursor.value, f"id__{op}": cursor.id})
+            )
+        results = list(queryset[: self.limit + 1])
+        self.has_more = len(results) > self.limit
+        results = results[: self.limit]
+        if self.reverse:
+            results.reverse()
+        self.has_cursor = cursor is not None
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response(
+            OrderedDict(
+                [
+                    ("count", self.count),
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        # Paging backwards starts from a page that is still ahead.
+        if not self.page or not (self.has_more or self.reverse):
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if not self.page or not (self.has_more if self.reverse else self.has_cursor):
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_keyset_ordering(self, queryset) -> Optional[Tuple[str, bool]]:
+        """The field to page on and whether it is descending, or None if the ordering has no keyset field."""
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        if not ordering or not isinstance(ordering[0], str):
+            return None
+        field = ordering[0].lstrip("-")
+        if field not in self.cursor_fields:
+            return None
+        return field, ordering[0].startswith("-")
+
+    def get_cached_count(self, queryset, view) -> int:
+        project = view.project
+        original_project = project.original_project or project
+        tag = AnnotationRevision.objects.current(original_project.id).tag
+        sql, params = queryset.order_by().query.sql_with_params()
+        digest = hashlib.md5(repr((sql, params)).encode()).hexdigest()
+        key = f"examples:count:{tag}:{digest}"
+        count = cache.get(key)
+        if count is None:
+            count = self.get_count(queryset)
+            cache.set(key, count, settings.EXAMPLE_COUNT_CACHE_TIMEOUT)
+        return count
+
+    def encode_cursor(self, example, reverse: bool) -> str:
+        value = getattr(example, self.field)
+        # Keep the microseconds, which DjangoJSONEncoder would round away.
+        if hasattr(value, "isoformat"):
+            value = value.isoformat()
+        token = base64.urlsafe_b64encode(json.dumps([value, example.id, reverse]).encode()).decode()
+        url = remove_query_param(self.request.build_absolute_uri(), self.offset_query_param)
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request, model) -> Optional[Cursor]:
+        token = request.query_params[self.cursor_query_param]
+        if not token:
+            return None
+        try:
+            value, example_id, reverse = json.loads(base64.urlsafe_b64decode(token.encode()))
+            value = model._meta.get_field(self.field).to_python(value)
+            # Encoded cursors always hold a value, and None cannot be compared to.
+            if value is None:
+                raise ValueError("The cursor has no value.")
+            return Cursor(value, int(example_id), bool(reverse))
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
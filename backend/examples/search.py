@@ -0,0 +1,195 @@
+from typing import Dict, List, Optional, Sequence, Type
+
+from django.db import DatabaseError, connections, transaction
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+# The text columns indexed for each table.
+SEARCH_INDEXES = {
+    "examples_example": ("text", "filename"),
+    "examples_comment": ("text",),
+}
+
+
+class SearchBackend:
+    """Trigram index over text columns of a table.
+
+    It finds the same rows as the `icontains` lookups of `SearchFilter`, any
+    substring of three characters or more included, whatever the language.
+    Subclasses create the index in a migration, which keeps it up to date on
+    every insert and update, bulk imports included.
+
+    Args:
+        table: The indexed table.
+        columns: The indexed text columns.
+    """
+
+    vendor: str
+
+    def __init__(self, table: str, columns: Sequence[str]):
+        self.table = table
+        self.columns = columns
+
+    def create(self, schema_editor):
+        raise NotImplementedError
+
+    def drop(self, schema_editor):
+        raise NotImplementedError
+
+    def search(self, queryset, terms: List[str], connection):
+        """Filter the rows containing every term in any column, or return None if the index cannot serve the query."""
+        raise NotImplementedError
+
+
+class PostgresSearchBackend(SearchBackend):
+    """`pg_trgm` GIN indexes on the expressions Django compares in `icontains` lookups.
+
+    The lookups of `SearchFilter` use them as they are, so searching needs no
+    query of its own. Databases where the extension cannot be created keep
+    the unindexed search.
+    """
+
+    vendor = "postgresql"
+
+    def index_name(self, column: str) -> str:
+        return f"{self.table}_{column}_trgm_idx"
+
+    def create(self, schema_editor):
+        try:
+            with transaction.atomic(using=schema_editor.connection.alias):
+                schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                for column in self.columns:
+                    schema_editor.execute(
+                        f'CREATE INDEX "{self.index_name(column)}" ON "{self.table}" '
+                        f'USING GIN ((UPPER("{column}"::text)) gin_trgm_ops)'
+                    )
+        except DatabaseError:
+            pass
+
+    def drop(self, schema_editor):
+        # The tsvector index of the first version of the search.
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{self.table}_search_idx"')
+        for column in self.columns:
+            schema_editor.execute(f'DROP INDEX IF EXISTS "{self.index_name(column)}"')
+
+    def search(self, queryset, terms: List[str], connection):
+        return None
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """An external-content FTS5 table with the trigram tokenizer, kept in sync by triggers.
+
+    Each term is matched as a phrase of trigrams, i.e. as a substring. Terms
+    shorter than three characters have no trigram, so queries holding one
+    keep the default search, as do SQLite builds without the trigram
+    tokenizer (before 3.34) and tables whose triggers were lost when a
+    migration rebuilt them; running `drop` and `create` again restores the index.
+    """
+
+    vendor = "sqlite"
+
+    @property
+    def fts_table(self) -> str:
+        return f"{self.table}_fts"
+
+    @property
+    def triggers(self) -> List[str]:
+        return [f"{self.fts_table}_{event}" for event in ["insert", "delete", "update"]]
+
+    def create(self, schema_editor):
+        columns = ", ".join(self.columns)
+        new_values = ", ".join(f"new.{column}" for column in self.columns)
+        old_values = ", ".join(f"old.{column}" for column in self.columns)
+        delete = (
+            f"INSERT INTO {self.fts_table}({self.fts_table}, rowid, {columns}) VALUES ('delete', old.id, {old_values});"
+        )
+        insert = f"INSERT INTO {self.fts_table}(rowid, {columns}) VALUES (new.id, {new_values});"
+        try:
+            with transaction.atomic(using=schema_editor.connection.alias):
+                schema_editor.execute(
+                    f"CREATE VIRTUAL TABLE {self.fts_table} USING fts5({columns}, content='{self.table}', "
+                    "content_rowid='id', tokenize='trigram')"
+                )
+        except DatabaseError:
+            return
+        for statement in [
+            f"CREATE TRIGGER {self.fts_table}_insert AFTER INSERT ON {self.table} BEGIN {insert} END",
+            f"CREATE TRIGGER {self.fts_table}_delete AFTER DELETE ON {self.table} BEGIN {delete} END",
+            f"CREATE TRIGGER {self.fts_table}_update AFTER UPDATE OF {columns} ON {self.table} "
+            f"BEGIN {delete} {insert} END",
+            f"INSERT INTO {self.fts_table}({self.fts_table}) VALUES ('rebuild')",
+        ]:
+            schema_editor.execute(statement)
+
+    def drop(self, schema_editor):
+        for trigger in self.triggers:
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {self.fts_table}")
+
+    def is_available(self, connection) -> bool:
+        # Django rebuilds SQLite tables to alter them, which drops their triggers
+        # and leaves the index stale, so the triggers are checked too.
+        names = [self.fts_table, *self.triggers]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT count(*) FROM sqlite_master WHERE name IN ({', '.join(['%s'] * len(names))})",
+                names,
+            )
+            return cursor.fetchone()[0] == len(names)
+
+    def search(self, queryset, terms: List[str], connection):
+        if any(len(term) < 3 for term in terms) or not self.is_available(connection):
+            return None
+        # Quoted phrases, so the terms are never read as query syntax.
+        query = " ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+        match = RawSQL(f"SELECT rowid FROM {self.fts_table} WHERE {self.fts_table} MATCH %s", (query,))
+        return queryset.filter(pk__in=match)
+
+
+backends: Dict[str, Type[SearchBackend]] = {
+    backend.vendor: backend for backend in [PostgresSearchBackend, SQLiteSearchBackend]
+}
+
+
+def get_search_backend(table: str, vendor: str) -> Optional[SearchBackend]:
+    """The search index of the table on the given database vendor, if there is one."""
+    if table not in SEARCH_INDEXES or vendor not in backends:
+        return None
+    return backends[vendor](table, SEARCH_INDEXES[table])
+
+
+def create_search_indexes(apps, schema_editor):
+    for table in SEARCH_INDEXES:
+        backend = get_search_backend(table, schema_editor.connection.vendor)
+        if backend:
+            backend.create(schema_editor)
+
+
+def drop_search_indexes(apps, schema_editor):
+    for table in SEARCH_INDEXES:
+        backend = get_search_backend(table, schema_editor.connection.vendor)
+        if backend:
+            backend.drop(schema_editor)
+
+
+def rebuild_search_indexes(apps, schema_editor):
+    drop_search_indexes(apps, schema_editor)
+    create_search_indexes(apps, schema_editor)
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """`SearchFilter` served by the trigram index of the model's table when it can be.
+
+    The results are those of the `icontains` lookups over `search_fields`,
+    which are used as they are on tables or databases without an index, such
+    as MySQL.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        connection = connections[queryset.db]
+        backend = get_search_backend(queryset.model._meta.db_table, connection.vendor)
+        filtered = backend.search(queryset, terms, connection) if terms and backend else None
+        if filtered is None:
+            return super().filter_queryset(request, queryset, view)
+        return filtered
@@ -26,6 +26,7 @@ class AssignmentSerializer(serializers.ModelSerializer):
 
 class ExampleSerializer(serializers.ModelSerializer):
     annotation_approver = serializers.SerializerMethodField()
+    comment_count = serializers.SerializerMethodField()
     is_confirmed = serializers.SerializerMethodField()
     assignments = serializers.SerializerMethodField()
 
@@ -34,7 +35,16 @@ class ExampleSerializer(serializers.ModelSerializer):
         approver = instance.annotations_approved_by
         return approver.username if approver else None
 
+    @classmethod
+    def get_comment_count(cls, instance):
+        if hasattr(instance, "num_comments"):
+            return instance.num_comments
+        return instance.comment_count
+
     def get_is_confirmed(self, instance):
+        # Querysets built with `with_annotation_state` already carry the flag.
+        if hasattr(instance, "confirmed"):
+            return instance.confirmed
         user = self.context.get("request").user
         if instance.project.collaborative_annotation:
             states = instance.states.all()
@@ -66,7 +76,7 @@ class ExampleSerializer(serializers.ModelSerializer):
             "score",
             "assignments",
         ]
-        read_only_fields = ["filename", "is_confirmed", "upload_name", "assignments"]
+        read_only_fields = ["filename", "comment_count", "is_confirmed", "upload_name", "assignments"]
 
 
 class ExampleStateSerializer(serializers.ModelSerializer):
@@ -1,8 +1,13 @@
+import base64
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils.http import urlencode
 from rest_framework import status
 from rest_framework.reverse import reverse
 
-from .utils import make_assignment, make_doc, make_example_state
+from .utils import make_assignment, make_comment, make_doc, make_example_state
 from api.tests.utils import CRUDMixin
 from projects.models import ProjectType
 from projects.tests.utils import prepare_project
@@ -146,3 +151,103 @@ class TestExampleDetail(CRUDMixin):
 
     def test_denies_non_project_member_to_delete_example(self):
         self.assert_delete(self.non_member, status.HTTP_403_FORBIDDEN)
+
+
+class TestExampleListQueries(CRUDMixin):
+    def setUp(self):
+        self.project = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION)
+        self.url = reverse(viewname="example_list", args=[self.project.item.id])
+        self.url += "?" + urlencode({"limit": 50})
+
+    def add_examples(self, count):
+        for _ in range(count):
+            example = make_doc(self.project.item)
+            make_example_state(example, self.project.admin)
+            make_comment(example, self.project.admin)
+            for member in self.project.members:
+                make_assignment(self.project.item, example, member)
+
+    def count_queries(self, user):
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context)
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        for member in self.project.members:
+            self.add_examples(1)
+            few = self.count_queries(member)
+            self.add_examples(5)
+            many = self.count_queries(member)
+            self.assertEqual(few, many)
+
+    def test_list_shows_comment_count_and_confirmation(self):
+        self.add_examples(1)
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        item = response.data["results"][0]
+        self.assertEqual(item["comment_count"], 1)
+        self.assertTrue(item["is_confirmed"])
+        self.assertEqual(len(item["assignments"]), len(self.project.members))
+        response = self.assert_fetch(self.project.annotator, status.HTTP_200_OK)
+        self.assertFalse(response.data["results"][0]["is_confirmed"])
+
+
+class TestExampleListCursor(CRUDMixin):
+    def setUp(self):
+        self.project = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION)
+        self.examples = [make_doc(self.project.item) for _ in range(5)]
+        self.url = reverse(viewname="example_list", args=[self.project.item.id])
+        self.client.force_login(self.project.admin)
+
+    def walk(self, url, link):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data["count"], len(self.examples))
+            ids.append([item["id"] for item in response.data["results"]])
+            url = response.data[link]
+        return ids
+
+    def test_walks_examples_in_creation_order(self):
+        pages = self.walk(self.url + "?" + urlencode({"cursor": "", "limit": 2}), "next")
+        expected = [example.id for example in self.examples]
+        self.assertEqual(pages, [expected[:2], expected[2:4], expected[4:]])
+
+    def test_walks_back_with_previous_links(self):
+        pages = self.walk(self.url + "?" + urlencode({"cursor": "", "limit": 2}), "next")
+        response = self.client.get(self.url + "?" + urlencode({"cursor": "", "limit": 2}))
+        last = self.client.get(self.client.get(response.data["next"]).data["next"])
+        self.assertIsNone(last.data["next"])
+        backwards = self.walk(last.data["previous"], "previous")
+        self.assertEqual(backwards, pages[:2][::-1])
+
+    def test_pages_on_score_ordering(self):
+        for i, example in enumerate(self.examples):
+            example.score = i % 2
+            example.save()
+        pages = self.walk(self.url + "?" + urlencode({"cursor": "", "limit": 2, "ordering": "-score"}), "next")
+        expected = sorted(self.examples, key=lambda example: (-example.score, -example.id))
+        self.assertEqual(sum(pages, []), [example.id for example in expected])
+
+    def test_count_follows_new_examples(self):
+        url = self.url + "?" + urlencode({"cursor": "", "limit": 2})
+        self.walk(url, "next")
+        self.examples.append(make_doc(self.project.item))
+        self.assertEqual(len(sum(self.walk(url, "next"), [])), 6)
+
+    def test_rejects_invalid_cursor(self):
+        response = self.client.get(self.url + "?" + urlencode({"cursor": "invalid"}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_rejects_cursor_without_value(self):
+        for value in [None, 1, False], [1, None, False]:
+            token = base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+            response = self.client.get(self.url + "?" + urlencode({"cursor": token}))
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_offset_pagination_is_the_default(self):
+        response = self.client.get(self.url + "?" + urlencode({"limit": 2, "offset": 2}))
+        self.assertEqual([item["id"] for item in response.data["results"]], [e.id for e in self.examples[2:4]])
+        self.assertIn("offset=4", response.data["next"])
@@ -2,6 +2,7 @@ from unittest.mock import MagicMock
 
 from django.test import TestCase
 from model_mommy import mommy
+from rest_framework.reverse import reverse
 
 from .utils import make_doc, make_example_state
 from examples.filters import ExampleFilter
@@ -80,3 +81,36 @@ class TestExampleFilterOnCollaborative(TestFilterMixin):
         for member in self.project.members:
             self.request.user = member
             self.assert_filter(data={"confirmed": ""}, expected=1)
+
+
+class TestExampleListFilterByLabel(TestCase):
+    def setUp(self):
+        self.project = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION)
+        self.example = make_doc(self.project.item)
+        make_doc(self.project.item)
+        label_type = mommy.make("CategoryType", project=self.project.item, text="positive")
+        mommy.make("Category", example=self.example, label=label_type, user=self.project.admin)
+        self.client.force_login(self.project.admin)
+
+    def fetch(self, project, **params):
+        url = reverse(viewname="example_list", args=[project.id])
+        response = self.client.get(url, params)
+        return [item["id"] for item in response.data["results"]]
+
+    def test_returns_examples_with_label(self):
+        self.assertEqual(self.fetch(self.project.item, label="positive"), [self.example.id])
+
+    def test_ignores_label_tables_of_other_project_types(self):
+        span_type = mommy.make("SpanType", project=self.project.item, text="person")
+        mommy.make("Span", example=self.example, label=span_type, start_offset=0, end_offset=1)
+        self.assertEqual(self.fetch(self.project.item, label="person"), [])
+
+    def test_ignores_labels_of_other_versions(self):
+        version = self.project.item.create_new_version()
+        self.assertEqual(self.fetch(version, label="positive"), [])
+        self.assertEqual(self.fetch(self.project.item, label="positive"), [self.example.id])
+
+    def test_combines_label_and_state_filters(self):
+        make_example_state(self.example, self.project.admin)
+        self.assertEqual(self.fetch(self.project.item, label="positive", confirmed="true"), [self.example.id])
+        self.assertEqual(self.fetch(self.project.item, label="positive", confirmed="false"), [])
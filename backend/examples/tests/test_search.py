@@ -0,0 +1,70 @@
+from django.db import connection
+from django.db.models import Q
+from model_mommy import mommy
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from .utils import make_comment
+from api.tests.utils import CRUDMixin
+from examples.models import Example
+from examples.search import get_search_backend
+from projects.tests.utils import prepare_project
+
+
+class TestExampleSearch(CRUDMixin):
+    def setUp(self):
+        self.project = prepare_project()
+        self.example = mommy.make("Example", project=self.project.item, text="The quick brown fox")
+        mommy.make("Example", project=self.project.item, text="A lazy dog")
+        self.japanese = mommy.make("Example", project=self.project.item, text="東京都に住んでいます")
+        self.url = reverse(viewname="example_list", args=[self.project.item.id])
+        self.client.force_login(self.project.admin)
+
+    def search(self, query):
+        response = self.client.get(self.url, {"q": query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["id"] for item in response.data["results"]]
+
+    def test_uses_search_index(self):
+        backend = get_search_backend(Example._meta.db_table, connection.vendor)
+        self.assertIsNotNone(backend)
+        self.assertIsNotNone(backend.search(Example.objects.all(), ["quick"], connection))
+
+    def test_matches_substrings(self):
+        self.assertEqual(self.search("UICK"), [self.example.id])
+        self.assertEqual(self.search("住んで"), [self.japanese.id])
+
+    def test_matches_icontains(self):
+        for query in ["quick", "own fo", "ox", "a", "quick fox", "quick dog", "京都", "qui\"ck", "fox*", "%"]:
+            expected = Example.objects.filter(project=self.project.item)
+            for term in query.split():
+                expected = expected.filter(Q(text__icontains=term) | Q(filename__icontains=term))
+            self.assertEqual(self.search(query), [example.id for example in expected], query)
+
+    def test_follows_updates_and_deletes(self):
+        self.example.text = "A slow turtle"
+        self.example.save()
+        self.assertEqual(self.search("quick"), [])
+        self.assertEqual(self.search("turtle"), [self.example.id])
+        self.example.delete()
+        self.assertEqual(self.search("turtle"), [])
+
+    def test_indexes_bulk_imports(self):
+        examples = Example.objects.bulk_create([Example(project=self.project.item, text="imported zebra")])
+        self.assertEqual(self.search("zebra"), [examples[0].id])
+
+
+class TestCommentSearch(CRUDMixin):
+    def setUp(self):
+        self.project = prepare_project()
+        example = mommy.make("Example", project=self.project.item)
+        self.comment = make_comment(example, self.project.admin)
+        self.comment.text = "Needs another review"
+        self.comment.save()
+        make_comment(example, self.project.admin)
+        self.url = reverse(viewname="comment_list", args=[self.project.item.id])
+        self.client.force_login(self.project.admin)
+
+    def test_searches_comment_text(self):
+        response = self.client.get(self.url, {"q": "review"})
+        self.assertEqual([item["id"] for item in response.data["results"]], [self.comment.id])
@@ -5,6 +5,7 @@ from rest_framework.response import Response
 
 from examples.models import Comment
 from examples.permissions import IsOwnComment
+from examples.search import FullTextSearchFilter
 from examples.serializers import CommentSerializer
 from projects.permissions import IsProjectMember
 
@@ -12,7 +13,7 @@ from projects.permissions import IsProjectMember
 class CommentList(generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated & IsProjectMember]
     serializer_class = CommentSerializer
-    filter_backends = (DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter)
+    filter_backends = (DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter)
     filterset_fields = ["example"]
     search_fields = ("text",)
     ordering_fields = ("created_at", "example")
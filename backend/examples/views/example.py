@@ -1,4 +1,5 @@
 from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, generics, status
 from rest_framework.permissions import IsAuthenticated
@@ -6,7 +7,10 @@ from rest_framework.response import Response
 
 from examples.filters import ExampleFilter
 from examples.models import Example
+from examples.pagination import ExamplePagination
+from examples.search import FullTextSearchFilter
 from examples.serializers import ExampleSerializer
+from labels.models import AnnotationRevision
 from projects.models import Member, Project
 from projects.permissions import IsProjectAdmin, IsProjectStaffAndReadOnly
 
@@ -18,13 +22,14 @@ from rest_framework.views import APIView
 class ExampleList(generics.ListCreateAPIView):
     serializer_class = ExampleSerializer
     permission_classes = [IsAuthenticated & (IsProjectAdmin | IsProjectStaffAndReadOnly)]
-    filter_backends = (DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter)
+    filter_backends = (DjangoFilterBackend, FullTextSearchFilter, filters.OrderingFilter)
     ordering_fields = ("created_at", "updated_at", "score")
     search_fields = ("text", "filename")
     model = Example
     filterset_class = ExampleFilter
+    pagination_class = ExamplePagination
 
-    @property
+    @cached_property
     def project(self):
         return get_object_or_404(Project, pk=self.kwargs["project_id"])
 
@@ -34,10 +39,13 @@ class ExampleList(generics.ListCreateAPIView):
         # Get the original project (where examples are stored)
         original_project = self.project.original_project or self.project
         
+        examples = self.model.objects.with_annotation_state(
+            self.request.user, original_project.collaborative_annotation
+        )
         if member.is_admin():
-            return self.model.objects.filter(project=original_project)
+            return examples.filter(project=original_project)
 
-        queryset = self.model.objects.filter(project=original_project, assignments__assignee=self.request.user)
+        queryset = examples.filter(project=original_project, assignments__assignee=self.request.user)
         if self.project.random_order:
             queryset = queryset.order_by("assignments__id")
         return queryset
@@ -56,6 +64,7 @@ class ExampleList(generics.ListCreateAPIView):
             queryset.filter(pk__in=delete_ids).delete()
         else:
             queryset.all().delete()
+        AnnotationRevision.objects.bump_projects([original_project.id])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
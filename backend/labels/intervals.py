@@ -0,0 +1,49 @@
+from bisect import bisect_left, bisect_right
+from typing import Iterable, List, Tuple
+
+
+def overlaps(start: int, end: int, other_start: int, other_end: int) -> bool:
+    """Whether the half-open intervals [start, end) and [other_start, other_end) share a position."""
+    return start < other_end and other_start < end
+
+
+class Intervals:
+    """Union of half-open intervals, stored as sorted disjoint runs.
+
+    Checking whether a new interval overlaps any of the added ones is a binary
+    search, so checking n spans against each other costs O(n log n) instead
+    of comparing every pair.
+
+    Examples:
+        >>> intervals = Intervals([(0, 5), (10, 12)])
+        >>> intervals.overlaps(4, 6)
+        True
+        >>> intervals.overlaps(5, 10)
+        False
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[int, int]] = ()):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        # Sorted insertion always appends, so building costs O(n log n).
+        for start, end in sorted(intervals):
+            self.add(start, end)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def overlaps(self, start: int, end: int) -> bool:
+        i = bisect_right(self.starts, start)
+        if i > 0 and self.ends[i - 1] > start:
+            return True
+        return i < len(self.starts) and self.starts[i] < end
+
+    def add(self, start: int, end: int):
+        # The runs that overlap or touch [start, end) are merged with it.
+        lo = bisect_left(self.ends, start)
+        hi = bisect_right(self.starts, end)
+        if lo < hi:
+            start = min(start, self.starts[lo])
+            end = max(end, self.ends[hi - 1])
+        self.starts[lo:hi] = [start]
+        self.ends[lo:hi] = [end]
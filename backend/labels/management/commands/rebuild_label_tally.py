@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from examples.models import Example
+from labels.models import ExampleLabelTally
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-example label counts from the category annotations"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--project", type=int, default=None, help="Only rebuild the examples of this project.")
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only report the examples whose counts are out of date, without rebuilding them.",
+        )
+
+    def handle(self, *args, **options):
+        examples = Example.objects.all()
+        if options["project"] is not None:
+            examples = examples.filter(project_id=options["project"])
+
+        if options["verify"]:
+            mismatches = ExampleLabelTally.objects.find_mismatches(examples)
+            if mismatches:
+                raise CommandError(f"Label counts are out of date for {len(mismatches)} example(s).")
+            self.stdout.write(self.style.SUCCESS("Label counts are consistent."))
+            return
+
+        ExampleLabelTally.objects.rebuild(examples)
+        mismatches = ExampleLabelTally.objects.find_mismatches(examples)
+        if mismatches:
+            raise CommandError(f"Label counts are still out of date for {len(mismatches)} example(s).")
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt label counts for {examples.count()} example(s)."))
@@ -1,36 +1,120 @@
-from django.db.models import Count, Manager
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Count, F, Manager, QuerySet
+from django.db.models.functions import Coalesce
+
+from .intervals import Intervals
+
+
+class LabelQuerySet(QuerySet):
+    def delete(self):
+        example_ids = set(self.values_list("example_id", flat=True))
+        deleted = super().delete()
+        if example_ids:
+            self.after_delete(example_ids)
+        return deleted
+
+    def after_delete(self, example_ids):
+        from .models import AnnotationRevision
+
+        AnnotationRevision.objects.bump(example_ids)
 
 
 class LabelManager(Manager):
     label_type_field = "label"
 
-    def calc_label_distribution(self, examples, members, labels):
-        """Calculate label distribution.
+    def get_queryset(self):
+        return LabelQuerySet(self.model, using=self._db)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        created = super().bulk_create(objs, *args, **kwargs)
+        if created:
+            self.after_bulk_create({label.example_id for label in created})
+        return created
+
+    def after_bulk_create(self, example_ids):
+        from .models import AnnotationRevision
+
+        AnnotationRevision.objects.bump(example_ids)
+
+    def count_by_version(self, original_project_id: int) -> Dict[int, List[Tuple[int, int, int]]]:
+        """Count the labels of every version of a project per user and label type.
+
+        One grouped query covers all versions, and the result is cached until
+        the annotation revision of the project changes. The rows hold ids, so
+        renaming a user or a label type leaves them valid.
 
         Args:
-            examples: example queryset.
-            members: user queryset.
-            labels: label queryset.
+            original_project_id: the project where the examples are stored.
 
         Returns:
-            label distribution per user.
+            (user id, label type id, count) rows per project version.
+        """
+        from .models import AnnotationRevision
+
+        tag = AnnotationRevision.objects.current(original_project_id).tag
+        key = f"labels:distribution:{self.model._meta.label_lower}:{original_project_id}:{tag}"
+        counts = cache.get(key)
+        if counts is None:
+            rows = (
+                self.filter(example__project_id=original_project_id)
+                .values_list("project_version", "user_id", f"{self.label_type_field}_id")
+                .annotate(count=Count("id"))
+                .order_by()
+            )
+            counts = defaultdict(list)
+            for version, user_id, label_id, count in rows:
+                counts[version].append((user_id, label_id, count))
+            counts = dict(counts)
+            cache.set(key, counts, settings.ANALYTICS_CACHE_TIMEOUT)
+        return counts
+
+    def calc_label_distribution(self, project, usernames: List[str], label_texts: List[str], compact=False):
+        """Calculate the label distribution of a project version from the cached counts.
+
+        The ids of the counts are mapped to the current names of the users and
+        label types, with one query each.
+
+        Args:
+            project: the project version.
+            usernames: the users to report, in order.
+            label_texts: the labels to report, in order.
+            compact: return a matrix instead of nested dicts, which is smaller for large projects.
+
+        Returns:
+            label distribution per user, or the users, the labels and a users x labels count matrix.
 
         Examples:
-            >>> self.calc_label_distribution(examples, members, labels)
-            {'admin': {'positive': 10, 'negative': 5}}
+            >>> self.calc_label_distribution(project, ["admin"], ["positive", "negative"], compact=True)
+            {'users': ['admin'], 'labels': ['positive', 'negative'], 'counts': [[10, 5]]}
         """
-        distribution = {member.username: {label.text: 0 for label in labels} for member in members}
-        items = (
-            self.filter(example_id__in=examples)
-            .values("user__username", f"{self.label_type_field}__text")
-            .annotate(count=Count(f"{self.label_type_field}__text"))
-        )
-        for item in items:
-            username = item["user__username"]
-            label = item[f"{self.label_type_field}__text"]
-            count = item["count"]
-            distribution[username][label] = count
-        return distribution
+        original_project = project.original_project or project
+        rows = self.count_by_version(original_project.id).get(project.version, [])
+        user_index = {username: i for i, username in enumerate(usernames)}
+        label_index = {text: i for i, text in enumerate(label_texts)}
+        counts = [[0] * len(label_texts) for _ in usernames]
+        if rows:
+            label_type = self.model._meta.get_field(self.label_type_field).related_model
+            names = dict(
+                get_user_model()
+                .objects.filter(id__in={user_id for user_id, _, _ in rows})
+                .values_list("id", "username")
+            )
+            texts = dict(
+                label_type.objects.filter(id__in={label_id for _, label_id, _ in rows}).values_list("id", "text")
+            )
+            for user_id, label_id, count in rows:
+                username, text = names.get(user_id), texts.get(label_id)
+                if username in user_index and text in label_index:
+                    counts[user_index[username]][label_index[text]] += count
+        if compact:
+            return {"users": usernames, "labels": label_texts, "counts": counts}
+        return {username: dict(zip(label_texts, row)) for username, row in zip(usernames, counts)}
 
     def get_labels(self, label, project):
         if project.collaborative_annotation:
@@ -41,11 +125,79 @@ class LabelManager(Manager):
     def can_annotate(self, label, project) -> bool:
         raise NotImplementedError("Please implement this method in the subclass")
 
+    def can_add(self, label, labels, project) -> bool:
+        """Check whether the label can be added next to the given labels.
+
+        The in-memory counterpart of `can_annotate`, used to validate many labels at once.
+
+        Args:
+            label: the new label.
+            labels: the labels `get_labels` would return for it.
+            project: the project the label is added to.
+        """
+        return True
+
     def filter_annotatable_labels(self, labels, project):
-        return [label for label in labels if self.can_annotate(label, project)]
+        """Keep the labels that can be added, checked against the existing labels and each other.
+
+        The existing labels of the project version on all the examples are read with a single query.
+        """
+        existing = defaultdict(list)
+        example_ids = {label.example_id for label in labels}
+        for other in self.filter(example_id__in=example_ids, project_version=project.version):
+            existing[other.example_id].append(other)
+        annotatable = []
+        for label in labels:
+            others = existing[label.example_id]
+            if not project.collaborative_annotation:
+                others = [other for other in others if other.user_id == label.user_id]
+            if self.can_add(label, others, project):
+                annotatable.append(label)
+                existing[label.example_id].append(label)
+        return annotatable
+
+    def stamp_project_version(self, labels):
+        """Set the version of new labels to the current version of their example's project.
+
+        `Label.save` does this for single labels; bulk inserts skip it, so bulk paths call this first.
+        The version is queried once per project of the batch and never cached, so a version just
+        created by another process is used.
+
+        Args:
+            labels: unsaved labels with their example set.
+
+        Returns:
+            the same labels.
+        """
+        from projects.models import Project
+
+        versions = {}
+        for label in labels:
+            project_id = label.example.project_id
+            if project_id not in versions:
+                versions[project_id] = Project.get_current_version_number(project_id)
+            label.project_version = versions[project_id]
+        return labels
+
+
+class CategoryQuerySet(LabelQuerySet):
+    def after_delete(self, example_ids):
+        from .models import ExampleLabelTally
+
+        # Refreshing the tallies bumps the revision too
+        ExampleLabelTally.objects.refresh(example_ids)
 
 
 class CategoryManager(LabelManager):
+    def get_queryset(self):
+        return CategoryQuerySet(self.model, using=self._db)
+
+    def after_bulk_create(self, example_ids):
+        from .models import ExampleLabelTally
+
+        # Bulk inserts skip `Category.save`; refreshing the tallies bumps the revision too
+        ExampleLabelTally.objects.refresh(example_ids)
+
     def can_annotate(self, label, project) -> bool:
         is_exclusive = project.single_class_classification
         categories = self.get_labels(label, project)
@@ -54,23 +206,57 @@ class CategoryManager(LabelManager):
         else:
             return not categories.filter(label=label.label).exists()
 
+    def can_add(self, label, labels, project) -> bool:
+        if project.single_class_classification:
+            return not labels
+        return all(category.label_id != label.label_id for category in labels)
+
 
 class SpanManager(LabelManager):
     def can_annotate(self, label, project) -> bool:
+        return self.can_add(label, self.get_labels(label, project), project)
+
+    def can_add(self, label, labels, project) -> bool:
         overlapping = getattr(project, "allow_overlapping", False)
-        spans = self.get_labels(label, project)
         if overlapping:
             return True
-        for span in spans:
+        for span in labels:
             if span.is_overlapping(label):
                 return False
         return True
 
+    def filter_annotatable_labels(self, labels, project):
+        """Keep the spans that overlap neither the existing spans nor each other.
+
+        The spans of the project version on each example, per user unless the annotation is
+        collaborative, are kept in `Intervals`, so each span is checked in O(log n).
+        """
+        if getattr(project, "allow_overlapping", False):
+            return list(labels)
+
+        def group(span):
+            return span.example_id, None if project.collaborative_annotation else span.user_id
+
+        existing = defaultdict(list)
+        example_ids = {label.example_id for label in labels}
+        for span in self.filter(example_id__in=example_ids, project_version=project.version):
+            existing[group(span)].append((span.start_offset, span.end_offset))
+        intervals = defaultdict(Intervals, {key: Intervals(offsets) for key, offsets in existing.items()})
+        annotatable = []
+        for label in labels:
+            spans = intervals[group(label)]
+            if not spans.overlaps(label.start_offset, label.end_offset):
+                spans.add(label.start_offset, label.end_offset)
+                annotatable.append(label)
+        return annotatable
+
 
 class TextLabelManager(LabelManager):
     def can_annotate(self, label, project) -> bool:
-        texts = self.get_labels(label, project)
-        for text in texts:
+        return self.can_add(label, self.get_labels(label, project), project)
+
+    def can_add(self, label, labels, project) -> bool:
+        for text in labels:
             if text.is_same_text(label):
                 return False
         return True
@@ -91,3 +277,140 @@ class BoundingBoxManager(LabelManager):
 class SegmentationManager(LabelManager):
     def can_annotate(self, label, project) -> bool:
         return True
+
+
+class ExampleLabelTallyManager(Manager):
+    batch_size = 500
+
+    def increment(self, example_id: int, project_version: int, label_id: int, amount: int = 1):
+        """Add `amount` (possibly negative) to the count of a label.
+
+        Args:
+            example_id: The example id.
+            project_version: The project version the annotation belongs to.
+            label_id: The category type id.
+            amount: The number of annotations added or, if negative, removed.
+        """
+        queryset = self.filter(example_id=example_id, project_version=project_version, label_id=label_id)
+        if amount > 0 and self.upsert(example_id, project_version, label_id, amount):
+            return
+        if queryset.update(count=F("count") + amount):
+            if amount < 0:
+                queryset.filter(count__lte=0).delete()
+            return
+        if amount <= 0:
+            return
+        try:
+            with transaction.atomic():
+                self.create(example_id=example_id, project_version=project_version, label_id=label_id, count=amount)
+        except IntegrityError:
+            # Another request created the row in the meantime.
+            queryset.update(count=F("count") + amount)
+
+    def upsert(self, example_id: int, project_version: int, label_id: int, amount: int) -> bool:
+        """Add `amount` to the count of a label with a single statement, creating the row if needed.
+
+        Returns False on databases without an upsert statement, leaving the count unchanged.
+        """
+        connection = connections[self.db]
+        table = connection.ops.quote_name(self.model._meta.db_table)
+        columns = "example_id, project_version, label_id, count"
+        if connection.vendor in ("postgresql", "sqlite"):
+            conflict = (
+                "ON CONFLICT (example_id, project_version, label_id) "
+                f"DO UPDATE SET count = {table}.count + excluded.count"
+            )
+        elif connection.vendor == "mysql":
+            conflict = "ON DUPLICATE KEY UPDATE count = count + VALUES(count)"
+        else:
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}) VALUES (%s, %s, %s, %s) {conflict}",
+                [example_id, project_version, label_id, amount],
+            )
+        return True
+
+    def count_categories(self, categories: QuerySet) -> QuerySet:
+        return (
+            categories.order_by()
+            .values("example_id", "project_version", "label_id")
+            .annotate(count=Count("id"))
+            .order_by("example_id", "project_version", "label_id")
+        )
+
+    def refresh(self, example_ids: Iterable[int]):
+        """Recount the labels of the given examples from scratch.
+
+        This is used after bulk writes, which bypass `Category.save` and `Category.delete`.
+        The annotation revision of the examples' projects is bumped as well.
+
+        Args:
+            example_ids: The ids of the examples to recount.
+        """
+        from .models import AnnotationRevision, Category
+
+        example_ids = sorted(set(example_ids))
+        for i in range(0, len(example_ids), self.batch_size):
+            batch = example_ids[i : i + self.batch_size]
+            counts = self.count_categories(Category.objects.filter(example_id__in=batch))
+            with transaction.atomic():
+                self.filter(example_id__in=batch).delete()
+                self.bulk_create([self.model(**row) for row in counts])
+                AnnotationRevision.objects.bump(batch)
+
+    def rebuild(self, examples: QuerySet):
+        """Recount the labels of every example in the queryset."""
+        self.refresh(examples.values_list("id", flat=True))
+
+    def find_mismatches(self, examples: QuerySet) -> set:
+        """Compare the stored counts with the annotations.
+
+        Returns:
+            The ids of the examples whose stored counts are out of date.
+        """
+        from .models import Category
+
+        expected = {
+            (row["example_id"], row["project_version"], row["label_id"], row["count"])
+            for row in self.count_categories(Category.objects.filter(example__in=examples))
+        }
+        stored = set(
+            self.filter(example__in=examples).values_list("example_id", "project_version", "label_id", "count")
+        )
+        return {row[0] for row in expected ^ stored}
+
+
+class AnnotationRevisionManager(Manager):
+    def bump(self, example_ids: Iterable[int]):
+        """Bump the revision of the projects the examples belong to.
+
+        Projects whose revision was never read have no row yet and nothing to invalidate.
+
+        Args:
+            example_ids: The ids of the examples whose categories were written.
+        """
+        from examples.models import Example
+
+        projects = Example.objects.filter(id__in=list(example_ids)).values("project_id")
+        self.filter(project_id__in=projects).update(revision=F("revision") + 1)
+
+    def bump_projects(self, project_ids: Iterable[int]):
+        """Bump the revision of the given projects, or of their original project if they are versions."""
+        from projects.models import Project
+
+        projects = Project.objects.filter(id__in=list(project_ids)).values(
+            root=Coalesce("original_project_id", "id")
+        )
+        self.filter(project_id__in=projects).update(revision=F("revision") + 1)
+
+    def current(self, project_id: int):
+        """Return the revision of a project, creating it if needed.
+
+        Read it before the data it versions, so that a concurrent write is
+        either part of the data or bumps the revision afterwards.
+        """
+        try:
+            return self.get_or_create(project_id=project_id)[0]
+        except IntegrityError:
+            return self.get(project_id=project_id)
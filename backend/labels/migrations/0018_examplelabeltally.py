@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('label_types', '0007_delete_relationtypeold'),
+        ('examples', '0008_assignment'),
+        ('labels', '0017_add_project_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExampleLabelTally',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('project_version', models.IntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('example', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='label_tallies', to='examples.example')),
+                ('label', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='label_types.categorytype')),
+            ],
+            options={
+                'unique_together': {('example', 'project_version', 'label')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+from django.db.models import Count
+
+
+def populate_tally(apps, schema_editor):
+    Category = apps.get_model("labels", "Category")
+    ExampleLabelTally = apps.get_model("labels", "ExampleLabelTally")
+    counts = (
+        Category.objects.order_by()
+        .values("example_id", "project_version", "label_id")
+        .annotate(count=Count("id"))
+        .iterator()
+    )
+    ExampleLabelTally.objects.bulk_create((ExampleLabelTally(**row) for row in counts), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("labels", "0018_examplelabeltally"),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_tally, reverse_code=migrations.RunPython.noop),
+    ]
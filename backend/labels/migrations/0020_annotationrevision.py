@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0038_discrepancycomment'),
+        ('labels', '0019_populate_examplelabeltally'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnnotationRevision',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='annotation_revision', serialize=False, to='projects.project')),
+                ('key', models.UUIDField(default=uuid.uuid4, editable=False)),
+                ('revision', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("labels", "0020_annotationrevision"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="boundingbox",
+            index=models.Index(fields=["example", "project_version", "label"], name="labels_boun_example_ad9a5b_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="category",
+            index=models.Index(fields=["example", "project_version", "label"], name="labels_cate_example_8b2d00_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="relation",
+            index=models.Index(fields=["example", "project_version", "type"], name="labels_rela_example_47fe3a_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="segmentation",
+            index=models.Index(fields=["example", "project_version", "label"], name="labels_segm_example_a208b5_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="span",
+            index=models.Index(fields=["example", "project_version", "label"], name="labels_span_example_58dce3_idx"),
+        ),
+    ]
@@ -2,11 +2,14 @@ import uuid
 
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 
+from .intervals import overlaps
 from .managers import (
+    AnnotationRevisionManager,
     BoundingBoxManager,
     CategoryManager,
+    ExampleLabelTallyManager,
     LabelManager,
     RelationManager,
     SegmentationManager,
@@ -15,6 +18,7 @@ from .managers import (
 )
 from examples.models import Example
 from label_types.models import CategoryType, RelationType, SpanType
+from projects.models import Project
 
 
 class Label(models.Model):
@@ -31,15 +35,15 @@ class Label(models.Model):
     def save(self, *args, **kwargs):
         # Set project_version based on the current project version when creating new annotations
         if not self.pk and hasattr(self, 'example'):
-            # Get the current project version from the example's project
-            # Since examples now belong to the original project, we need to find the current version
-            original_project = self.example.project.original_project or self.example.project
-            current_version = original_project.versions.filter(is_current_version=True).first()
-            if current_version:
-                self.project_version = current_version.version
-            else:
-                self.project_version = original_project.version
+            # Examples belong to the original project, the annotation to its current version
+            self.project_version = Project.get_current_version_number(self.example.project_id)
         super().save(*args, **kwargs)
+        AnnotationRevision.objects.bump([self.example_id])
+
+    def delete(self, *args, **kwargs):
+        deleted = super().delete(*args, **kwargs)
+        AnnotationRevision.objects.bump([self.example_id])
+        return deleted
 
     class Meta:
         abstract = True
@@ -50,8 +54,85 @@ class Category(Label):
     example = models.ForeignKey(to=Example, on_delete=models.CASCADE, related_name="categories")
     label = models.ForeignKey(to=CategoryType, on_delete=models.CASCADE)
 
+    tally_fields = ("example_id", "project_version", "label_id")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the counted label, so saving it needs no query to find it.
+        if not instance.get_deferred_fields().intersection(cls.tally_fields):
+            instance._tally_key = instance.tally_key
+        return instance
+
+    @property
+    def tally_key(self):
+        return tuple(getattr(self, field) for field in self.tally_fields)
+
+    def save(self, *args, **kwargs):
+        # No savepoint: a failed save aborts the caller's transaction, as in `Model.save_base`.
+        with transaction.atomic(savepoint=False):
+            previous = getattr(self, "_tally_key", None)
+            if self.pk and previous is None:
+                previous = Category.objects.filter(pk=self.pk).values_list(*self.tally_fields).first()
+            super().save(*args, **kwargs)
+            current = self.tally_key
+            if previous != current:
+                if previous:
+                    ExampleLabelTally.objects.increment(*previous, amount=-1)
+                ExampleLabelTally.objects.increment(*current)
+            self._tally_key = current
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(savepoint=False):
+            deleted = super().delete(*args, **kwargs)
+            ExampleLabelTally.objects.increment(self.example_id, self.project_version, self.label_id, amount=-1)
+        return deleted
+
     class Meta:
         unique_together = ("example", "user", "label")
+        indexes = [models.Index(fields=["example", "project_version", "label"])]
+
+
+class ExampleLabelTally(models.Model):
+    """Number of annotations of each category per example and project version.
+
+    The counts are kept up to date on every category write, so discrepancy
+    detection reads them instead of counting the annotations on each request.
+    """
+
+    objects = ExampleLabelTallyManager()
+    example = models.ForeignKey(to=Example, on_delete=models.CASCADE, related_name="label_tallies")
+    project_version = models.IntegerField()
+    label = models.ForeignKey(to=CategoryType, on_delete=models.CASCADE)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("example", "project_version", "label")
+
+
+class AnnotationRevision(models.Model):
+    """Counter of the annotation writes of a project.
+
+    It is bumped whenever a label of the project's examples is created,
+    changed or deleted, and when the examples, label types, manual
+    discrepancies, members or perspective values of the project or of its
+    versions change, including deletions by cascade (see `labels.signals`),
+    so anything derived from them can be cached under `tag` and reused until
+    the tag changes. The row is created on first read; `key` is regenerated
+    with it, so a tag is never reused by another project or after the row is
+    recreated.
+    """
+
+    objects = AnnotationRevisionManager()
+    project = models.OneToOneField(
+        to="projects.Project", on_delete=models.CASCADE, primary_key=True, related_name="annotation_revision"
+    )
+    key = models.UUIDField(default=uuid.uuid4, editable=False)
+    revision = models.PositiveBigIntegerField(default=0)
+
+    @property
+    def tag(self) -> str:
+        return f"{self.key.hex}-{self.revision}"
 
 
 class Span(Label):
@@ -72,14 +153,11 @@ class Span(Label):
             super().validate_unique(exclude=exclude)
             return
 
+        # The same test as `labels.intervals.overlaps`, run by the database
         overlapping_span = (
             Span.objects.exclude(id=self.id)
             .filter(example=self.example)
-            .filter(
-                models.Q(start_offset__gte=self.start_offset, start_offset__lt=self.end_offset)
-                | models.Q(end_offset__gt=self.start_offset, end_offset__lte=self.end_offset)
-                | models.Q(start_offset__lte=self.start_offset, end_offset__gte=self.end_offset)
-            )
+            .filter(start_offset__lt=self.end_offset, end_offset__gt=self.start_offset)
         )
         if is_collaborative:
             if overlapping_span.exists():
@@ -93,11 +171,7 @@ class Span(Label):
         super().save(force_insert, force_update, using, update_fields)
 
     def is_overlapping(self, other: "Span"):
-        return (
-            (other.start_offset <= self.start_offset < other.end_offset)
-            or (other.start_offset < self.end_offset <= other.end_offset)
-            or (self.start_offset < other.start_offset and other.end_offset < self.end_offset)
-        )
+        return overlaps(self.start_offset, self.end_offset, other.start_offset, other.end_offset)
 
     class Meta:
         constraints = [
@@ -105,6 +179,7 @@ class Span(Label):
             models.CheckConstraint(check=models.Q(end_offset__gte=0), name="endOffset >= 0"),
             models.CheckConstraint(check=models.Q(start_offset__lt=models.F("end_offset")), name="start < end"),
         ]
+        indexes = [models.Index(fields=["example", "project_version", "label"])]
 
 
 class TextLabel(Label):
@@ -143,6 +218,9 @@ class Relation(Label):
             raise ValidationError("You need to label the same example.")
         return super().clean()
 
+    class Meta:
+        indexes = [models.Index(fields=["example", "project_version", "type"])]
+
 
 class BoundingBox(Label):
     objects = BoundingBoxManager()
@@ -160,6 +238,7 @@ class BoundingBox(Label):
             models.CheckConstraint(check=models.Q(width__gte=0), name="width >= 0"),
             models.CheckConstraint(check=models.Q(height__gte=0), name="height >= 0"),
         ]
+        indexes = [models.Index(fields=["example", "project_version", "label"])]
 
 
 class Segmentation(Label):
@@ -167,3 +246,6 @@ class Segmentation(Label):
     points = models.JSONField(default=list)
     label = models.ForeignKey(to=CategoryType, on_delete=models.CASCADE)
     example = models.ForeignKey(to=Example, on_delete=models.CASCADE, related_name="segmentations")
+
+    class Meta:
+        indexes = [models.Index(fields=["example", "project_version", "label"])]
@@ -111,3 +111,29 @@ class SegmentationSerializer(serializers.ModelSerializer):
             "points",
         )
         read_only_fields = ("user",)
+
+
+class BulkLabelSerializer(serializers.Serializer):
+    """Validate a label of a bulk request without querying, the ids are checked together by the view."""
+
+    example = serializers.IntegerField()
+    prob = serializers.FloatField(default=0.0)
+
+
+class BulkCategorySerializer(BulkLabelSerializer):
+    label = serializers.IntegerField()
+
+
+class BulkSpanSerializer(BulkLabelSerializer):
+    label = serializers.IntegerField()
+    start_offset = serializers.IntegerField(min_value=0)
+    end_offset = serializers.IntegerField(min_value=0)
+
+    def validate(self, attrs):
+        if attrs["start_offset"] >= attrs["end_offset"]:
+            raise serializers.ValidationError("start_offset must be less than end_offset.")
+        return attrs
+
+
+class BulkTextLabelSerializer(BulkLabelSerializer):
+    text = serializers.CharField()
@@ -0,0 +1,73 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import AnnotationRevision, Category, ExampleLabelTally
+from label_types.models import CategoryType, RelationType, SpanType
+from projects.models import Member, Perspective, PerspectiveMember
+
+
+@receiver(post_delete, sender=CategoryType)
+@receiver(post_delete, sender=SpanType)
+@receiver(post_delete, sender=RelationType)
+def bump_revision_on_label_type_delete(sender, instance, **kwargs):
+    # The labels of the type are deleted by cascade, which skips `Label.delete`.
+    project_id = instance.project_id
+    transaction.on_commit(lambda: AnnotationRevision.objects.bump_projects([project_id]))
+
+
+@receiver(post_save, sender=CategoryType)
+@receiver(post_save, sender=SpanType)
+@receiver(post_save, sender=RelationType)
+def bump_revision_on_label_type_save(sender, instance, created, **kwargs):
+    # Renamed or recolored types change what is derived from their labels.
+    if not created:
+        project_id = instance.project_id
+        transaction.on_commit(lambda: AnnotationRevision.objects.bump_projects([project_id]))
+
+
+@receiver(pre_delete, sender=User)
+def bump_revision_on_user_delete(sender, instance, **kwargs):
+    # The user's memberships and labels are deleted by cascade, which skips `Label.delete`.
+    project_ids = list(instance.role_mappings.values_list("project_id", flat=True))
+    transaction.on_commit(lambda: AnnotationRevision.objects.bump_projects(project_ids))
+
+
+@receiver(pre_delete, sender=User)
+def collect_tallies_on_user_delete(sender, instance, **kwargs):
+    # The user's categories are deleted by cascade, which skips `Category.delete`.
+    instance._tallied_example_ids = list(
+        Category.objects.filter(user=instance).values_list("example_id", flat=True).distinct()
+    )
+
+
+@receiver(post_delete, sender=User)
+def refresh_tallies_on_user_delete(sender, instance, **kwargs):
+    example_ids = getattr(instance, "_tallied_example_ids", [])
+    if example_ids:
+        ExampleLabelTally.objects.refresh(example_ids)
+
+
+@receiver(post_delete, sender=Member)
+def bump_revision_on_member_delete(sender, instance, **kwargs):
+    # The member's perspective values are deleted with it.
+    project_id = instance.project_id
+    transaction.on_commit(lambda: AnnotationRevision.objects.bump_projects([project_id]))
+
+
+@receiver(pre_delete, sender=Perspective)
+def bump_revision_on_perspective_delete(sender, instance, **kwargs):
+    # The values of the perspective are deleted by cascade, in every project holding one.
+    members = Member.objects.filter(perspective_values__perspective=instance)
+    project_ids = list(members.values_list("project_id", flat=True).distinct())
+    transaction.on_commit(lambda: AnnotationRevision.objects.bump_projects(project_ids))
+
+
+@receiver(post_delete, sender=PerspectiveMember)
+def bump_revision_on_perspective_value_delete(sender, instance, origin=None, **kwargs):
+    # Values deleted with their member or perspective are covered by the receivers above.
+    if isinstance(origin, (Member, Perspective)) or getattr(origin, "model", None) in (Member, Perspective):
+        return
+    project_id = instance.member.project_id
+    transaction.on_commit(lambda: AnnotationRevision.objects.bump_projects([project_id]))
@@ -5,7 +5,7 @@ from django.test import TestCase
 from model_mommy import mommy
 
 from labels.models import Category
-from projects.models import ProjectType
+from projects.models import Project, ProjectType
 from projects.tests.utils import prepare_project
 
 
@@ -95,3 +95,28 @@ class TestCategory(TestCase):
         a = mommy.make("Category")
         with self.assertRaises(IntegrityError):
             Category(example=a.example, user=a.user, label=a.label).save()
+
+    def test_stamp_current_version(self):
+        project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        version = project.item.create_new_version()
+        example = mommy.make("Example", project=project.item)
+        label = mommy.make("CategoryType", project=version)
+        Category(example=example, user=project.admin, label=label).save()
+        category = Category(example=example, user=project.annotator, label=label)
+        category.save()
+        self.assertEqual(category.project_version, 2)
+        # A version created elsewhere is used by the next label.
+        Project.objects.filter(pk=version.pk).update(is_current_version=False)
+        Project.objects.filter(pk=project.item.pk).update(is_current_version=True)
+        category = Category(example=example, user=project.approver, label=label)
+        category.save()
+        self.assertEqual(category.project_version, 1)
+
+    def test_stamp_batch_with_one_query(self):
+        project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        project.item.create_new_version()
+        examples = mommy.make("Example", project=project.item, _quantity=3)
+        labels = [Category(example=example, user=project.admin) for example in examples]
+        with self.assertNumQueries(1):
+            Category.objects.stamp_project_version(labels)
+        self.assertEqual({label.project_version for label in labels}, {2})
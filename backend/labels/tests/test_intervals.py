@@ -0,0 +1,35 @@
+import random
+
+from django.test import SimpleTestCase
+
+from labels.intervals import Intervals, overlaps
+
+
+class TestIntervals(SimpleTestCase):
+    def test_overlaps(self):
+        intervals = Intervals([(10, 12), (0, 5)])
+        self.assertTrue(intervals.overlaps(4, 6))
+        self.assertTrue(intervals.overlaps(11, 20))
+        self.assertTrue(intervals.overlaps(1, 2))
+        self.assertTrue(intervals.overlaps(0, 30))
+        self.assertFalse(intervals.overlaps(5, 10))
+        self.assertFalse(intervals.overlaps(12, 13))
+
+    def test_merge_overlapping_and_touching_intervals(self):
+        intervals = Intervals([(0, 2), (1, 3), (3, 4), (6, 8)])
+        self.assertEqual((intervals.starts, intervals.ends), ([0, 6], [4, 8]))
+        intervals.add(4, 6)
+        self.assertEqual((intervals.starts, intervals.ends), ([0], [8]))
+
+    def test_agree_with_pairwise_check(self):
+        rng = random.Random(0)
+        for _ in range(50):
+            spans = []
+            for _ in range(rng.randint(0, 10)):
+                start = rng.randint(0, 50)
+                spans.append((start, start + rng.randint(1, 10)))
+            intervals = Intervals(spans)
+            for start in range(60):
+                end = start + rng.randint(1, 5)
+                expected = any(overlaps(start, end, *span) for span in spans)
+                self.assertEqual(intervals.overlaps(start, end), expected)
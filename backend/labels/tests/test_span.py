@@ -218,9 +218,24 @@ class TestLabelDistribution(TestCase):
         mommy.make("Span", example=self.example, start_offset=5, end_offset=10, user=self.user, label=label_a)
         mommy.make("Span", example=self.example, start_offset=10, end_offset=15, user=self.user, label=label_b)
         distribution = Span.objects.calc_label_distribution(
-            examples=self.project.item.examples.all(), members=self.project.members, labels=SpanType.objects.all()
+            self.project.item,
+            usernames=[user.username for user in self.project.members],
+            label_texts=[label.text for label in SpanType.objects.all()],
         )
         expected = {user.username: {label.text: 0 for label in SpanType.objects.all()} for user in self.project.members}
         expected[self.user.username][label_a.text] = 1
         expected[self.user.username][label_b.text] = 1
         self.assertEqual(distribution, expected)
+
+    def test_filter_annotatable_spans(self):
+        label = mommy.make("SpanType", project=self.project.item)
+        mommy.make("Span", example=self.example, start_offset=0, end_offset=5, user=self.user, label=label)
+        another_user = self.project.approver
+        spans = [
+            Span(example=self.example, label=label, user=self.user, start_offset=4, end_offset=6),
+            Span(example=self.example, label=label, user=self.user, start_offset=5, end_offset=7),
+            Span(example=self.example, label=label, user=self.user, start_offset=6, end_offset=8),
+            Span(example=self.example, label=label, user=another_user, start_offset=0, end_offset=5),
+        ]
+        annotatable = Span.objects.filter_annotatable_labels(spans, self.project.item)
+        self.assertEqual(annotatable, [spans[1], spans[3]])
@@ -0,0 +1,105 @@
+from unittest.mock import MagicMock
+
+from django.core.management import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from model_mommy import mommy
+
+from labels.management.commands.rebuild_label_tally import Command
+from labels.models import Category, ExampleLabelTally
+from projects.models import ProjectType
+from projects.tests.utils import prepare_project
+
+
+class TestExampleLabelTally(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        self.example = mommy.make("Example", project=self.project.item)
+        self.label_type = mommy.make("CategoryType", project=self.project.item)
+
+    def annotate(self, user, label_type=None):
+        return mommy.make("Category", example=self.example, label=label_type or self.label_type, user=user)
+
+    def assert_count(self, expected, label_type=None):
+        tally = ExampleLabelTally.objects.filter(example=self.example, label=label_type or self.label_type).first()
+        self.assertEqual(tally.count if tally else 0, expected)
+
+    def test_count_created_categories(self):
+        self.annotate(self.project.admin)
+        self.annotate(self.project.approver)
+        self.assert_count(2)
+
+    def test_create_category_with_fixed_number_of_queries(self):
+        self.annotate(self.project.admin)
+        for user in [self.project.approver, self.project.annotator]:
+            category = Category(example=self.example, label=self.label_type, user=user)
+            # The current version, the insert, the revision bump and the tally upsert.
+            with self.assertNumQueries(4):
+                category.save()
+        self.assert_count(3)
+
+    def test_count_deleted_categories(self):
+        category = self.annotate(self.project.admin)
+        self.annotate(self.project.approver)
+        category.delete()
+        self.assert_count(1)
+
+    def test_remove_tally_when_last_category_is_deleted(self):
+        self.annotate(self.project.admin).delete()
+        self.assertFalse(ExampleLabelTally.objects.exists())
+
+    def test_move_count_when_label_is_changed(self):
+        category = self.annotate(self.project.admin)
+        other = mommy.make("CategoryType", project=self.project.item)
+        category.label = other
+        category.save()
+        self.assert_count(0)
+        self.assert_count(1, other)
+
+    def test_count_queryset_deletion(self):
+        self.annotate(self.project.admin)
+        self.annotate(self.project.approver)
+        Category.objects.filter(user=self.project.admin).delete()
+        self.assert_count(1)
+
+    def test_count_user_deletion(self):
+        self.annotate(self.project.admin)
+        self.annotate(self.project.approver)
+        self.project.approver.delete()
+        self.assert_count(1)
+
+    def test_save_loaded_category_without_lookup(self):
+        category = Category.objects.get(pk=self.annotate(self.project.admin).pk)
+        other = mommy.make("CategoryType", project=self.project.item)
+        category.label = other
+        with CaptureQueriesContext(connection) as context:
+            category.save()
+        self.assertFalse([query for query in context.captured_queries if query["sql"].startswith("SELECT")])
+        self.assert_count(0)
+        self.assert_count(1, other)
+
+    def test_count_bulk_created_categories(self):
+        Category.objects.bulk_create([Category(example=self.example, label=self.label_type, user=self.project.admin)])
+        self.assert_count(1)
+
+
+class TestRebuildLabelTallyCommand(TestCase):
+    def setUp(self):
+        project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        example = mommy.make("Example", project=project.item)
+        label_type = mommy.make("CategoryType", project=project.item)
+        Category.objects.bulk_create([Category(example=example, label=label_type, user=project.admin)])
+        # Counts lost outside of the label writes, e.g. by a manual cleanup.
+        ExampleLabelTally.objects.all().delete()
+
+    def test_verify_detects_stale_counts(self):
+        command = Command(stdout=MagicMock())
+        with self.assertRaises(CommandError):
+            command.handle(project=None, verify=True)
+
+    def test_rebuild_counts(self):
+        command = Command(stdout=MagicMock())
+        command.handle(project=None, verify=False)
+        self.assertEqual(ExampleLabelTally.objects.get().count, 1)
+        command.handle(project=None, verify=True)
@@ -1,14 +1,24 @@
 import uuid
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from model_mommy import mommy
 from rest_framework import status
 from rest_framework.reverse import reverse
 
 from .utils import make_annotation
 from api.tests.utils import CRUDMixin
-from examples.tests.utils import make_doc
+from examples.models import Assignment
+from examples.tests.utils import make_doc, make_example_state
 from label_types.tests.utils import make_label
-from labels.models import BoundingBox, Category, Segmentation, Span, TextLabel
+from labels.models import (
+    BoundingBox,
+    Category,
+    ExampleLabelTally,
+    Segmentation,
+    Span,
+    TextLabel,
+)
 from projects.models import ProjectType
 from projects.tests.utils import prepare_project
 from users.tests.utils import make_user
@@ -229,6 +239,184 @@ class TestSegmentationCreation(TestDataLabeling, CRUDMixin):
             self.assert_create(member, status.HTTP_201_CREATED)
 
 
+class TestCategoryBulkCreation(CRUDMixin):
+    def setUp(self):
+        self.project = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION)
+        self.docs = [make_doc(self.project.item) for _ in range(3)]
+        self.labels = [make_label(self.project.item) for _ in range(2)]
+        make_annotation(
+            ProjectType.DOCUMENT_CLASSIFICATION, doc=self.docs[0], user=self.project.admin, label=self.labels[0]
+        )
+        self.url = reverse(viewname="project_category_bulk", args=[self.project.item.id])
+        self.data = [{"example": doc.id, "label": label.id} for doc in self.docs for label in self.labels]
+
+    def test_create_labels_across_examples(self):
+        self.client.force_login(self.project.admin)
+        with self.assertNumQueries(20):
+            response = self.client.post(self.url, data=self.data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # the existing annotation is skipped
+        self.assertEqual(len(response.data), 5)
+        self.assertEqual(Category.objects.count(), 6)
+        tallies = ExampleLabelTally.objects.filter(example=self.docs[1]).values_list("count", flat=True)
+        self.assertEqual(list(tallies), [1, 1])
+
+    def test_create_labels_on_example(self):
+        self.url = reverse(viewname="category_bulk", args=[self.project.item.id, self.docs[1].id])
+        self.data = [{"label": self.labels[0].id}, {"label": self.labels[0].id}]
+        response = self.assert_create(self.project.annotator, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]["example"], self.docs[1].id)
+
+    def test_ignores_labels_of_other_versions(self):
+        self.project.item.single_class_classification = True
+        self.project.item.save()
+        version = self.project.item.create_new_version()
+        label = version.categorytype_set.get(text=self.labels[0].text)
+        self.url = reverse(viewname="project_category_bulk", args=[version.id])
+        self.data = [{"example": self.docs[0].id, "label": label.id}]
+        response = self.assert_create(self.project.admin, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(Category.objects.filter(example=self.docs[0], project_version=1).count(), 1)
+
+    def test_replace_label_of_exclusive_project(self):
+        self.project.item.single_class_classification = True
+        self.project.item.save()
+        self.assert_create(self.project.admin, status.HTTP_201_CREATED)
+        labels = Category.objects.order_by("example_id").values_list("label_id", flat=True)
+        self.assertEqual(list(labels), [self.labels[1].id] * 3)
+
+    def test_reject_labels_of_other_projects(self):
+        other = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION)
+        self.data = [{"example": make_doc(other.item).id, "label": self.labels[0].id}]
+        self.assert_create(self.project.admin, status.HTTP_400_BAD_REQUEST)
+        self.data = [{"example": self.docs[1].id, "label": make_label(other.item).id}]
+        self.assert_create(self.project.admin, status.HTTP_400_BAD_REQUEST)
+
+    def test_denies_non_project_member_to_annotate(self):
+        self.assert_create(make_user(), status.HTTP_403_FORBIDDEN)
+
+
+class TestSpanBulkCreation(CRUDMixin):
+    def setUp(self):
+        self.project = prepare_project(task=ProjectType.SEQUENCE_LABELING)
+        self.doc = make_doc(self.project.item)
+        self.label = make_label(self.project.item)
+        self.url = reverse(viewname="span_bulk", args=[self.project.item.id, self.doc.id])
+
+    def test_skip_overlapping_spans(self):
+        self.data = [
+            {"label": self.label.id, "start_offset": 0, "end_offset": 2},
+            {"label": self.label.id, "start_offset": 1, "end_offset": 3},
+            {"label": self.label.id, "start_offset": 3, "end_offset": 4},
+        ]
+        response = self.assert_create(self.project.admin, status.HTTP_201_CREATED)
+        self.assertEqual([span["start_offset"] for span in response.data], [0, 3])
+
+    def test_ignore_spans_of_other_versions(self):
+        mommy.make("Span", example=self.doc, user=self.project.admin, label=self.label, start_offset=0, end_offset=2)
+        version = self.project.item.create_new_version()
+        label = version.spantype_set.get(text=self.label.text)
+        self.url = reverse(viewname="span_bulk", args=[version.id, self.doc.id])
+        self.data = [{"label": label.id, "start_offset": 0, "end_offset": 2}]
+        response = self.assert_create(self.project.admin, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 1)
+
+    def test_reject_invalid_offsets(self):
+        self.data = [{"label": self.label.id, "start_offset": 2, "end_offset": 1}]
+        self.assert_create(self.project.admin, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Span.objects.exists())
+
+
+class TestExampleBundle(CRUDMixin):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = prepare_project(task=ProjectType.SEQUENCE_LABELING)
+        cls.doc = make_doc(cls.project.item)
+        for member in cls.project.members:
+            make_annotation(ProjectType.SEQUENCE_LABELING, doc=cls.doc, user=member, start_offset=0, end_offset=1)
+        cls.url = reverse(viewname="example_bundle", args=[cls.project.item.id, cls.doc.id])
+
+    def test_fetch_example_with_own_labels(self):
+        response = self.assert_fetch(self.project.annotator, status.HTTP_200_OK)
+        self.assertEqual(response.data["example"]["id"], self.doc.id)
+        self.assertEqual([span["user"] for span in response.data["spans"]], [self.project.annotator.id])
+        self.assertEqual(response.data["categories"], [])
+
+    def test_fixed_number_of_queries(self):
+        self.client.force_login(self.project.admin)
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(self.url)
+        make_annotation(
+            ProjectType.SEQUENCE_LABELING, doc=self.doc, user=self.project.admin, start_offset=2, end_offset=3
+        )
+        with self.assertNumQueries(len(context)):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data["spans"]), 2)
+
+    def test_not_modified(self):
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.client.force_login(self.project.admin)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_denies_non_project_member(self):
+        self.assert_fetch(make_user(), status.HTTP_403_FORBIDDEN)
+
+
+class TestExampleQueue(CRUDMixin):
+    def setUp(self):
+        self.project = prepare_project(task=ProjectType.SEQUENCE_LABELING)
+        self.annotator = self.project.annotator
+        self.docs = [make_doc(self.project.item) for _ in range(4)]
+        for doc in self.docs:
+            mommy.make("Assignment", project=self.project.item, example=doc, assignee=self.annotator)
+        make_example_state(self.docs[0], self.annotator)
+        for user in [self.annotator, self.project.admin]:
+            make_annotation(ProjectType.SEQUENCE_LABELING, doc=self.docs[1], user=user, start_offset=0, end_offset=1)
+        self.url = reverse(viewname="example_queue", args=[self.project.item.id])
+        self.client.force_login(self.annotator)
+
+    def fetch(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_returns_unconfirmed_assigned_examples_with_own_labels(self):
+        data = self.fetch()
+        self.assertEqual(data["count"], 3)
+        self.assertEqual([item["example"]["id"] for item in data["results"]], [doc.id for doc in self.docs[1:]])
+        self.assertEqual([span["user"] for span in data["results"][0]["spans"]], [self.annotator.id])
+        self.assertEqual(data["results"][1]["spans"], [])
+
+    def test_continues_after_an_example(self):
+        data = self.fetch(after=self.docs[1].id, limit=1)
+        self.assertEqual([item["example"]["id"] for item in data["results"]], [self.docs[2].id])
+
+    def test_follows_assignment_order_in_random_order(self):
+        self.project.item.random_order = True
+        self.project.item.save()
+        assignments = Assignment.objects.filter(assignee=self.annotator, example__in=self.docs[1:]).order_by("id")
+        expected = [assignment.example_id for assignment in assignments]
+        self.assertEqual([item["example"]["id"] for item in self.fetch()["results"]], expected)
+        data = self.fetch(after=expected[0])
+        self.assertEqual([item["example"]["id"] for item in data["results"]], expected[1:])
+
+    def test_fixed_number_of_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            self.fetch(limit=1)
+        with self.assertNumQueries(len(context)):
+            self.fetch(limit=3)
+
+    def test_rejects_unassigned_example(self):
+        doc = make_doc(self.project.item)
+        response = self.client.get(self.url, {"after": doc.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_denies_non_project_member(self):
+        self.assert_fetch(make_user(), status.HTTP_403_FORBIDDEN)
+
+
 class TestLabelDetail:
     task = ProjectType.SEQUENCE_LABELING
     view_name = "annotation_detail"
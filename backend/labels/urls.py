@@ -3,19 +3,26 @@ from django.urls import path
 from .views import (
     BoundingBoxDetailAPI,
     BoundingBoxListAPI,
+    CategoryBulkAPI,
     CategoryDetailAPI,
     CategoryListAPI,
+    ExampleBundleAPI,
+    ExampleQueueAPI,
     RelationDetail,
     RelationList,
     SegmentationDetailAPI,
     SegmentationListAPI,
+    SpanBulkAPI,
     SpanDetailAPI,
     SpanListAPI,
+    TextLabelBulkAPI,
     TextLabelDetailAPI,
     TextLabelListAPI,
 )
 
 urlpatterns = [
+    path(route="examples/queue", view=ExampleQueueAPI.as_view(), name="example_queue"),
+    path(route="examples/<int:example_id>/bundle", view=ExampleBundleAPI.as_view(), name="example_bundle"),
     path(route="examples/<int:example_id>/relations", view=RelationList.as_view(), name="relation_list"),
     path(
         route="examples/<int:example_id>/relations/<int:annotation_id>",
@@ -23,14 +30,20 @@ urlpatterns = [
         name="relation_detail",
     ),
     path(route="examples/<int:example_id>/categories", view=CategoryListAPI.as_view(), name="category_list"),
+    path(route="examples/<int:example_id>/categories/bulk", view=CategoryBulkAPI.as_view(), name="category_bulk"),
+    path(route="categories/bulk", view=CategoryBulkAPI.as_view(), name="project_category_bulk"),
     path(
         route="examples/<int:example_id>/categories/<int:annotation_id>",
         view=CategoryDetailAPI.as_view(),
         name="category_detail",
     ),
     path(route="examples/<int:example_id>/spans", view=SpanListAPI.as_view(), name="span_list"),
+    path(route="examples/<int:example_id>/spans/bulk", view=SpanBulkAPI.as_view(), name="span_bulk"),
+    path(route="spans/bulk", view=SpanBulkAPI.as_view(), name="project_span_bulk"),
     path(route="examples/<int:example_id>/spans/<int:annotation_id>", view=SpanDetailAPI.as_view(), name="span_detail"),
     path(route="examples/<int:example_id>/texts", view=TextLabelListAPI.as_view(), name="text_list"),
+    path(route="examples/<int:example_id>/texts/bulk", view=TextLabelBulkAPI.as_view(), name="text_bulk"),
+    path(route="texts/bulk", view=TextLabelBulkAPI.as_view(), name="project_text_bulk"),
     path(
         route="examples/<int:example_id>/texts/<int:annotation_id>",
         view=TextLabelDetailAPI.as_view(),
@@ -1,21 +1,32 @@
+import hashlib
 from functools import partial
-from typing import Type
+from typing import List, Type
 
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
 from django.shortcuts import get_object_or_404
-from rest_framework import generics, status
+from django.utils.cache import get_conditional_response
+from rest_framework import generics, status, views
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
 from .permissions import CanEditLabel
 from .serializers import (
     BoundingBoxSerializer,
+    BulkCategorySerializer,
+    BulkSpanSerializer,
+    BulkTextLabelSerializer,
     CategorySerializer,
     RelationSerializer,
     SegmentationSerializer,
     SpanSerializer,
     TextLabelSerializer,
 )
+from examples.models import Assignment, Example, ExampleState
+from examples.serializers import ExampleSerializer
+from label_types.models import CategoryType, SpanType
 from labels.models import (
     BoundingBox,
     Category,
@@ -67,6 +78,194 @@ class BaseListAPI(generics.ListCreateAPIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class BaseBulkAPI(views.APIView):
+    """Create many labels at once, on one example or across the examples of a project.
+
+    The request body is a list of labels. The examples and label types are
+    checked with a query each and the labels against the existing ones with a
+    single query, then they are inserted with one `bulk_create`. Labels that
+    cannot be added, such as duplicates, are skipped; the response lists the
+    created labels.
+    """
+
+    label_class: Type[Label]
+    serializer_class = None
+    bulk_serializer_class = None
+    label_type_class = None
+    permission_classes = [IsAuthenticated & IsProjectMember]
+    swagger_schema = None
+    max_labels = 1000
+
+    def post(self, request, *args, **kwargs):
+        project = get_object_or_404(Project, pk=self.kwargs["project_id"])
+        if not isinstance(request.data, list):
+            return Response({"detail": "Expected a list of labels."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > self.max_labels:
+            return Response(
+                {"detail": f"At most {self.max_labels} labels can be created at once."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        items = request.data
+        if "example_id" in self.kwargs:
+            example_id = self.kwargs["example_id"]
+            items = [{**item, "example": example_id} if isinstance(item, dict) else item for item in items]
+        serializer = self.bulk_serializer_class(data=items, many=True)
+        serializer.is_valid(raise_exception=True)
+        try:
+            labels = self.build_labels(project, serializer.validated_data)
+        except ValidationError as err:
+            return Response({"detail": err.messages}, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            created = self.perform_bulk_create(project, labels)
+        return Response(self.serializer_class(created, many=True).data, status=status.HTTP_201_CREATED)
+
+    def build_labels(self, project, items: List[dict]) -> List[Label]:
+        original_project = project.original_project or project
+        example_ids = {item["example"] for item in items}
+        examples = Example.objects.filter(project=original_project, id__in=example_ids).in_bulk()
+        if len(examples) != len(example_ids):
+            raise ValidationError(f"Unknown examples: {sorted(example_ids - set(examples))}")
+        if self.label_type_class:
+            type_ids = {item["label"] for item in items}
+            found = set(
+                self.label_type_class.objects.filter(project=project, id__in=type_ids).values_list("id", flat=True)
+            )
+            if found != type_ids:
+                raise ValidationError(f"Unknown labels: {sorted(type_ids - found)}")
+        labels = []
+        for item in items:
+            item = dict(item)
+            example = examples[item.pop("example")]
+            if self.label_type_class:
+                item["label_id"] = item.pop("label")
+            labels.append(self.label_class(example=example, user=self.request.user, **item))
+        return labels
+
+    def perform_bulk_create(self, project, labels: List[Label]) -> List[Label]:
+        manager = self.label_class.objects
+        labels = manager.filter_annotatable_labels(labels, project)
+        manager.stamp_project_version(labels)
+        return manager.bulk_create(labels)
+
+
+class ExampleBundleMixin:
+    """Serialize examples with all their labels of a project version.
+
+    The labels are filtered like in the list APIs: those of the project
+    version, and only the user's own unless the annotation is collaborative.
+    The examples must be loaded with `with_annotation_state`, so any number of
+    them costs one query per label kind.
+    """
+
+    label_kinds = {
+        "categories": (Category, CategorySerializer),
+        "spans": (Span, SpanSerializer),
+        "relations": (Relation, RelationSerializer),
+        "texts": (TextLabel, TextLabelSerializer),
+        "bboxes": (BoundingBox, BoundingBoxSerializer),
+        "segments": (Segmentation, SegmentationSerializer),
+    }
+
+    def bundle(self, request, project, examples: List[Example]) -> List[dict]:
+        serialized = ExampleSerializer(examples, many=True, context={"request": request}).data
+        bundles = {example.id: {"example": data} for example, data in zip(examples, serialized)}
+        for name, (label_class, serializer_class) in self.label_kinds.items():
+            labels = label_class.objects.filter(example__in=list(bundles), project_version=project.version)
+            if not project.collaborative_annotation and not request.user.is_superuser:
+                labels = labels.filter(user=request.user)
+            labels = list(labels)
+            for bundle in bundles.values():
+                bundle[name] = []
+            for label, data in zip(labels, serializer_class(labels, many=True).data):
+                bundles[label.example_id][name].append(data)
+        return [bundles[example.id] for example in examples]
+
+
+class ExampleBundleAPI(ExampleBundleMixin, views.APIView):
+    """An example with all its labels of the project version, in one response.
+
+    The response is built with a fixed number of queries and carries an ETag
+    of its content, so an unchanged example is answered with a 304.
+    """
+
+    permission_classes = [IsAuthenticated & IsProjectMember]
+    swagger_schema = None
+
+    def get(self, request, *args, **kwargs):
+        project = get_object_or_404(Project, pk=self.kwargs["project_id"])
+        original_project = project.original_project or project
+        example = get_object_or_404(
+            Example.objects.with_annotation_state(request.user, original_project.collaborative_annotation),
+            pk=self.kwargs["example_id"],
+            project=original_project,
+        )
+        example.project = original_project
+        data = self.bundle(request, project, [example])[0]
+
+        etag = f'"{hashlib.md5(JSONRenderer().render(data)).hexdigest()}"'
+        not_modified = get_conditional_response(request, etag=etag)
+        response = Response(status=not_modified.status_code) if not_modified is not None else Response(data)
+        response["ETag"] = etag
+        return response
+
+
+class ExampleQueueAPI(ExampleBundleMixin, views.APIView):
+    """The next examples the user has to annotate, with their labels.
+
+    These are the examples assigned to the user and not yet confirmed (by
+    anyone when the annotation is collaborative), in the order of the example
+    list: by assignment when the project shows examples in random order, else
+    by creation. Passing `after` continues after an example of the queue, so
+    clients can prefetch the following examples while the current one is
+    still being annotated. `count` is the length of the whole queue.
+    """
+
+    permission_classes = [IsAuthenticated & IsProjectMember]
+    swagger_schema = None
+    default_limit = 10
+    max_limit = 100
+
+    def get(self, request, *args, **kwargs):
+        project = get_object_or_404(Project, pk=self.kwargs["project_id"])
+        original_project = project.original_project or project
+        try:
+            limit = min(max(int(request.query_params.get("limit", self.default_limit)), 1), self.max_limit)
+            after = request.query_params.get("after")
+            after = int(after) if after else None
+        except ValueError:
+            return Response({"detail": "limit and after must be integers."}, status=status.HTTP_400_BAD_REQUEST)
+
+        states = ExampleState.objects.filter(example=OuterRef("example"))
+        if not original_project.collaborative_annotation:
+            states = states.filter(confirmed_by=request.user)
+        queue = Assignment.objects.filter(project=original_project, assignee=request.user).filter(~Exists(states))
+        count = queue.count()
+        if after is not None:
+            current = (
+                Assignment.objects.filter(project=original_project, assignee=request.user, example_id=after)
+                .select_related("example")
+                .first()
+            )
+            if current is None:
+                return Response(
+                    {"detail": f"Example {after} is not assigned to you."}, status=status.HTTP_400_BAD_REQUEST
+                )
+            if project.random_order:
+                queue = queue.filter(id__gt=current.id)
+            else:
+                created_at = current.example.created_at
+                queue = queue.filter(
+                    Q(example__created_at__gt=created_at) | Q(example__created_at=created_at, example_id__gt=after)
+                )
+
+        ordering = ["id"] if project.random_order else ["example__created_at", "example_id"]
+        example_ids = list(queue.order_by(*ordering).values_list("example_id", flat=True)[:limit])
+        examples = Example.objects.with_annotation_state(
+            request.user, original_project.collaborative_annotation
+        ).in_bulk(example_ids)
+        return Response({"count": count, "results": self.bundle(request, project, [examples[i] for i in example_ids])})
+
+
 class BaseDetailAPI(generics.RetrieveUpdateDestroyAPIView):
     lookup_url_kwarg = "annotation_id"
     swagger_schema = None
@@ -93,6 +292,24 @@ class CategoryListAPI(BaseListAPI):
         return super().create(request, args, kwargs)
 
 
+class CategoryBulkAPI(BaseBulkAPI):
+    label_class = Category
+    serializer_class = CategorySerializer
+    bulk_serializer_class = BulkCategorySerializer
+    label_type_class = CategoryType
+
+    def perform_bulk_create(self, project, labels):
+        if project.single_class_classification:
+            # Like the list API, a new category replaces the user's category of the example
+            latest = {label.example_id: label for label in labels}
+            labels = list(latest.values())
+            categories = Category.objects.filter(example_id__in=list(latest), project_version=project.version)
+            if not project.collaborative_annotation and not self.request.user.is_superuser:
+                categories = categories.filter(user=self.request.user)
+            categories.delete()
+        return super().perform_bulk_create(project, labels)
+
+
 class CategoryDetailAPI(BaseDetailAPI):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
@@ -103,6 +320,13 @@ class SpanListAPI(BaseListAPI):
     serializer_class = SpanSerializer
 
 
+class SpanBulkAPI(BaseBulkAPI):
+    label_class = Span
+    serializer_class = SpanSerializer
+    bulk_serializer_class = BulkSpanSerializer
+    label_type_class = SpanType
+
+
 class SpanDetailAPI(BaseDetailAPI):
     queryset = Span.objects.all()
     serializer_class = SpanSerializer
@@ -113,6 +337,12 @@ class TextLabelListAPI(BaseListAPI):
     serializer_class = TextLabelSerializer
 
 
+class TextLabelBulkAPI(BaseBulkAPI):
+    label_class = TextLabel
+    serializer_class = TextLabelSerializer
+    bulk_serializer_class = BulkTextLabelSerializer
+
+
 class TextLabelDetailAPI(BaseDetailAPI):
     queryset = TextLabel.objects.all()
     serializer_class = TextLabelSerializer
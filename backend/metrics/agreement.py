@@ -0,0 +1,140 @@
+"""Chance-corrected inter-annotator agreement of categorical annotations.
+
+The annotations are reduced to a count matrix where each row is an example,
+each column a label and each cell the number of annotators who gave that label
+to that example. All the coefficients are computed from that matrix with array
+operations, so they scale with the number of annotations rather than with a
+Python loop over the examples.
+"""
+import dataclasses
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+@dataclasses.dataclass
+class AnnotationMatrix:
+    """Example x label count matrix of a set of annotations.
+
+    Attributes:
+        counts: Matrix of shape (examples, labels) with the number of ratings per cell.
+        example_ids: The example id of each row.
+        label_ids: The label id of each column.
+    """
+
+    counts: np.ndarray
+    example_ids: np.ndarray
+    label_ids: np.ndarray
+
+    @classmethod
+    def from_annotations(cls, example_ids: np.ndarray, label_ids: np.ndarray) -> "AnnotationMatrix":
+        """Build the matrix from one (example, label) pair per annotation.
+
+        Args:
+            example_ids: The example id of each annotation.
+            label_ids: The label id of each annotation.
+
+        Returns:
+            The count matrix of the annotations.
+        """
+        examples, rows = np.unique(example_ids, return_inverse=True)
+        labels, columns = np.unique(label_ids, return_inverse=True)
+        flat = np.bincount(rows * len(labels) + columns, minlength=len(examples) * len(labels))
+        return cls(flat.reshape(len(examples), len(labels)), examples, labels)
+
+    def pairable(self) -> "AnnotationMatrix":
+        """Keep only the examples rated at least twice, the only ones carrying agreement information."""
+        mask = self.counts.sum(axis=1) >= 2
+        return AnnotationMatrix(self.counts[mask], self.example_ids[mask], self.label_ids)
+
+
+def fleiss_kappa(counts: np.ndarray) -> Optional[float]:
+    """Fleiss' kappa, allowing a different number of ratings per example.
+
+    Args:
+        counts: Matrix of shape (examples, labels); examples rated less than twice are ignored.
+
+    Returns:
+        The kappa, or None if it is undefined (no pairable example or a single label used).
+    """
+    counts = counts[counts.sum(axis=1) >= 2].astype(np.float64)
+    if counts.size == 0:
+        return None
+    raters = counts.sum(axis=1)
+    observed = ((counts * (counts - 1)).sum(axis=1) / (raters * (raters - 1))).mean()
+    proportions = counts.sum(axis=0) / raters.sum()
+    expected = np.square(proportions).sum()
+    if np.isclose(expected, 1):
+        return None
+    return float((observed - expected) / (1 - expected))
+
+
+def krippendorff_alpha(counts: np.ndarray) -> Optional[float]:
+    """Krippendorff's alpha for nominal data.
+
+    Args:
+        counts: Matrix of shape (examples, labels); examples rated less than twice are ignored.
+
+    Returns:
+        The alpha, or None if it is undefined (no pairable example or a single label used).
+    """
+    counts = counts[counts.sum(axis=1) >= 2].astype(np.float64)
+    if counts.size == 0:
+        return None
+    weights = 1 / (counts.sum(axis=1) - 1)
+    coincidences = (counts * weights[:, None]).T @ counts
+    coincidences[np.diag_indices_from(coincidences)] -= (counts * weights[:, None]).sum(axis=0)
+    marginals = coincidences.sum(axis=1)
+    total = marginals.sum()
+    expected = total**2 - np.square(marginals).sum()
+    if np.isclose(expected, 0):
+        return None
+    return float(1 - (total - 1) * (total - np.trace(coincidences)) / expected)
+
+
+def label_kappas(counts: np.ndarray) -> List[Optional[float]]:
+    """Category-specific Fleiss' kappa of every label.
+
+    Each value measures how much the annotators agree on applying that label
+    versus any other one.
+
+    Args:
+        counts: Matrix of shape (examples, labels); examples rated less than twice are ignored.
+
+    Returns:
+        The kappa of each column, None where it is undefined.
+    """
+    counts = counts[counts.sum(axis=1) >= 2].astype(np.float64)
+    if counts.size == 0:
+        return [None] * counts.shape[1]
+    raters = counts.sum(axis=1, keepdims=True)
+    proportions = counts.sum(axis=0) / raters.sum()
+    disagreement = (counts * (raters - counts)).sum(axis=0)
+    expected = (raters * (raters - 1)).sum() * proportions * (1 - proportions)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        kappas = 1 - disagreement / expected
+    return [None if np.isclose(e, 0) else float(k) for k, e in zip(kappas, expected)]
+
+
+def measure_agreement(matrix: AnnotationMatrix, label_texts: Dict[int, str]) -> dict:
+    """Summarize the agreement of an annotation matrix.
+
+    Args:
+        matrix: The annotations to measure.
+        label_texts: The text of each label id, used in the per-label results.
+
+    Returns:
+        The coefficients and the number of examples and ratings they are based on.
+    """
+    pairable = matrix.pairable()
+    kappas = label_kappas(pairable.counts)
+    return {
+        "examples": len(pairable.example_ids),
+        "ratings": int(pairable.counts.sum()),
+        "fleiss_kappa": fleiss_kappa(pairable.counts),
+        "krippendorff_alpha": krippendorff_alpha(pairable.counts),
+        "labels": [
+            {"id": int(label_id), "text": label_texts.get(int(label_id), ""), "kappa": kappa}
+            for label_id, kappa in zip(pairable.label_ids, kappas)
+        ],
+    }
@@ -1,3 +1,5 @@
+import numpy as np
+from django.test import TestCase
 from model_mommy import mommy
 from rest_framework import status
 from rest_framework.reverse import reverse
@@ -5,6 +7,13 @@ from rest_framework.reverse import reverse
 from api.tests.utils import CRUDMixin
 from examples.tests.utils import make_doc
 from label_types.tests.utils import make_label
+from labels.models import Category
+from metrics.agreement import (
+    AnnotationMatrix,
+    fleiss_kappa,
+    krippendorff_alpha,
+    label_kappas,
+)
 from projects.models import ProjectType
 from projects.tests.utils import prepare_project
 
@@ -78,3 +87,127 @@ class TestCategoryDistribution(CRUDMixin):
         expected = {member.username: {self.label.text: 0} for member in self.project.members}
         expected[self.project.admin.username][self.label.text] = 1
         self.assertEqual(response.data, expected)
+
+    def test_fetch_compact_distribution(self):
+        self.url += "?compact=true"
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        usernames = response.data["users"]
+        self.assertEqual(response.data["labels"], [self.label.text])
+        self.assertEqual(sorted(usernames), sorted(member.username for member in self.project.members))
+        self.assertEqual(response.data["counts"][usernames.index(self.project.admin.username)], [1])
+
+    def test_count_labels_of_the_version(self):
+        version = self.project.item.create_new_version()
+        label = version.categorytype_set.get()
+        mommy.make("Category", example=self.example, label=label, user=self.project.annotator, project_version=2)
+        self.url = reverse(viewname="category_distribution", args=[version.id])
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual(response.data[self.project.admin.username][self.label.text], 0)
+        self.assertEqual(response.data[self.project.annotator.username][self.label.text], 1)
+
+    def test_cache_until_labels_change(self):
+        self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        # only the revision is read
+        with self.assertNumQueries(1):
+            Category.objects.count_by_version(self.project.item.id)
+        mommy.make("Category", example=self.example, label=self.label, user=self.project.annotator)
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual(response.data[self.project.annotator.username][self.label.text], 1)
+
+    def test_follow_renamed_labels_and_users(self):
+        self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.label.text = "renamed"
+        self.label.save()
+        self.project.admin.username = "renamed_admin"
+        self.project.admin.save()
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual(response.data["renamed_admin"]["renamed"], 1)
+
+
+class TestAgreementCoefficients(TestCase):
+    def setUp(self):
+        # The example table of Fleiss (1971): 10 examples rated by 14 annotators.
+        self.counts = np.array(
+            [
+                [0, 0, 0, 0, 14],
+                [0, 2, 6, 4, 2],
+                [0, 0, 3, 5, 6],
+                [0, 3, 9, 2, 0],
+                [2, 2, 8, 1, 1],
+                [7, 7, 0, 0, 0],
+                [3, 2, 6, 3, 0],
+                [2, 5, 3, 2, 2],
+                [6, 5, 2, 1, 0],
+                [0, 2, 2, 3, 7],
+            ]
+        )
+
+    def test_fleiss_kappa(self):
+        self.assertAlmostEqual(fleiss_kappa(self.counts), 0.2099, places=4)
+
+    def test_label_kappas(self):
+        kappas = label_kappas(self.counts)
+        self.assertEqual(len(kappas), 5)
+        self.assertAlmostEqual(kappas[4], 0.5077, places=4)
+
+    def test_krippendorff_alpha(self):
+        counts = np.array([[2, 0], [0, 2], [1, 1]])
+        # Coincidences: o_00 = o_11 = 2, o_01 = o_10 = 1, so alpha = 1 - 5 * 2 / 18.
+        self.assertAlmostEqual(krippendorff_alpha(counts), 4 / 9)
+
+    def test_perfect_agreement(self):
+        counts = np.array([[3, 0], [0, 3]])
+        self.assertEqual(fleiss_kappa(counts), 1)
+        self.assertEqual(krippendorff_alpha(counts), 1)
+
+    def test_undefined_without_pairable_examples(self):
+        counts = np.array([[1, 0], [0, 1]])
+        self.assertIsNone(fleiss_kappa(counts))
+        self.assertIsNone(krippendorff_alpha(counts))
+        self.assertEqual(label_kappas(counts), [None, None])
+
+    def test_build_matrix(self):
+        matrix = AnnotationMatrix.from_annotations(np.array([5, 5, 9]), np.array([2, 3, 2]))
+        np.testing.assert_array_equal(matrix.counts, [[1, 1], [1, 0]])
+        np.testing.assert_array_equal(matrix.example_ids, [5, 9])
+        np.testing.assert_array_equal(matrix.label_ids, [2, 3])
+
+
+class TestCategoryAgreement(CRUDMixin):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        positive = make_label(self.project.item, text="positive")
+        negative = make_label(self.project.item, text="negative")
+        agreed = make_doc(self.project.item)
+        disputed = make_doc(self.project.item)
+        for member in self.project.members:
+            mommy.make("Category", example=agreed, label=positive, user=member)
+        for member, label in zip(self.project.members, [positive, positive, negative]):
+            mommy.make("Category", example=disputed, label=label, user=member)
+        self.url = reverse(viewname="category_agreement", args=[self.project.item.id])
+
+    def test_fetch_agreement(self):
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual(response.data["examples"], 2)
+        self.assertEqual(response.data["ratings"], 6)
+        self.assertAlmostEqual(response.data["fleiss_kappa"], -0.2)
+        self.assertEqual({label["text"] for label in response.data["labels"]}, {"positive", "negative"})
+
+    def test_slice_by_perspective(self):
+        perspective = mommy.make("Perspective")
+        for member, value in zip(self.project.members, ["a", "a", "b"]):
+            mommy.make(
+                "PerspectiveMember",
+                member=member.role_mappings.get(project=self.project.item),
+                perspective=perspective,
+                value=value,
+            )
+        self.url += f"?perspective_id={perspective.id}"
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        slices = {item["value"]: item for item in response.data["slices"]}
+        self.assertEqual(slices["a"]["ratings"], 4)
+        self.assertEqual(slices["b"]["examples"], 0)
+
+    def test_require_perspective_with_value(self):
+        self.url += "?value=a"
+        self.assert_fetch(self.project.admin, status.HTTP_400_BAD_REQUEST)
@@ -1,6 +1,7 @@
 from django.urls import path
 
 from .views import (
+    CategoryAgreement,
     CategoryTypeDistribution,
     MemberProgressAPI,
     ProgressAPI,
@@ -13,5 +14,6 @@ urlpatterns = [
     path(route="member-progress", view=MemberProgressAPI.as_view(), name="member_progress"),
     path(route="category-distribution", view=CategoryTypeDistribution.as_view(), name="category_distribution"),
     path(route="relation-distribution", view=RelationTypeDistribution.as_view(), name="relation_distribution"),
+    path(route="category-agreement", view=CategoryAgreement.as_view(), name="category_agreement"),
     path(route="span-distribution", view=SpanTypeDistribution.as_view(), name="span_distribution"),
 ]
@@ -6,10 +6,12 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .agreement import AnnotationMatrix, measure_agreement
 from examples.models import Example, ExampleState
 from label_types.models import CategoryType, LabelType, RelationType, SpanType
 from labels.models import Category, Label, Relation, Span
-from projects.models import Member, Project
+from projects.analytics.matrix import matrix_cache
+from projects.models import Member, PerspectiveMember, Project
 from projects.permissions import IsProjectAdmin, IsProjectStaffAndReadOnly
 
 
@@ -39,15 +41,22 @@ class MemberProgressAPI(APIView):
 
 
 class LabelDistribution(abc.ABC, APIView):
+    """Number of labels of each type per member, for the labels of the project version.
+
+    Query parameters:
+        compact: if true, return the users, the labels and a users x labels count matrix.
+    """
+
     permission_classes = [IsAuthenticated & (IsProjectAdmin | IsProjectStaffAndReadOnly)]
     model = Label
     label_type = LabelType
 
     def get(self, request, *args, **kwargs):
-        labels = self.label_type.objects.filter(project=self.kwargs["project_id"])
-        examples = Example.objects.filter(project=self.kwargs["project_id"]).values("id")
-        members = Member.objects.filter(project=self.kwargs["project_id"])
-        data = self.model.objects.calc_label_distribution(examples, members, labels)
+        project = get_object_or_404(Project, pk=self.kwargs["project_id"])
+        labels = list(self.label_type.objects.filter(project=project).values_list("text", flat=True))
+        usernames = list(Member.objects.filter(project=project).values_list("user__username", flat=True))
+        compact = request.query_params.get("compact", "").lower() in ("1", "true")
+        data = self.model.objects.calc_label_distribution(project, usernames, labels, compact=compact)
         return Response(data=data, status=status.HTTP_200_OK)
 
 
@@ -64,3 +73,49 @@ class SpanTypeDistribution(LabelDistribution):
 class RelationTypeDistribution(LabelDistribution):
     model = Relation
     label_type = RelationType
+
+
+class CategoryAgreement(APIView):
+    """Inter-annotator agreement of the categories of a project version.
+
+    Query parameters:
+        perspective_id: If given, the agreement is measured separately among
+            the annotators sharing each value of this perspective.
+        value: Restricts the measure to the annotators with this value of
+            the perspective.
+    """
+
+    permission_classes = [IsAuthenticated & (IsProjectAdmin | IsProjectStaffAndReadOnly)]
+
+    def get(self, request, *args, **kwargs):
+        project = get_object_or_404(Project, pk=self.kwargs["project_id"])
+        original_project = project.original_project or project
+        perspective_id = request.query_params.get("perspective_id")
+        value = request.query_params.get("value")
+        if value is not None and not perspective_id:
+            return Response({"error": "perspective_id is required with value"}, status=status.HTTP_400_BAD_REQUEST)
+        if perspective_id and not perspective_id.isdigit():
+            return Response({"error": "perspective_id must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        categories = matrix_cache.get(original_project.id, project.version)
+        label_texts = dict(CategoryType.objects.filter(id__in=categories.label_ids.tolist()).values_list("id", "text"))
+        data = {"version": project.version}
+        if not perspective_id:
+            matrix = AnnotationMatrix(categories.label_counts(), categories.example_ids, categories.label_ids)
+            data.update(measure_agreement(matrix, label_texts))
+            return Response(data=data, status=status.HTTP_200_OK)
+
+        versions = original_project.get_versions()
+        answers = PerspectiveMember.objects.filter(member__project__in=versions, perspective_id=perspective_id)
+        if value is not None:
+            answers = answers.filter(value=value)
+        users_by_value = {}
+        for user_id, answer in answers.values_list("member__user_id", "value").distinct():
+            users_by_value.setdefault(answer, []).append(user_id)
+        data["perspective_id"] = int(perspective_id)
+        data["slices"] = []
+        for answer, users in sorted(users_by_value.items()):
+            counts = categories.label_counts(categories.user_mask(users))
+            matrix = AnnotationMatrix(counts, categories.example_ids, categories.label_ids)
+            data["slices"].append({"value": answer, **measure_agreement(matrix, label_texts)})
+        return Response(data=data, status=status.HTTP_200_OK)
@@ -0,0 +1,153 @@
+import dataclasses
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from labels.models import AnnotationRevision, Category
+
+
+@dataclasses.dataclass
+class CategoryMatrix:
+    """Array-backed copy of the categories of a project version.
+
+    The annotations are stored in compressed sparse row (CSR) form: the
+    annotations of the example at index `i` are those between `indptr[i]` and
+    `indptr[i + 1]`, in the order they were created. `annotators` and `labels`
+    hold, for each annotation, the index of its user in `user_ids` and of its
+    category type in `label_ids`, so multi-label annotations need no special
+    casing. Indices are int32, which keeps a million annotations under 10 MB.
+
+    Examples:
+        >>> matrix = CategoryMatrix.load(original_project_id=1, version=2)
+        >>> matrix.label_counts().shape
+        (120, 3)
+    """
+
+    example_ids: np.ndarray
+    user_ids: np.ndarray
+    label_ids: np.ndarray
+    indptr: np.ndarray
+    annotators: np.ndarray
+    labels: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows: np.ndarray) -> "CategoryMatrix":
+        """Build the matrix from (example_id, user_id, label_id) rows sorted by example and creation order."""
+        rows = np.asarray(rows, dtype=np.int64).reshape(-1, 3)
+        example_ids, example_index, counts = np.unique(rows[:, 0], return_inverse=True, return_counts=True)
+        user_ids, annotators = np.unique(rows[:, 1], return_inverse=True)
+        label_ids, labels = np.unique(rows[:, 2], return_inverse=True)
+        # A stable sort keeps the creation order within each example.
+        order = np.argsort(example_index, kind="stable")
+        indptr = np.zeros(len(example_ids) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+        return cls(
+            example_ids=example_ids,
+            user_ids=user_ids,
+            label_ids=label_ids,
+            indptr=indptr,
+            annotators=annotators[order].astype(np.int32),
+            labels=labels[order].astype(np.int32),
+        )
+
+    @classmethod
+    def load(cls, original_project_id: int, version: int) -> "CategoryMatrix":
+        """Read the categories of a project version with a single query.
+
+        Args:
+            original_project_id: The project where the examples are stored.
+            version: The project version the annotations belong to.
+        """
+        rows = (
+            Category.objects.filter(example__project_id=original_project_id, project_version=version)
+            .order_by("example_id", "id")
+            .values_list("example_id", "user_id", "label_id")
+        )
+        return cls.from_rows(np.array(list(rows), dtype=np.int64))
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in dataclasses.astuple(self))
+
+    @property
+    def rows(self) -> np.ndarray:
+        """The example index of each annotation."""
+        return np.repeat(np.arange(len(self.example_ids), dtype=np.int32), np.diff(self.indptr))
+
+    def user_mask(self, user_ids: Iterable[int]) -> np.ndarray:
+        """Boolean mask of the annotations made by the given users."""
+        users = np.isin(self.user_ids, np.fromiter(user_ids, dtype=np.int64))
+        return users[self.annotators]
+
+    def label_counts(self, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Number of annotations of each label per example.
+
+        Args:
+            mask: If given, only the annotations where it is True are counted.
+
+        Returns:
+            Matrix of shape (examples, labels).
+        """
+        rows, labels = self.rows, self.labels
+        if mask is not None:
+            rows, labels = rows[mask], labels[mask]
+        size = len(self.example_ids) * len(self.label_ids)
+        flat = np.bincount(rows.astype(np.int64) * len(self.label_ids) + labels, minlength=size)
+        return flat.reshape(len(self.example_ids), len(self.label_ids))
+
+    def dense(self) -> np.ndarray:
+        """Example x annotator matrix of label indices, -1 where the user did not annotate.
+
+        Meant for single-label projects; with multi-label annotations only the
+        latest label of each user is kept, use the CSR arrays instead.
+        """
+        dense = np.full((len(self.example_ids), len(self.user_ids)), -1, dtype=np.int32)
+        dense[self.rows, self.annotators] = self.labels
+        return dense
+
+    def first_annotators(self) -> Dict[int, int]:
+        """The user id of the first annotation of each example, keyed by example id."""
+        starts = self.indptr[:-1]
+        return dict(zip(self.example_ids.tolist(), self.user_ids[self.annotators[starts]].tolist()))
+
+
+class CategoryMatrixCache:
+    """Per-process cache of the category matrices of the most used project versions.
+
+    The entries are tagged with the project's `AnnotationRevision`, so a
+    lookup costs a single small query while nobody annotates and the matrix
+    is reloaded after any category write.
+    """
+
+    def __init__(self, max_size: int = 32):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[int, int], Tuple[str, CategoryMatrix]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, original_project_id: int, version: int) -> CategoryMatrix:
+        tag = AnnotationRevision.objects.current(original_project_id).tag
+        key = (original_project_id, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == tag:
+                self._entries.move_to_end(key)
+                return entry[1]
+        matrix = CategoryMatrix.load(original_project_id, version)
+        with self._lock:
+            self._entries[key] = (tag, matrix)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return matrix
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+matrix_cache = CategoryMatrixCache()
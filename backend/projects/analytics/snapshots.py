@@ -0,0 +1,61 @@
+import hashlib
+from typing import Callable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from labels.models import AnnotationRevision
+
+
+class SnapshotMixin:
+    """Serve the response of a dashboard view from the cache while its data is unchanged.
+
+    The snapshot is keyed by the view, the project (including its last update,
+    which covers settings such as the discrepancy threshold) and the
+    `AnnotationRevision` of the original project. Its ETag is a hash of the
+    data, so clients sending it back in `If-None-Match` get a 304 only while
+    the data is unchanged, even for writes that skip the revision.
+
+    Examples:
+        >>> class DashboardView(SnapshotMixin, APIView):
+        ...     def get(self, request, project_id):
+        ...         project = get_object_or_404(Project, id=project_id)
+        ...         return self.snapshot_response(request, project, lambda: compute(project))
+    """
+
+    snapshot_name = None
+
+    def get_snapshot_name(self) -> str:
+        return self.snapshot_name or type(self).__name__
+
+    def get_snapshot_key(self, project) -> str:
+        original_project = project.original_project or project
+        tag = AnnotationRevision.objects.current(original_project.id).tag
+        updated_at = project.updated_at.isoformat() if project.updated_at else ""
+        return f"analytics:{self.get_snapshot_name()}:{project.id}:{updated_at}:{tag}"
+
+    def snapshot_response(self, request, project, build: Callable[[], dict]) -> Response:
+        """Return the cached data or build and cache it.
+
+        Args:
+            request: The current request, checked for `If-None-Match`.
+            project: The project the data is computed for.
+            build: Computes the data when it is not cached.
+
+        Returns:
+            A 304 response if the client has the current data, else the data, both with its ETag.
+        """
+        key = self.get_snapshot_key(project)
+        snapshot = cache.get(key)
+        if snapshot is None:
+            data = build()
+            snapshot = (data, f'"{hashlib.md5(JSONRenderer().render(data)).hexdigest()}"')
+            cache.set(key, snapshot, settings.ANALYTICS_CACHE_TIMEOUT)
+        data, etag = snapshot
+        not_modified = get_conditional_response(request, etag=etag)
+        response = Response(status=not_modified.status_code) if not_modified is not None else Response(data)
+        response["ETag"] = etag
+        return response
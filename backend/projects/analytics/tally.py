@@ -0,0 +1,223 @@
+import dataclasses
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+from django.db.models import Count
+
+from .matrix import CategoryMatrix
+from label_types.models import CategoryType
+from labels.models import Category, ExampleLabelTally
+
+
+@dataclasses.dataclass
+class LabelCount:
+    label_id: int
+    text: str
+    background_color: str
+    count: int = 0
+
+
+class ExampleTally:
+    """Label counts of a single example in one project version."""
+
+    def __init__(self, example_id: int):
+        self.example_id = example_id
+        self.labels: Dict[int, LabelCount] = {}
+
+    def add(self, label_id: int, text: str, background_color: str, count: int):
+        if label_id in self.labels:
+            self.labels[label_id].count += count
+        else:
+            self.labels[label_id] = LabelCount(label_id, text, background_color, count)
+
+    @property
+    def total(self) -> int:
+        return sum(label.count for label in self.labels.values())
+
+    @property
+    def percentages(self) -> Dict[str, float]:
+        total = self.total
+        if total == 0:
+            return {}
+        return {label.text: label.count / total * 100 for label in self.labels.values()}
+
+    @property
+    def max_percentage(self) -> float:
+        """The share of the most voted label, between 0 and 100."""
+        total = self.total
+        if total == 0:
+            return 0
+        return max(label.count for label in self.labels.values()) / total * 100
+
+    def is_discrepancy(self, threshold: float) -> bool:
+        return self.total > 0 and self.max_percentage < threshold
+
+
+class LabelTally:
+    """Per-example label counts of a project version.
+
+    The counts are read from `ExampleLabelTally` with a single query, or
+    computed by a single grouped query over `Category` when they are
+    restricted to some users, so the cost does not depend on the number
+    of examples in the project.
+
+    Examples:
+        >>> tally = LabelTally.build(original_project_id=1, version=2)
+        >>> tally.discrepancies(threshold=70)
+        {3, 8}
+    """
+
+    def __init__(self, rows: Iterable[dict] = ()):
+        self._examples: Dict[int, ExampleTally] = {}
+        for row in rows:
+            self.add(row)
+
+    @classmethod
+    def build(
+        cls,
+        original_project_id: int,
+        version: int,
+        example_ids: Optional[Iterable[int]] = None,
+        user_ids: Optional[Iterable[int]] = None,
+        example_range: Optional[Tuple[int, int]] = None,
+    ) -> "LabelTally":
+        """Count the labels of every example of a project version.
+
+        Args:
+            original_project_id: The project where the examples are stored.
+            version: The project version the annotations belong to.
+            example_ids: If given, only these examples are counted.
+            user_ids: If given, only the annotations of these users are counted.
+            example_range: If given, only the examples whose id is in this inclusive range are counted.
+
+        Returns:
+            The label tally of the version.
+        """
+        return cls.build_many(original_project_id, [version], example_ids, user_ids, example_range)[version]
+
+    @classmethod
+    def build_many(
+        cls,
+        original_project_id: int,
+        versions: Iterable[int],
+        example_ids: Optional[Iterable[int]] = None,
+        user_ids: Optional[Iterable[int]] = None,
+        example_range: Optional[Tuple[int, int]] = None,
+    ) -> Dict[int, "LabelTally"]:
+        """Count the labels of several project versions with a single query.
+
+        Args:
+            original_project_id: The project where the examples are stored.
+            versions: The project versions the annotations belong to.
+            example_ids: If given, only these examples are counted.
+            user_ids: If given, only the annotations of these users are counted.
+            example_range: If given, only the examples whose id is in this inclusive range are counted.
+
+        Returns:
+            The label tally of each version, keyed by version number.
+        """
+        tallies = {version: cls() for version in versions}
+        fields = ("project_version", "example_id", "label_id", "label__text", "label__background_color")
+        if user_ids is None:
+            queryset = ExampleLabelTally.objects.filter(
+                example__project_id=original_project_id, project_version__in=tallies
+            )
+            rows = queryset.values(*fields, "count")
+        else:
+            queryset = Category.objects.filter(
+                example__project_id=original_project_id, project_version__in=tallies, user_id__in=user_ids
+            )
+            rows = queryset.order_by().values(*fields).annotate(count=Count("id"))
+        if example_ids is not None:
+            rows = rows.filter(example_id__in=example_ids)
+        if example_range is not None:
+            rows = rows.filter(example_id__gte=example_range[0], example_id__lte=example_range[1])
+        for row in rows:
+            tallies[row["project_version"]].add(row)
+        return tallies
+
+    @classmethod
+    def from_matrix(
+        cls,
+        matrix: CategoryMatrix,
+        example_ids: Optional[Iterable[int]] = None,
+        user_ids: Optional[Iterable[int]] = None,
+    ) -> "LabelTally":
+        """Count the labels of a category matrix, usually a cached one.
+
+        Only the texts and colors of the labels are read from the database.
+
+        Args:
+            matrix: The categories of the project version.
+            example_ids: If given, only these examples are counted.
+            user_ids: If given, only the annotations of these users are counted.
+
+        Returns:
+            The label tally of the matrix.
+        """
+        mask = None if user_ids is None else matrix.user_mask(user_ids)
+        label_counts = matrix.label_counts(mask)
+        rows, columns = np.nonzero(label_counts)
+        if example_ids is not None:
+            keep = np.isin(matrix.example_ids[rows], np.fromiter(example_ids, dtype=np.int64))
+            rows, columns = rows[keep], columns[keep]
+        counts = label_counts[rows, columns]
+        labels = {
+            label["id"]: label
+            for label in CategoryType.objects.filter(id__in=matrix.label_ids.tolist()).values(
+                "id", "text", "background_color"
+            )
+        }
+        tally = cls()
+        for example_id, label_id, count in zip(
+            matrix.example_ids[rows].tolist(), matrix.label_ids[columns].tolist(), counts.tolist()
+        ):
+            # A label type deleted since the matrix was cached has no name left to show.
+            label = labels.get(label_id)
+            if label is None:
+                continue
+            tally.add(
+                {
+                    "example_id": example_id,
+                    "label_id": label_id,
+                    "label__text": label["text"],
+                    "label__background_color": label["background_color"],
+                    "count": count,
+                }
+            )
+        return tally
+
+    def add(self, row: dict):
+        example_id = row["example_id"]
+        if example_id not in self._examples:
+            self._examples[example_id] = ExampleTally(example_id)
+        self._examples[example_id].add(
+            row["label_id"], row["label__text"], row["label__background_color"], row["count"]
+        )
+
+    def __iter__(self) -> Iterator[ExampleTally]:
+        return iter(self._examples.values())
+
+    def __len__(self) -> int:
+        return len(self._examples)
+
+    def __contains__(self, example_id: int) -> bool:
+        return example_id in self._examples
+
+    def __getitem__(self, example_id: int) -> ExampleTally:
+        return self._examples[example_id]
+
+    def get(self, example_id: int) -> Optional[ExampleTally]:
+        return self._examples.get(example_id)
+
+    @property
+    def example_ids(self) -> List[int]:
+        return list(self._examples)
+
+    @property
+    def label_texts(self) -> List[str]:
+        return sorted({label.text for example in self for label in example.labels.values()})
+
+    def discrepancies(self, threshold: float) -> Set[int]:
+        """Return the ids of the examples whose most voted label is below the threshold."""
+        return {example.example_id for example in self if example.is_discrepancy(threshold)}
@@ -0,0 +1,77 @@
+import dataclasses
+from typing import List
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .matrix import CategoryMatrix, matrix_cache
+from labels.models import AnnotationRevision
+
+
+@dataclasses.dataclass
+class ThresholdProfile:
+    """Share of the most voted label of every annotated example, sorted.
+
+    An example is a discrepancy when that share is below the project's
+    discrepancy percentage, so the examples flagged at any threshold are a
+    prefix of the sorted arrays, found by binary search.
+
+    Examples:
+        >>> profile = ThresholdProfile.from_matrix(matrix)
+        >>> profile.count_flagged(70)
+        12
+    """
+
+    shares: np.ndarray
+    example_ids: np.ndarray
+
+    @classmethod
+    def from_matrix(cls, matrix: CategoryMatrix) -> "ThresholdProfile":
+        counts = matrix.label_counts()
+        totals = counts.sum(axis=1)
+        annotated = totals > 0
+        shares = counts[annotated].max(axis=1) / totals[annotated] * 100
+        order = np.argsort(shares, kind="stable")
+        return cls(shares=shares[order], example_ids=matrix.example_ids[annotated][order])
+
+    def __len__(self) -> int:
+        return len(self.shares)
+
+    def count_flagged(self, threshold: float) -> int:
+        """The number of examples whose most voted label is below the threshold."""
+        return int(np.searchsorted(self.shares, threshold, side="left"))
+
+    def flagged(self, threshold: float) -> List[dict]:
+        """The examples whose most voted label is below the threshold, from the most disputed."""
+        end = self.count_flagged(threshold)
+        return [
+            {"id": example_id, "max_percentage": share}
+            for example_id, share in zip(self.example_ids[:end].tolist(), self.shares[:end].tolist())
+        ]
+
+    def histogram(self, bins: int) -> dict:
+        """Fixed-width histogram of the shares between 0 and 100.
+
+        Returns:
+            The bin edges, the number of examples per bin and the number of
+            examples flagged at each edge, so `flagged[i]` answers
+            "how many examples would be flagged at `edges[i]`%".
+        """
+        counts, edges = np.histogram(self.shares, bins=bins, range=(0, 100))
+        return {
+            "edges": edges.tolist(),
+            "counts": counts.tolist(),
+            "flagged": np.searchsorted(self.shares, edges, side="left").tolist(),
+        }
+
+
+def get_threshold_profile(original_project_id: int, version: int) -> ThresholdProfile:
+    """Return the threshold profile of a project version, cached until its annotations change."""
+    tag = AnnotationRevision.objects.current(original_project_id).tag
+    key = f"analytics:thresholds:{original_project_id}:{version}:{tag}"
+    profile = cache.get(key)
+    if profile is None:
+        profile = ThresholdProfile.from_matrix(matrix_cache.get(original_project_id, version))
+        cache.set(key, profile, settings.ANALYTICS_CACHE_TIMEOUT)
+    return profile
@@ -0,0 +1,84 @@
+import json
+import os
+import uuid
+from typing import List
+
+from celery import shared_task
+from celery.utils.log import get_task_logger
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.shortcuts import get_object_or_404
+from django.utils.datastructures import MultiValueDict
+
+from .deletion import ProjectDeleter
+from .models import Project
+from .views.project import AllVersionsStatisticsView, AnnotationStatisticsView
+
+logger = get_task_logger(__name__)
+
+STATISTICS_VIEWS = {
+    "annotation-statistics": AnnotationStatisticsView,
+    "all-versions-statistics": AllVersionsStatisticsView,
+}
+
+
+def statistics_dir(project_id: int) -> str:
+    """The directory holding the statistics files of a project."""
+    return os.path.join(settings.MEDIA_ROOT, "statistics", str(project_id))
+
+
+@shared_task(bind=True)
+def compute_statistics(self, project_id: int, statistics: str, query_params: dict):
+    """Compute the statistics of a project in the background.
+
+    The progress is reported as the `PROGRESS` state of the task, with the
+    number of processed (`current`) and `total` examples as meta data.
+
+    Args:
+        project_id: The project version requested.
+        statistics: The statistics to compute, a key of `STATISTICS_VIEWS`.
+        query_params: The query parameters of the request, as lists of values.
+
+    Returns:
+        The path of the JSON file holding the statistics.
+    """
+    project = get_object_or_404(Project, pk=project_id)
+    view = STATISTICS_VIEWS[statistics]()
+
+    def progress(current, total):
+        self.update_state(state="PROGRESS", meta={"current": current, "total": total})
+
+    data = view.get_statistics(project, MultiValueDict(query_params), progress)
+    dirpath = statistics_dir(project_id)
+    os.makedirs(dirpath, exist_ok=True)
+    filepath = os.path.join(dirpath, f"{uuid.uuid4()}.json")
+    with open(filepath, "w", encoding="utf-8") as f:
+        json.dump(data, f, cls=DjangoJSONEncoder)
+    logger.info(f"Computed {statistics} of project {project_id} into {filepath}")
+    return filepath
+
+
+@shared_task(bind=True)
+def clone_project(self, project_id: int, labels: bool = False, comments: bool = False):
+    """Clone a project in the background, reporting the copied examples as `PROGRESS`.
+
+    Returns:
+        The id of the cloned project.
+    """
+    project = get_object_or_404(Project, pk=project_id)
+
+    def progress(current, total):
+        self.update_state(state="PROGRESS", meta={"current": current, "total": total})
+
+    cloned_project = project.clone(labels=labels, comments=comments, progress=progress)
+    return cloned_project.id
+
+
+@shared_task(bind=True)
+def delete_projects(self, project_ids: List[int]):
+    """Delete projects with all their versions, reporting the deleted examples as `PROGRESS`."""
+
+    def progress(current, total):
+        self.update_state(state="PROGRESS", meta={"current": current, "total": total})
+
+    ProjectDeleter(project_ids, progress=progress).delete()
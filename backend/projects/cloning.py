@@ -0,0 +1,213 @@
+import uuid
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.db import models, transaction
+
+from examples.models import Comment, Example
+from label_types.models import CategoryType, RelationType, SpanType
+from labels.models import (
+    BoundingBox,
+    Category,
+    Relation,
+    Segmentation,
+    Span,
+    TextLabel,
+)
+from projects.models import Project
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class ProjectCloner:
+    """Copy a project, streaming its examples in fixed-size chunks.
+
+    Each chunk of examples is inserted with one bulk insert per table, along
+    with its labels and comments when requested, so the memory used does not
+    depend on the number of examples.
+
+    Args:
+        source: The project to clone. The examples are read from its original project.
+        labels: Whether to copy the annotations of the source version too.
+        comments: Whether to copy the comments on the examples.
+        chunk_size: The number of examples read and inserted at once.
+        progress: If given, called with the number of copied and total examples after each chunk.
+    """
+
+    label_models = [
+        (Category, "label"),
+        (TextLabel, None),
+        (BoundingBox, "label"),
+        (Segmentation, "label"),
+    ]
+
+    def __init__(
+        self,
+        source: Project,
+        labels: bool = False,
+        comments: bool = False,
+        chunk_size: int = 1000,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ):
+        self.source = source
+        self.labels = labels
+        self.comments = comments
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.project: Optional[Project] = None
+        self.type_maps: Dict[type, Dict[int, int]] = {}
+
+    def clone(self) -> Project:
+        """Create the copy.
+
+        Outside of a transaction, the partial copy is deleted if anything fails.
+        """
+        self.project = self.copy_project()
+        try:
+            self.copy_related()
+        except Exception:
+            if transaction.get_autocommit():
+                self.project.delete()
+            raise
+        return self.project
+
+    def copy_project(self) -> Project:
+        project = Project.objects.get(pk=self.source.pk)
+        project.pk = None
+        project.id = None
+        # Reset versioning fields
+        project.version = 1
+        project.original_project = None
+        project.is_current_version = True
+        project.version_group = uuid.uuid4()
+        project._state.adding = True
+        project.save()
+        return project
+
+    def copy_related(self):
+        with transaction.atomic():
+            self.bulk_clone(self.source.role_mappings.all())
+            self.bulk_clone(self.source.tags.all())
+            for model in [CategoryType, SpanType, RelationType]:
+                self.type_maps[model] = self.clone_label_types(model)
+
+        examples = (self.source.original_project or self.source).examples.order_by("id")
+        total = examples.count()
+        copied = 0
+        for chunk in chunked(examples.iterator(chunk_size=self.chunk_size), self.chunk_size):
+            with transaction.atomic():
+                example_map = self.clone_examples(chunk)
+                if self.labels:
+                    self.clone_labels(example_map)
+                if self.comments:
+                    self.clone_comments(example_map)
+            copied += len(chunk)
+            if self.progress:
+                self.progress(copied, total)
+
+    def bulk_clone(self, queryset: models.QuerySet):
+        items = []
+        for item in queryset:
+            item.id = None
+            item.pk = None
+            item.project = self.project
+            item._state.adding = True
+            items.append(item)
+        queryset.model.objects.bulk_create(items)
+
+    def clone_label_types(self, model) -> Dict[int, int]:
+        """Copy the label types of the source and map the ids of every version's label types to the copies.
+
+        Label types are unique by text within a project, which pairs the originals with their copies.
+        """
+        self.bulk_clone(model.objects.filter(project=self.source))
+        versions = self.source.get_versions()
+        copies = dict(model.objects.filter(project=self.project).values_list("text", "id"))
+        return {
+            type_id: copies[text]
+            for type_id, text in model.objects.filter(project__in=versions).values_list("id", "text")
+            if text in copies
+        }
+
+    def clone_examples(self, examples: List[Example]) -> Dict[int, int]:
+        """Copy a chunk of examples and return the id of each copy, keyed by the id of its source."""
+        source_ids = [example.id for example in examples]
+        for example in examples:
+            example.id = None
+            example.pk = None
+            example.uuid = uuid.uuid4()
+            example.project = self.project
+            example._state.adding = True
+        copies = Example.objects.bulk_create(examples)
+        return {source_id: copy.id for source_id, copy in zip(source_ids, copies)}
+
+    def clone_label_items(
+        self, model, items: Iterable[models.Model], example_map: Dict[int, int], type_field: Optional[str] = None
+    ) -> List[Tuple[int, models.Model]]:
+        """Copy labels to the copied examples.
+
+        Labels whose type has no copy in the new project are skipped.
+
+        Returns:
+            The id of each copied label with its copy.
+        """
+        type_map = self.type_maps[model._meta.get_field(type_field).related_model] if type_field else None
+        pairs = []
+        for item in items:
+            if type_map is not None:
+                type_id = getattr(item, f"{type_field}_id")
+                if type_id not in type_map:
+                    continue
+                setattr(item, f"{type_field}_id", type_map[type_id])
+            source_id = item.id
+            item.id = None
+            item.pk = None
+            item.uuid = uuid.uuid4()
+            item.example_id = example_map[item.example_id]
+            item.project_version = self.project.version
+            item._state.adding = True
+            pairs.append((source_id, item))
+        model.objects.bulk_create([item for _, item in pairs])
+        return pairs
+
+    def clone_labels(self, example_map: Dict[int, int]):
+        source_ids = list(example_map)
+        version = self.source.version
+        for model, type_field in self.label_models:
+            items = model.objects.filter(example_id__in=source_ids, project_version=version)
+            self.clone_label_items(model, items, example_map, type_field)
+
+        spans = Span.objects.filter(example_id__in=source_ids, project_version=version)
+        span_map = self.map_copies(Span, self.clone_label_items(Span, spans, example_map, "label"))
+        relations = list(
+            Relation.objects.filter(
+                example_id__in=source_ids, project_version=version, from_id__in=list(span_map), to_id__in=list(span_map)
+            )
+        )
+        for relation in relations:
+            relation.from_id_id = span_map[relation.from_id_id]
+            relation.to_id_id = span_map[relation.to_id_id]
+        self.clone_label_items(Relation, relations, example_map, "type")
+
+    def map_copies(self, model, pairs: List[Tuple[int, models.Model]]) -> Dict[int, int]:
+        """Map the ids of the source labels to the ids of their copies.
+
+        Databases that do not return the ids of bulk inserts are queried by the uuids of the copies.
+        """
+        if all(item.pk is not None for _, item in pairs):
+            return {source_id: item.pk for source_id, item in pairs}
+        copy_ids = dict(model.objects.filter(uuid__in=[item.uuid for _, item in pairs]).values_list("uuid", "id"))
+        return {source_id: copy_ids[item.uuid] for source_id, item in pairs}
+
+    def clone_comments(self, example_map: Dict[int, int]):
+        comments = Comment.objects.filter(example_id__in=list(example_map))
+        Comment.objects.bulk_create(
+            [
+                Comment(text=comment.text, user_id=comment.user_id, example_id=example_map[comment.example_id])
+                for comment in comments
+            ]
+        )
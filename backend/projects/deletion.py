@@ -0,0 +1,93 @@
+from typing import Callable, Iterable, List, Optional
+
+from django.db import transaction
+
+from examples.models import Assignment, Comment, Example, ExampleState
+from labels.models import (
+    BoundingBox,
+    Category,
+    ExampleLabelTally,
+    Relation,
+    Segmentation,
+    Span,
+    TextLabel,
+)
+from projects.models import ManualDiscrepancy, Project
+
+
+def version_ids(project_ids: Iterable[int]) -> List[int]:
+    """The ids of every version of the given projects, original projects included."""
+    groups = Project.objects.filter(pk__in=list(project_ids)).values("version_group")
+    return list(Project.objects.filter(version_group__in=groups).order_by("id").values_list("id", flat=True))
+
+
+class ProjectDeleter:
+    """Delete projects and all their versions in bounded batches.
+
+    The examples are deleted `batch_size` at a time, each batch bottom-up
+    (labels, then the example states, assignments, comments and
+    discrepancies, then the examples), so no statement touches more than a
+    batch worth of rows and Django's collector never loads a whole project.
+    The emptied versions are deleted last.
+
+    Args:
+        project_ids: The projects to delete, with all their versions.
+        batch_size: The number of examples deleted at once.
+        progress: If given, called with the number of deleted and total examples after each batch.
+    """
+
+    # Relations reference spans, so they go first.
+    example_models = [
+        Relation,
+        Span,
+        Category,
+        TextLabel,
+        BoundingBox,
+        Segmentation,
+        ExampleLabelTally,
+        ExampleState,
+        Assignment,
+        Comment,
+        ManualDiscrepancy,
+    ]
+
+    def __init__(
+        self,
+        project_ids: Iterable[int],
+        batch_size: int = 1000,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ):
+        self.project_ids = version_ids(project_ids)
+        self.batch_size = batch_size
+        self.progress = progress
+
+    def mark(self) -> int:
+        """Flag the projects as being deleted, which hides them from the project list."""
+        return Project.objects.filter(pk__in=self.project_ids).update(deleting=True)
+
+    def unmark(self) -> int:
+        """Show the projects again, when their deletion could not be started."""
+        return Project.objects.filter(pk__in=self.project_ids).update(deleting=False)
+
+    def delete(self):
+        examples = Example.objects.filter(project_id__in=self.project_ids)
+        total = examples.count()
+        deleted = 0
+        while batch := list(examples.order_by("id").values_list("id", flat=True)[: self.batch_size]):
+            with transaction.atomic():
+                self.delete_examples(batch)
+            deleted += len(batch)
+            if self.progress:
+                self.progress(deleted, total)
+        self.delete_projects()
+
+    def delete_examples(self, example_ids: List[int]):
+        for model in self.example_models:
+            model.objects.filter(example_id__in=example_ids).delete()
+        Example.objects.filter(id__in=example_ids).delete()
+
+    def delete_projects(self):
+        # Versions are created after their original project, so they are deleted first.
+        for project in Project.objects.filter(pk__in=self.project_ids).order_by("-id"):
+            with transaction.atomic():
+                project.delete()
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0038_discrepancycomment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='deleting',
+            field=models.BooleanField(default=False),
+        ),
+    ]
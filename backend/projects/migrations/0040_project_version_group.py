@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:10
+
+import uuid
+
+from django.db import migrations, models
+
+
+def create_version_group(apps, schema_editor):
+    Project = apps.get_model("projects", "project")
+    for project in Project.objects.filter(original_project__isnull=True):
+        group = uuid.uuid4()
+        Project.objects.filter(models.Q(id=project.id) | models.Q(original_project_id=project.id)).update(
+            version_group=group
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("projects", "0039_project_deleting"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="project",
+            name="version_group",
+            field=models.UUIDField(editable=False, blank=True, null=True),
+        ),
+        migrations.RunPython(create_version_group, reverse_code=migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="project",
+            name="version_group",
+            field=models.UUIDField(db_index=True, default=uuid.uuid4, editable=False),
+        ),
+    ]
@@ -1,14 +1,12 @@
 import abc
 import uuid
-from typing import Any, Dict, Optional
 
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Manager
 from polymorphic.models import PolymorphicModel
-from copy import copy
 
 from roles.models import Role
 
@@ -48,11 +46,39 @@ class Project(PolymorphicModel):
     perspective_associated = models.ForeignKey("PerspectiveProject",on_delete=models.SET_NULL,null=True,blank=True,related_name="projects")
 
     closed = models.BooleanField(default=False)
+    # Set while the project is being deleted in the background, see `projects.deletion`
+    deleting = models.BooleanField(default=False)
     
     # New fields for versioning
     version = models.IntegerField(default=1)
     original_project = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='versions')
     is_current_version = models.BooleanField(default=True)
+    # Shared by the original project and all its versions
+    version_group = models.UUIDField(default=uuid.uuid4, db_index=True, editable=False)
+
+    # The current version first, falling back to the latest version if none is marked as current.
+    current_version_ordering = ("-is_current_version", "-version", "-id")
+
+    @classmethod
+    def get_current_version_number(cls, project_id: int) -> int:
+        """Return the version number of the current version of a project's version group, with one query.
+
+        New labels are stamped with it, so a version created by another process applies to the next label.
+        """
+        group = Project.objects.filter(pk=project_id).values("version_group")
+        version = (
+            Project.objects.filter(version_group=models.Subquery(group))
+            .order_by(*cls.current_version_ordering)
+            .values_list("version", flat=True)
+            .first()
+        )
+        if version is None:
+            raise Project.DoesNotExist
+        return version
+
+    def get_versions(self) -> models.QuerySet:
+        """All versions of the project, the original project included."""
+        return Project.objects.filter(version_group=self.version_group)
 
     def add_admin(self):
         admin_role = Role.objects.get(name=settings.ROLE_PROJECT_ADMIN)
@@ -67,186 +93,117 @@ class Project(PolymorphicModel):
     def is_text_project(self) -> bool:
         return False
 
-    def clone(self) -> "Project":
+    def clone(self, labels=False, comments=False, chunk_size=1000, progress=None) -> "Project":
         """Clone the project.
         See https://docs.djangoproject.com/en/4.2/topics/db/queries/#copying-model-instances
 
+        The examples are copied in chunks of `chunk_size`, see `projects.cloning.ProjectCloner`.
+
+        Args:
+            labels: Whether to copy the annotations of this version too.
+            comments: Whether to copy the comments on the examples.
+            chunk_size: The number of examples copied at once.
+            progress: If given, called with the number of copied and total examples after each chunk.
+
         Returns:
             The cloned project.
         """
-        project = Project.objects.get(pk=self.pk)
-        project.pk = None
-        project.id = None
-        # Reset versioning fields
-        project.version = 1
-        project.original_project = None
-        project.is_current_version = True
-        project._state.adding = True
-        project.save()
-
-        def bulk_clone(queryset: models.QuerySet, field_initializers: Optional[Dict[Any, Any]] = None):
-            """Clone the queryset.
-
-            Args:
-                queryset: The queryset to clone.
-                field_initializers: The field initializers.
-            """
-            if field_initializers is None:
-                field_initializers = {}
-            items = []
-            for item in queryset:
-                item.id = None
-                item.pk = None
-                for field, value_or_callable in field_initializers.items():
-                    if callable(value_or_callable):
-                        value_or_callable = value_or_callable()
-                    setattr(item, field, value_or_callable)
-                item.project = project
-                item._state.adding = True
-                items.append(item)
-            queryset.model.objects.bulk_create(items)
-
-        bulk_clone(self.role_mappings.all())
-        bulk_clone(self.tags.all())
-
-        # clone examples with original_example reference
-        original_examples = list(self.examples.all())
-        cloned_examples = []
-        for original_example in original_examples:
-            # Create a proper copy
-            cloned_example = copy(original_example)
-            cloned_example.id = None
-            cloned_example.pk = None
-            cloned_example.uuid = uuid.uuid4()
-            cloned_example.project = project
-            # Set original_example to the original if not already set, otherwise keep the existing reference
-            if not original_example.original_example:
-                cloned_example.original_example = original_example
-            else:
-                cloned_example.original_example = original_example.original_example
-            cloned_example._state.adding = True
-            cloned_examples.append(cloned_example)
-        
-        # Bulk create the cloned examples
-        from examples.models import Example
-        Example.objects.bulk_create(cloned_examples)
+        from .cloning import ProjectCloner
 
-        # clone label types
-        bulk_clone(self.categorytype_set.all())
-        bulk_clone(self.spantype_set.all())
-        bulk_clone(self.relationtype_set.all())
-
-        return project
+        cloner = ProjectCloner(self, labels=labels, comments=comments, chunk_size=chunk_size, progress=progress)
+        return cloner.clone()
 
     def create_new_version(self) -> "Project":
         """Create a new version of the project.
-        
+
+        The members, tags, label types, rules and perspective values are copied
+        with one bulk insert per table, so the number of queries does not depend
+        on the size of the project.
+
         Returns:
             The new version of the project.
         """
+        from labels.models import AnnotationRevision
+
         # Get the original project (either self or the original_project)
         original = self.original_project or self
-        
-        # Create a new project instance (not using clone to avoid copying examples)
-        new_version = Project.objects.get(pk=self.pk)
-        new_version.pk = None
-        new_version.id = None
-        new_version._state.adding = True
-        
-        # Get the highest version number from all versions of the original project
-        max_version = Project.objects.filter(
-            models.Q(id=original.id) | models.Q(original_project=original)
-        ).aggregate(models.Max('version'))['version__max']
-        
-        # Set the new version number and relationships
-        new_version.version = max_version + 1 if max_version is not None else 1
-        new_version.original_project = original
-        new_version.is_current_version = True
-        new_version.closed = False
-        new_version.save()
-        
-        # Mark all other versions as not current
-        original.versions.exclude(id=new_version.id).update(is_current_version=False)
-        
-        # Copy role mappings to new version
-        for member in self.role_mappings.all():
-            Member.objects.create(
-                user=member.user,
-                project=new_version,
-                role=member.role
+
+        with transaction.atomic():
+            # Create a new project instance (not using clone to avoid copying examples)
+            new_version = Project.objects.get(pk=self.pk)
+            new_version.pk = None
+            new_version.id = None
+            new_version._state.adding = True
+
+            # Get the highest version number from all versions of the original project
+            max_version = self.get_versions().aggregate(models.Max('version'))['version__max']
+
+            # Set the new version number and relationships
+            new_version.version = max_version + 1 if max_version is not None else 1
+            new_version.original_project = original
+            new_version.is_current_version = True
+            new_version.closed = False
+            new_version.save()
+
+            # Mark all other versions, the original project included, as not current
+            self.get_versions().exclude(id=new_version.id).update(is_current_version=False)
+
+            def bulk_copy(queryset: models.QuerySet):
+                """Copy every item of the queryset to the new version with a single insert."""
+                items = []
+                for item in queryset:
+                    item.id = None
+                    item.pk = None
+                    item.project = new_version
+                    item._state.adding = True
+                    items.append(item)
+                queryset.model.objects.bulk_create(items)
+
+            Member.objects.bulk_create(
+                [
+                    Member(user_id=user_id, project=new_version, role_id=role_id)
+                    for user_id, role_id in self.role_mappings.values_list('user_id', 'role_id')
+                ]
             )
-        
-        # Copy tags to new version
-        for tag in self.tags.all():
-            Tag.objects.create(
-                text=tag.text,
-                project=new_version
+            Tag.objects.bulk_create(
+                [Tag(text=text, project=new_version) for text in self.tags.values_list('text', flat=True)]
             )
-        
-        # Copy label types to new version
-        for category_type in self.categorytype_set.all():
-            category_type.pk = None
-            category_type.id = None
-            category_type.project = new_version
-            category_type._state.adding = True
-            category_type.save()
-            
-        for span_type in self.spantype_set.all():
-            span_type.pk = None
-            span_type.id = None
-            span_type.project = new_version
-            span_type._state.adding = True
-            span_type.save()
-            
-        for relation_type in self.relationtype_set.all():
-            relation_type.pk = None
-            relation_type.id = None
-            relation_type.project = new_version
-            relation_type._state.adding = True
-            relation_type.save()
-        
-        # Copy rules to new version
-        for rule in self.rules.all():
-            Rule.objects.create(
-                project=new_version,
-                name=rule.name,
-                description=rule.description,
-                version=rule.version  # Maintain the original version of the rule
+
+            # Copy label types to new version
+            bulk_copy(self.categorytype_set.all())
+            bulk_copy(self.spantype_set.all())
+            bulk_copy(self.relationtype_set.all())
+
+            # Copy rules to new version, keeping the original version of each rule
+            Rule.objects.bulk_create(
+                [
+                    Rule(project=new_version, name=name, description=description, version=version)
+                    for name, description, version in self.rules.values_list('name', 'description', 'version')
+                ]
             )
-        
 
-        # IMPORTANT: Examples are NOT copied - they remain associated with the original project
-        # This way, all versions share the same examples with the same IDs
-        # Copy perspective members from the current project to the new version
-        if self.perspective_associated:
-            # Get all members from the current project
-            current_members = self.role_mappings.all()
-            
-            # Get all perspectives from the associated perspective project
-            perspectives = Perspective.objects.filter(perspective_project=self.perspective_associated)
-            
-            # For each member in the current project
-            for current_member in current_members:
-                # Find the corresponding member in the new version
-                new_member = new_version.role_mappings.filter(user=current_member.user).first()
-                
-                if new_member:
-                    # Copy all perspective values for this member
-                    for perspective in perspectives:
-                        # Get the current value if it exists
-                        current_value = PerspectiveMember.objects.filter(
-                            member=current_member,
-                            perspective=perspective
-                        ).first()
-                        
-                        if current_value:
-                            # Create the same value in the new version
-                            PerspectiveMember.objects.create(
-                                member=new_member,
-                                perspective=perspective,
-                                value=current_value.value
-                            )
-        
+            # IMPORTANT: Examples are NOT copied - they remain associated with the original project
+            # This way, all versions share the same examples with the same IDs
+            # Copy the perspective values of the members to their counterpart in the new version
+            if self.perspective_associated_id:
+                new_members = dict(new_version.role_mappings.values_list('user_id', 'id'))
+                values = {}
+                perspective_values = PerspectiveMember.objects.filter(
+                    member__project=self,
+                    perspective__perspective_project_id=self.perspective_associated_id,
+                ).order_by('id').values_list('member__user_id', 'perspective_id', 'value')
+                for user_id, perspective_id, value in perspective_values:
+                    if user_id in new_members:
+                        values.setdefault((new_members[user_id], perspective_id), value)
+                PerspectiveMember.objects.bulk_create(
+                    [
+                        PerspectiveMember(member_id=member_id, perspective_id=perspective_id, value=value)
+                        for (member_id, perspective_id), value in values.items()
+                    ]
+                )
+
+            AnnotationRevision.objects.bump_projects([original.id])
+
         return new_version
 
     def __str__(self):
@@ -478,7 +435,14 @@ class PerspectiveMember(models.Model):
     value = models.CharField(max_length=255)
 
     def __str__(self):
-        return f"{self.member.user.username} → {self.perspective.name}: {self.value}"\
+        return f"{self.member.user.username} → {self.perspective.name}: {self.value}"
+
+    def save(self, *args, **kwargs):
+        from labels.models import AnnotationRevision
+
+        super().save(*args, **kwargs)
+        AnnotationRevision.objects.bump_projects([self.member.project_id])
+
 
 class ManualDiscrepancy(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="manual_discrepancies")
@@ -489,6 +453,19 @@ class ManualDiscrepancy(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    def save(self, *args, **kwargs):
+        from labels.models import AnnotationRevision
+
+        super().save(*args, **kwargs)
+        AnnotationRevision.objects.bump_projects([self.project_id])
+
+    def delete(self, *args, **kwargs):
+        from labels.models import AnnotationRevision
+
+        deleted = super().delete(*args, **kwargs)
+        AnnotationRevision.objects.bump_projects([self.project_id])
+        return deleted
+
 class DiscrepancyLabelStat(models.Model):
     discrepancy = models.ForeignKey(ManualDiscrepancy, on_delete=models.CASCADE, related_name="label_stats")
     label_text = models.CharField(max_length=255)
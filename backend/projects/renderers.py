@@ -0,0 +1,18 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Render a list of objects as newline-delimited JSON, one object per line."""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if isinstance(data, dict):
+            data = [data]
+        return "".join(json.dumps(item, default=str) + "\n" for item in data).encode(self.charset)
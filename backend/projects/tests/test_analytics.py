@@ -0,0 +1,534 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from model_mommy import mommy
+from rest_framework import status
+from rest_framework.reverse import reverse
+
+from api.tests.utils import CRUDMixin
+from label_types.models import CategoryType
+from projects.analytics.matrix import CategoryMatrix, CategoryMatrixCache
+from projects.analytics.tally import LabelTally
+from projects.analytics.thresholds import ThresholdProfile
+from projects.celery_tasks import compute_statistics, statistics_dir
+from projects.models import Member, ProjectType
+from projects.tests.utils import prepare_project
+from projects.views.project import AnnotationsByUserView
+from users.tests.utils import make_user
+
+
+def annotate(example, label_type, users):
+    for user in users:
+        mommy.make("Category", example=example, label=label_type, user=user)
+
+
+class TestLabelTally(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        cls.positive = mommy.make("CategoryType", project=cls.project.item, text="positive")
+        cls.negative = mommy.make("CategoryType", project=cls.project.item, text="negative")
+        cls.agreed = mommy.make("Example", project=cls.project.item)
+        cls.disputed = mommy.make("Example", project=cls.project.item)
+        cls.unlabeled = mommy.make("Example", project=cls.project.item)
+        annotate(cls.agreed, cls.positive, cls.project.members)
+        annotate(cls.disputed, cls.positive, cls.project.members[:1])
+        annotate(cls.disputed, cls.negative, cls.project.members[1:])
+
+    def build(self, **kwargs):
+        return LabelTally.build(self.project.item.id, self.project.item.version, **kwargs)
+
+    def test_count_labels_per_example(self):
+        tally = self.build()
+        self.assertEqual(len(tally), 2)
+        self.assertNotIn(self.unlabeled.id, tally)
+        self.assertEqual(tally[self.agreed.id].total, 3)
+        self.assertEqual(tally[self.agreed.id].percentages, {"positive": 100})
+        self.assertAlmostEqual(tally[self.disputed.id].max_percentage, 200 / 3)
+
+    def test_find_discrepancies(self):
+        tally = self.build()
+        self.assertEqual(tally.discrepancies(threshold=70), {self.disputed.id})
+        self.assertEqual(tally.discrepancies(threshold=50), set())
+
+    def test_filter_by_user(self):
+        tally = self.build(user_ids=[self.project.admin.id])
+        self.assertEqual(tally[self.disputed.id].percentages, {"positive": 100})
+
+    def test_filter_by_example(self):
+        tally = self.build(example_ids=[self.agreed.id])
+        self.assertEqual(tally.example_ids, [self.agreed.id])
+
+    def test_ignore_other_versions(self):
+        tally = LabelTally.build(self.project.item.id, self.project.item.version + 1)
+        self.assertEqual(len(tally), 0)
+
+    def test_count_with_single_query(self):
+        with self.assertNumQueries(1):
+            self.build()
+
+
+class TestCategoryMatrix(TestCase):
+    def setUp(self):
+        # (example_id, user_id, label_id), the second user gave two labels to example 10.
+        self.matrix = CategoryMatrix.from_rows([(10, 1, 7), (10, 2, 7), (10, 2, 8), (20, 2, 8)])
+
+    def test_store_annotations_as_csr(self):
+        np.testing.assert_array_equal(self.matrix.example_ids, [10, 20])
+        np.testing.assert_array_equal(self.matrix.indptr, [0, 3, 4])
+        np.testing.assert_array_equal(self.matrix.annotators, [0, 1, 1, 1])
+        np.testing.assert_array_equal(self.matrix.labels, [0, 0, 1, 1])
+        self.assertEqual(self.matrix.annotators.dtype, np.int32)
+
+    def test_count_labels(self):
+        np.testing.assert_array_equal(self.matrix.label_counts(), [[2, 1], [0, 1]])
+        mask = self.matrix.user_mask([1])
+        np.testing.assert_array_equal(self.matrix.label_counts(mask), [[1, 0], [0, 0]])
+
+    def test_dense_and_first_annotators(self):
+        np.testing.assert_array_equal(self.matrix.dense(), [[0, 1], [-1, 1]])
+        self.assertEqual(self.matrix.first_annotators(), {10: 1, 20: 2})
+
+    def test_empty(self):
+        matrix = CategoryMatrix.from_rows(np.empty((0, 3)))
+        self.assertEqual(len(matrix), 0)
+        self.assertEqual(matrix.label_counts().shape, (0, 0))
+        self.assertEqual(matrix.first_annotators(), {})
+
+
+class TestCategoryMatrixCache(TestCase):
+    def setUp(self):
+        self.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION)
+        self.label_type = mommy.make("CategoryType", project=self.project.item)
+        self.example = mommy.make("Example", project=self.project.item)
+        self.cache = CategoryMatrixCache()
+
+    def get(self):
+        return self.cache.get(self.project.item.id, self.project.item.version)
+
+    def test_reuse_matrix_until_categories_change(self):
+        annotate(self.example, self.label_type, self.project.members[:1])
+        matrix = self.get()
+        with self.assertNumQueries(1):
+            self.assertIs(self.get(), matrix)
+        annotate(self.example, self.label_type, self.project.members[1:])
+        self.assertEqual(len(self.get()), 3)
+
+    def test_reload_after_bulk_deletion(self):
+        annotate(self.example, self.label_type, self.project.members)
+        self.assertEqual(len(self.get()), 3)
+        self.example.categories.all().delete()
+        self.assertEqual(len(self.get()), 0)
+
+    def test_tally_from_matrix(self):
+        annotate(self.example, self.label_type, self.project.members)
+        tally = LabelTally.from_matrix(self.get())
+        self.assertEqual(tally[self.example.id].total, 3)
+        self.assertEqual(tally[self.example.id].percentages, {self.label_type.text: 100})
+
+    def test_reload_after_label_type_deletion(self):
+        annotate(self.example, self.label_type, self.project.members)
+        self.assertEqual(len(self.get()), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            CategoryType.objects.filter(pk=self.label_type.pk).delete()
+        self.assertEqual(len(self.get()), 0)
+
+    def test_reload_after_user_deletion(self):
+        annotate(self.example, self.label_type, self.project.members)
+        self.assertEqual(len(self.get()), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.annotator.delete()
+        self.assertEqual(len(self.get()), 2)
+
+    def test_tally_skips_deleted_label_types(self):
+        annotate(self.example, self.label_type, self.project.members)
+        matrix = self.get()
+        CategoryType.objects.filter(pk=self.label_type.pk).delete()
+        self.assertEqual(len(LabelTally.from_matrix(matrix)), 0)
+
+
+class TestThresholdProfile(TestCase):
+    def setUp(self):
+        # Shares of the most voted label: 100% for example 10, 50% for 20, 75% for 30.
+        matrix = CategoryMatrix.from_rows(
+            [(10, 1, 7), (20, 1, 7), (20, 2, 8), (30, 1, 7), (30, 2, 7), (30, 3, 7), (30, 4, 8)]
+        )
+        self.profile = ThresholdProfile.from_matrix(matrix)
+
+    def test_sort_shares(self):
+        np.testing.assert_array_equal(self.profile.shares, [50, 75, 100])
+        np.testing.assert_array_equal(self.profile.example_ids, [20, 30, 10])
+
+    def test_flag_examples_below_threshold(self):
+        self.assertEqual(self.profile.count_flagged(75), 1)
+        self.assertEqual(self.profile.count_flagged(75.1), 2)
+        self.assertEqual(self.profile.flagged(80), [{"id": 20, "max_percentage": 50}, {"id": 30, "max_percentage": 75}])
+
+    def test_histogram(self):
+        histogram = self.profile.histogram(bins=4)
+        self.assertEqual(histogram["edges"], [0, 25, 50, 75, 100])
+        self.assertEqual(histogram["counts"], [0, 0, 1, 2])
+        self.assertEqual(histogram["flagged"], [0, 0, 0, 1, 2])
+
+
+class AnalyticsViewTestCase(CRUDMixin):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = prepare_project(ProjectType.DOCUMENT_CLASSIFICATION, discrepancy_percentage=70)
+        positive = mommy.make("CategoryType", project=cls.project.item, text="positive")
+        negative = mommy.make("CategoryType", project=cls.project.item, text="negative")
+        cls.agreed = mommy.make("Example", project=cls.project.item)
+        cls.disputed = mommy.make("Example", project=cls.project.item)
+        annotate(cls.agreed, positive, cls.project.members)
+        annotate(cls.disputed, positive, cls.project.members[:1])
+        annotate(cls.disputed, negative, cls.project.members[1:])
+
+
+class TestDiscrepancyAnalysis(AnalyticsViewTestCase):
+    def setUp(self):
+        self.url = reverse(viewname="discrepancy-analysis", args=[self.project.item.id])
+
+    def test_list_discrepancies(self):
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        discrepancies = response.data["discrepancies"]
+        self.assertEqual(len(discrepancies), 1)
+        self.assertEqual(discrepancies[0]["id"], self.disputed.id)
+        self.assertEqual(discrepancies[0]["status"], "Not Reported")
+
+    def test_mark_reported_discrepancies(self):
+        mommy.make("ManualDiscrepancy", project=self.project.item, example=self.disputed)
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual(response.data["discrepancies"][0]["status"], "Reported")
+
+
+class TestBatchLabelStats(AnalyticsViewTestCase):
+    def setUp(self):
+        self.url = reverse(viewname="batch_label_stats", args=[self.project.item.id])
+
+    def test_fetch_stats_by_ids(self):
+        unlabeled = mommy.make("Example", project=self.project.item)
+        self.url += f"?ids={self.disputed.id},{unlabeled.id}"
+        self.client.force_login(self.project.admin)
+        with self.assertNumQueries(5):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data[unlabeled.id], {})
+        stats = response.data[self.disputed.id]
+        self.assertEqual(stats["negative"]["count"], 2)
+        self.assertAlmostEqual(stats["positive"]["percentage"], 100 / 3)
+
+    def test_fetch_stats_by_range(self):
+        self.url += f"?start={self.agreed.id}&end={self.disputed.id}"
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {self.agreed.id, self.disputed.id})
+        self.assertEqual(response.data[self.agreed.id]["positive"], {"count": 3, "percentage": 100})
+
+    def test_require_ids_or_range(self):
+        self.assert_fetch(self.project.admin, status.HTTP_400_BAD_REQUEST)
+
+    def test_limit_number_of_examples(self):
+        self.url += "?start=1&end=100000"
+        self.assert_fetch(self.project.admin, status.HTTP_400_BAD_REQUEST)
+
+
+class TestAnalyticsSnapshots(AnalyticsViewTestCase):
+    def setUp(self):
+        self.url = reverse(viewname="discrepancy-analysis", args=[self.project.item.id])
+        self.client.force_login(self.project.admin)
+
+    def test_not_modified_with_current_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_serve_cached_snapshot(self):
+        self.client.get(self.url)
+        # Session, user, project (with its polymorphic child) and annotation revision.
+        with self.assertNumQueries(5):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data["discrepancies"]), 1)
+
+    def test_invalidate_on_label_type_rename(self):
+        etag = self.client.get(self.url)["ETag"]
+        label_type = CategoryType.objects.get(project=self.project.item, text="negative")
+        label_type.text = "contrary"
+        with self.captureOnCommitCallbacks(execute=True):
+            label_type.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_etag_follows_data(self):
+        etag = self.client.get(self.url)["ETag"]
+        # A write that skips the revision is picked up once the snapshot expires.
+        CategoryType.objects.filter(project=self.project.item, text="negative").delete()
+        cache.clear()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_invalidate_on_annotation(self):
+        etag = self.client.get(self.url)["ETag"]
+        positive = self.disputed.categories.filter(user=self.project.admin).get().label
+        self.disputed.categories.filter(label__text="negative").delete()
+        annotate(self.disputed, positive, self.project.members[1:])
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["discrepancies"], [])
+
+    def test_invalidate_on_manual_discrepancy(self):
+        self.client.get(self.url)
+        mommy.make("ManualDiscrepancy", project=self.project.item, example=self.disputed)
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["discrepancies"][0]["status"], "Reported")
+
+    def test_invalidate_on_perspective_value(self):
+        url = reverse(viewname="get_all_filled_values", args=[self.project.item.id])
+        self.assertEqual(self.client.get(url).data, {})
+        perspective = mommy.make("Perspective")
+        member = self.project.admin.role_mappings.get(project=self.project.item)
+        value = mommy.make("PerspectiveMember", member=member, perspective=perspective, value="a")
+        self.assertEqual(self.client.get(url).data, {perspective.id: ["a"]})
+        with self.captureOnCommitCallbacks(execute=True):
+            value.delete()
+        self.assertEqual(self.client.get(url).data, {})
+
+    def test_invalidate_on_member_delete(self):
+        url = reverse(viewname="get_all_filled_values", args=[self.project.item.id])
+        perspective = mommy.make("Perspective")
+        member = self.project.annotator.role_mappings.get(project=self.project.item)
+        mommy.make("PerspectiveMember", member=member, perspective=perspective, value="a")
+        etag = self.client.get(url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            Member.objects.filter(pk=member.pk).delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {})
+
+    def test_invalidate_on_perspective_delete(self):
+        url = reverse(viewname="get_all_filled_values", args=[self.project.item.id])
+        perspective = mommy.make("Perspective")
+        member = self.project.admin.role_mappings.get(project=self.project.item)
+        mommy.make("PerspectiveMember", member=member, perspective=perspective, value="a")
+        self.assertEqual(self.client.get(url).data, {perspective.id: ["a"]})
+        with self.captureOnCommitCallbacks(execute=True):
+            perspective.delete()
+        self.assertEqual(self.client.get(url).data, {})
+
+
+class TestDiscrepancyThresholds(AnalyticsViewTestCase):
+    def setUp(self):
+        self.url = reverse(viewname="discrepancy-thresholds", args=[self.project.item.id])
+
+    def test_fetch_histogram(self):
+        self.url += "?bins=10"
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual(response.data["total"], 2)
+        self.assertEqual(response.data["current_threshold"], 70)
+        self.assertEqual(sum(response.data["histogram"]["counts"]), 2)
+
+    def test_list_discrepancies_at_threshold(self):
+        self.url += "?threshold=70"
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual([item["id"] for item in response.data["discrepancies"]], [self.disputed.id])
+        self.assertAlmostEqual(response.data["discrepancies"][0]["max_percentage"], 200 / 3)
+
+    def test_reject_invalid_bins(self):
+        self.url += "?bins=0"
+        self.assert_fetch(self.project.admin, status.HTTP_400_BAD_REQUEST)
+
+
+class TestAnnotationStatistics(AnalyticsViewTestCase):
+    def test_fetch_statistics(self):
+        self.url = reverse(viewname="annotation-statistics", args=[self.project.item.id])
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        annotations = {item["example_id"]: item for item in response.data["annotations"]}
+        self.assertEqual(len(annotations[self.agreed.id]["users"]), 3)
+        self.assertFalse(annotations[self.agreed.id]["discrepancy"])
+        self.assertTrue(annotations[self.disputed.id]["discrepancy"])
+        self.assertEqual(annotations[self.disputed.id]["discrepancy_status"], "Not Reported")
+
+    def test_fetch_label_table(self):
+        self.url = reverse(viewname="annotation-label-table", args=[self.project.item.id])
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual(response.data["labels"], ["negative", "positive"])
+        rows = {row["id"]: row for row in response.data["rows"]}
+        self.assertEqual(rows[self.disputed.id]["labels"], {"negative": 2, "positive": 1})
+        self.assertTrue(rows[self.disputed.id]["discrepancy"])
+
+    def test_fetch_all_versions_statistics(self):
+        self.url = reverse(viewname="all-versions-statistics", args=[self.project.item.id])
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        versions = response.data["versions"]
+        self.assertEqual(len(versions), 1)
+        self.assertEqual(len(versions[0]["annotations"]), 2)
+
+    def test_fetch_statistics_of_several_versions(self):
+        new_version = self.project.item.create_new_version()
+        url = reverse(viewname="all-versions-statistics", args=[new_version.id])
+        self.client.force_login(self.project.admin)
+        with self.assertNumQueries(11):
+            response = self.client.get(url, {"version_ids": [self.project.item.id, new_version.id]})
+        versions = response.data["versions"]
+        self.assertEqual([version["version_number"] for version in versions], [self.project.item.version])
+        self.assertFalse(versions[0]["is_current_version"])
+
+
+class TestStatisticsTask(AnalyticsViewTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.media_root)
+
+    @patch("projects.celery_tasks.compute_statistics.update_state")
+    def test_store_statistics(self, update_state):
+        with self.settings(MEDIA_ROOT=self.media_root):
+            filepath = compute_statistics.apply(
+                kwargs={
+                    "project_id": self.project.item.id,
+                    "statistics": "annotation-statistics",
+                    "query_params": {"exampleId": [str(self.disputed.id)]},
+                }
+            ).get()
+        with open(filepath, encoding="utf-8") as f:
+            annotations = json.load(f)["annotations"]
+        self.assertEqual([item["example_id"] for item in annotations], [self.disputed.id])
+        update_state.assert_called_with(state="PROGRESS", meta={"current": 1, "total": 1})
+
+    @patch("projects.views.statistics.compute_statistics.delay", return_value=MagicMock(task_id="1"))
+    def test_enqueue_task(self, delay):
+        self.url = reverse(viewname="all-versions-statistics-task", args=[self.project.item.id])
+        self.url += "?version_ids=1&version_ids=2"
+        response = self.assert_create(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"task_id": "1"})
+        delay.assert_called_once_with(
+            project_id=self.project.item.id,
+            statistics="all-versions-statistics",
+            query_params={"version_ids": ["1", "2"]},
+        )
+
+
+class TestStatisticsDownload(AnalyticsViewTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.url = reverse(viewname="annotation-statistics-task", args=[self.project.item.id])
+
+    def tearDown(self):
+        shutil.rmtree(self.media_root)
+
+    def write_statistics(self, project_id):
+        with self.settings(MEDIA_ROOT=self.media_root):
+            directory = statistics_dir(project_id)
+        os.makedirs(directory, exist_ok=True)
+        filepath = os.path.join(directory, "statistics.json")
+        with open(filepath, "w", encoding="utf-8") as f:
+            json.dump({"annotations": []}, f)
+        return filepath
+
+    def fetch(self, result, successful=True, user=None):
+        task = MagicMock(result=result, **{"ready.return_value": True, "successful.return_value": successful})
+        self.client.force_login(user or self.project.admin)
+        with self.settings(MEDIA_ROOT=self.media_root):
+            with patch("projects.views.statistics.AsyncResult", return_value=task):
+                return self.client.get(self.url, {"taskId": "1"})
+
+    def test_download_statistics(self):
+        response = self.fetch(self.write_statistics(self.project.item.id))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(b"".join(response.streaming_content)), {"annotations": []})
+
+    def test_require_task_id(self):
+        self.assert_fetch(self.project.admin, status.HTTP_400_BAD_REQUEST)
+
+    def test_reject_failed_task(self):
+        response = self.fetch(ValueError("failed"), successful=False)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_deny_files_of_other_projects(self):
+        response = self.fetch(self.write_statistics(self.project.item.id + 1))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_deny_non_member(self):
+        response = self.fetch(self.write_statistics(self.project.item.id), user=make_user())
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class TestAnnotationsByUser(AnalyticsViewTestCase):
+    def setUp(self):
+        self.url = reverse(viewname="annotations-by-user", args=[self.project.item.id])
+
+    def test_pivot_labels_by_user(self):
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        usernames = sorted(member.username for member in self.project.members)
+        self.assertEqual(response.data["users"], usernames)
+        rows = {row["id"]: row for row in response.data["items"]}
+        self.assertEqual(rows[self.disputed.id][self.project.admin.username], "positive")
+        self.assertEqual(rows[self.disputed.id][self.project.annotator.username], "negative")
+        self.assertIsNone(response.data["next"])
+
+    def test_paginate_by_cursor(self):
+        self.url += "?limit=1"
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual([row["id"] for row in response.data["items"]], [self.agreed.id])
+        self.url += f"&cursor={response.data['next']}"
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual([row["id"] for row in response.data["items"]], [self.disputed.id])
+        self.assertIsNone(response.data["next"])
+
+    @patch.object(AnnotationsByUserView, "default_limit", 1)
+    def test_paginate_by_default(self):
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual([row["id"] for row in response.data["items"]], [self.agreed.id])
+        self.assertEqual(response.data["next"], self.agreed.id)
+
+    def test_cache_annotators(self):
+        cache.clear()
+        self.client.force_login(self.project.admin)
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url)
+        self.assertFalse([query for query in context.captured_queries if "DISTINCT" in query["sql"]])
+        self.assertEqual(len(response.data["users"]), len(self.project.members))
+
+
+class TestAnnotatorReport(AnalyticsViewTestCase):
+    def setUp(self):
+        self.url = reverse(viewname="annotator_report", args=[self.project.item.id])
+
+    def test_fetch_report(self):
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["annotations"]), 6)
+        self.assertEqual(response.data["annotations"][0]["type"], ProjectType.DOCUMENT_CLASSIFICATION)
+        self.assertEqual({e["id"] for e in response.data["unique_examples"]}, {self.agreed.id, self.disputed.id})
+        self.assertEqual(response.data["project_versions"], [self.project.item.version])
+
+    def test_paginate_report(self):
+        base_url = self.url
+        self.url = f"{base_url}?limit=4"
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        first_page = [row["id"] for row in response.data["annotations"]]
+        self.assertEqual(len(first_page), 4)
+        self.url = f"{base_url}?limit=4&cursor={response.data['next']}"
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        second_page = [row["id"] for row in response.data["annotations"]]
+        self.assertEqual(len(second_page), 2)
+        self.assertIsNone(response.data["next"])
+        self.assertEqual(first_page + second_page, sorted(first_page + second_page, reverse=True))
+
+    def test_stream_report_as_ndjson(self):
+        self.client.force_login(self.project.admin)
+        response = self.client.get(self.url, {"format": "ndjson"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertEqual(json.loads(lines[0])["type"], ProjectType.DOCUMENT_CLASSIFICATION)
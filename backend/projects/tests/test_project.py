@@ -1,13 +1,22 @@
+from unittest.mock import MagicMock, patch
+
 from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from model_mommy import mommy
 from rest_framework import status
 from rest_framework.reverse import reverse
 
 from api.tests.utils import CRUDMixin
+from examples.models import Comment, Example
 from examples.tests.utils import make_doc
 from label_types.tests.utils import make_label
-from projects.models import Member, Project, ProjectType
-from projects.tests.utils import prepare_project
+from labels.models import Relation, Span
+from projects.deletion import ProjectDeleter
+from projects.models import Member, PerspectiveMember, Project, ProjectType
+from projects.tests.utils import make_project, prepare_project
 from roles.tests.utils import create_default_roles
 from users.tests.utils import make_user
 
@@ -140,6 +149,147 @@ class TestProjectModel(TestCase):
         self.assertEqual(project.role_mappings.count(), self.project.role_mappings.count())
 
 
+class TestProjectBulkDelete(CRUDMixin):
+    def setUp(self):
+        self.project = prepare_project()
+        self.version = self.project.item.create_new_version()
+        self.other_project = make_project(task="Any", users=["other"], roles=[settings.ROLE_PROJECT_ADMIN])
+        self.url = reverse(viewname="project_list")
+        self.data = {"ids": [self.project.item.id, self.other_project.item.id]}
+
+    @patch("projects.celery_tasks.delete_projects.apply_async")
+    def test_hide_projects_and_enqueue_deletion(self, apply_async):
+        self.client.force_login(self.project.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(self.url, data=self.data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        apply_async.assert_called_once_with(
+            kwargs={"project_ids": [self.project.item.id, self.version.id]}, task_id=response.data["task_id"]
+        )
+        self.assertFalse(Project.objects.get(pk=self.other_project.item.id).deleting)
+        response = self.assert_fetch(self.project.admin, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 0)
+
+    @patch("projects.celery_tasks.delete_projects.apply_async", side_effect=OSError)
+    def test_show_projects_if_the_deletion_cannot_be_enqueued(self, apply_async):
+        self.client.force_login(self.project.admin)
+        with self.assertRaises(OSError), self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(self.url, data=self.data, format="json")
+        self.assertFalse(Project.objects.filter(deleting=True).exists())
+
+
+class TestProjectDeleter(TestCase):
+    def setUp(self):
+        self.project = prepare_project(task=ProjectType.SEQUENCE_LABELING)
+        self.user = self.project.admin
+        self.version = self.project.item.create_new_version()
+        span_type = mommy.make("SpanType", project=self.project.item)
+        relation_type = mommy.make("RelationType", project=self.project.item)
+        for _ in range(3):
+            example = make_doc(self.project.item)
+            spans = [
+                mommy.make("Span", example=example, user=self.user, label=span_type, start_offset=0, end_offset=1),
+                mommy.make("Span", example=example, user=self.user, label=span_type, start_offset=2, end_offset=3),
+            ]
+            mommy.make(
+                "Relation", example=example, user=self.user, type=relation_type, from_id=spans[0], to_id=spans[1]
+            )
+            mommy.make("Comment", example=example, user=self.user)
+            mommy.make("ExampleState", example=example, confirmed_by=self.user)
+        self.other_project = prepare_project()
+        self.other_example = make_doc(self.other_project.item)
+
+    def test_delete_every_version_in_batches(self):
+        progress = []
+        deleter = ProjectDeleter(
+            [self.version.id], batch_size=2, progress=lambda current, total: progress.append(current)
+        )
+        self.assertEqual(deleter.project_ids, [self.project.item.id, self.version.id])
+        deleter.delete()
+        self.assertEqual(progress, [2, 3])
+        self.assertFalse(Project.objects.filter(pk__in=deleter.project_ids).exists())
+        self.assertFalse(Span.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(list(Example.objects.all()), [self.other_example])
+
+    def test_mark_projects(self):
+        deleter = ProjectDeleter([self.project.item.id])
+        self.assertEqual(deleter.mark(), 2)
+        self.assertEqual(Project.objects.filter(deleting=True).count(), 2)
+
+
+class TestVersionGroup(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.project = prepare_project().item
+
+    def test_versions_share_the_group(self):
+        version = self.project.create_new_version()
+        clone = self.project.clone()
+        self.assertEqual(version.version_group, self.project.version_group)
+        self.assertNotEqual(clone.version_group, self.project.version_group)
+        self.assertEqual(set(version.get_versions()), {self.project, version})
+
+    def test_current_version(self):
+        self.assertEqual(Project.get_current_version_number(self.project.id), 1)
+        version = self.project.create_new_version()
+        self.assertEqual(Project.get_current_version_number(self.project.id), version.version)
+        self.assertEqual(Project.get_current_version_number(version.id), version.version)
+        self.assertFalse(Project.objects.get(pk=self.project.pk).is_current_version)
+
+    def test_current_version_is_not_cached(self):
+        self.assertEqual(Project.get_current_version_number(self.project.id), 1)
+        # Another process marks a new version as current without going through this one.
+        version = self.project.create_new_version()
+        Project.objects.filter(pk=version.pk).update(is_current_version=False)
+        Project.objects.filter(pk=self.project.pk).update(is_current_version=True)
+        self.assertEqual(Project.get_current_version_number(version.id), 1)
+
+
+class TestCreateNewVersion(TestCase):
+    def setUp(self):
+        self.project = prepare_project(task=ProjectType.DOCUMENT_CLASSIFICATION)
+        self.perspective = mommy.make("Perspective", perspective_project=mommy.make("PerspectiveProject"))
+        self.project.item.perspective_associated = self.perspective.perspective_project
+        self.project.item.save()
+        make_label(self.project.item, text="positive")
+        mommy.make("Tag", project=self.project.item, text="tag")
+        mommy.make("Rule", project=self.project.item, name="rule", description="description", version=3)
+        member = self.project.admin.role_mappings.get()
+        PerspectiveMember.objects.create(member=member, perspective=self.perspective, value="a")
+
+    def add_members_and_labels(self, count):
+        role = Member.objects.first().role
+        for i in range(count):
+            user = make_user(f"user{i}")
+            member = Member.objects.create(user=user, project=self.project.item, role=role)
+            PerspectiveMember.objects.create(member=member, perspective=self.perspective, value=str(i))
+            make_label(self.project.item, text=f"label{i}")
+
+    def count_queries(self):
+        project = Project.objects.get(pk=self.project.item.pk)
+        with CaptureQueriesContext(connection) as context:
+            project.create_new_version()
+        return len(context)
+
+    def test_copy_project(self):
+        new_version = self.project.item.create_new_version()
+        self.assertEqual(new_version.version, 2)
+        self.assertEqual(new_version.original_project_id, self.project.item.id)
+        self.assertEqual(new_version.role_mappings.count(), 3)
+        self.assertEqual(list(new_version.tags.values_list("text", flat=True)), ["tag"])
+        self.assertEqual(list(new_version.categorytype_set.values_list("text", flat=True)), ["positive"])
+        self.assertEqual(list(new_version.rules.values_list("name", "version")), [("rule", 3)])
+        value = PerspectiveMember.objects.get(member__project=new_version)
+        self.assertEqual((value.member.user, value.value), (self.project.admin, "a"))
+
+    def test_query_count_does_not_depend_on_project_size(self):
+        expected = self.count_queries()
+        self.add_members_and_labels(10)
+        self.assertEqual(self.count_queries(), expected)
+        self.assertLessEqual(expected, 25)
+
+
 class TestCloneProject(CRUDMixin):
     @classmethod
     def setUpTestData(cls):
@@ -167,3 +317,66 @@ class TestCloneProject(CRUDMixin):
         example = self.project.examples.first()
         cloned_example = project.examples.first()
         self.assertEqual(example.text, cloned_example.text)
+
+
+class TestCloneProjectWithLabels(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = prepare_project(task=ProjectType.SEQUENCE_LABELING)
+        cls.user = cls.project.admin
+        cls.examples = [make_doc(cls.project.item) for _ in range(3)]
+        span_type = mommy.make("SpanType", project=cls.project.item)
+        relation_type = mommy.make("RelationType", project=cls.project.item)
+        example = cls.examples[0]
+        cls.spans = [
+            mommy.make("Span", example=example, user=cls.user, label=span_type, start_offset=0, end_offset=1),
+            mommy.make("Span", example=example, user=cls.user, label=span_type, start_offset=2, end_offset=3),
+        ]
+        mommy.make(
+            "Relation", example=example, user=cls.user, type=relation_type, from_id=cls.spans[0], to_id=cls.spans[1]
+        )
+        mommy.make("Comment", example=example, user=cls.user, text="check this")
+
+    def test_clone_without_labels(self):
+        project = self.project.item.clone()
+        self.assertEqual(project.examples.count(), 3)
+        self.assertFalse(Span.objects.filter(example__project=project).exists())
+        self.assertFalse(Comment.objects.filter(example__project=project).exists())
+
+    def test_clone_with_labels_and_comments(self):
+        project = self.project.item.clone(labels=True, comments=True)
+        spans = Span.objects.filter(example__project=project)
+        self.assertEqual(spans.count(), 2)
+        self.assertEqual({span.label.project_id for span in spans}, {project.id})
+        relation = Relation.objects.get(example__project=project)
+        self.assertEqual({relation.from_id_id, relation.to_id_id}, {span.id for span in spans})
+        self.assertEqual(relation.type.project_id, project.id)
+        self.assertEqual(Comment.objects.get(example__project=project).text, "check this")
+
+    def test_clone_in_chunks(self):
+        progress = []
+        project = self.project.item.clone(chunk_size=2, progress=lambda current, total: progress.append(current))
+        self.assertEqual(progress, [2, 3])
+        self.assertEqual(
+            list(project.examples.order_by("id").values_list("text", flat=True)),
+            [example.text for example in self.examples],
+        )
+
+    @patch("projects.celery_tasks.clone_project.delay", return_value=MagicMock(task_id="1"))
+    def test_clone_in_background(self, delay):
+        self.client.force_login(self.user)
+        url = reverse(viewname="clone_project", args=[self.project.item.id])
+        response = self.client.post(url, {"labels": True, "async": True}, format="json")
+        self.assertEqual(response.data, {"task_id": "1"})
+        delay.assert_called_once_with(project_id=self.project.item.id, labels=True, comments=False)
+
+    @patch("projects.celery_tasks.clone_project.delay", return_value=MagicMock(task_id="1"))
+    def test_parse_form_flags(self, delay):
+        self.client.force_login(self.user)
+        url = reverse(viewname="clone_project", args=[self.project.item.id])
+        response = self.client.post(url, {"labels": "false", "comments": "false", "async": "false"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        delay.assert_not_called()
+        self.assertFalse(Span.objects.filter(example__project_id=response.data["id"]).exists())
+        response = self.client.post(url, {"labels": "maybe"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -7,9 +7,11 @@ from .views.project import (
     FillPerspectives, 
     GetFilledPerspectives,
     LabelStatsView, 
+    BatchLabelStatsView,
     ProjectDetail, 
     ProjectList,
     DiscrepancyAnalysisView, 
+    DiscrepancyThresholdView,
     AllPerspectivesView,
     GetAllFilledValues,
     GetUsersWithValue,
@@ -34,6 +36,7 @@ from .views.project import (
     DiscrepancyCommentListCreate,
 )
 
+from .views.statistics import AllVersionsStatisticsTaskAPI, AnnotationStatisticsTaskAPI
 from .views.tag import TagDetail, TagList
 
 from .views.discussion import (
@@ -69,12 +72,16 @@ urlpatterns = [
     path(route="projects/<int:project_id>/reports/annotators", view=AnnotatorReportView.as_view(), name="annotator_report"),
     path(route="projects/<int:project_id>/annotation-statistics", view=AnnotationStatisticsView.as_view(), name='annotation-statistics'),
     path(route="projects/<int:project_id>/all-versions-statistics", view=AllVersionsStatisticsView.as_view(), name='all-versions-statistics'),
+    path(route="projects/<int:project_id>/annotation-statistics/tasks", view=AnnotationStatisticsTaskAPI.as_view(), name='annotation-statistics-task'),
+    path(route="projects/<int:project_id>/all-versions-statistics/tasks", view=AllVersionsStatisticsTaskAPI.as_view(), name='all-versions-statistics-task'),
     path('projects/<int:project_id>/annotation-label-table/', AnnotationLabelTableView.as_view(), name='annotation-label-table'),
     ## Discrepancy
     path(route="projects/<int:project_id>/discrepancies", view=DiscrepancyAnalysisView.as_view(), name='discrepancy-analysis'),
+    path(route="projects/<int:project_id>/discrepancies/thresholds", view=DiscrepancyThresholdView.as_view(), name='discrepancy-thresholds'),
     path(route="projects/<int:project_id>/annotations-by-user", view=AnnotationsByUserView.as_view(), name='annotations-by-user'),
     path(route="projects/<int:project_id>/discrepancies/create", view=ManualDiscrepancyListCreate.as_view(), name='manual-discrepancy-create'),
     path(route="projects/<int:project_id>/examples/<int:example_id>/label-stats", view=LabelStatsView.as_view(), name="label_stats"),
+    path(route="projects/<int:project_id>/examples/label-stats", view=BatchLabelStatsView.as_view(), name="batch_label_stats"),
     path(route="projects/<int:project_id>/manual-discrepancies", view=ManualDiscrepancyListCreate.as_view(), name='manual-discrepancy-list'),
     path(
         route="discrepancies/<int:discrepancy_id>/comments",
@@ -19,17 +19,13 @@ class DiscussionList(generics.ListCreateAPIView):
 
     def get_queryset(self):
         """Get discussions from all versions of the project to show complete history"""
-        from django.db import models
-        
         current_project = get_object_or_404(Project, id=self.kwargs["project_id"])
         
         # Get the original project to find all versions
         original_project = current_project.original_project or current_project
         
         # Get all versions of this project (including the original)
-        all_project_versions = Project.objects.filter(
-            models.Q(id=original_project.id) | models.Q(original_project=original_project)
-        )
+        all_project_versions = original_project.get_versions()
         
         # Get discussions from all versions
         return Discussion.objects.filter(
@@ -50,17 +46,13 @@ class DiscussionDetail(generics.RetrieveUpdateDestroyAPIView):
 
     def get_queryset(self):
         """Get discussions from all versions of the project to show complete history"""
-        from django.db import models
-        
         current_project = get_object_or_404(Project, id=self.kwargs["project_id"])
         
         # Get the original project to find all versions
         original_project = current_project.original_project or current_project
         
         # Get all versions of this project (including the original)
-        all_project_versions = Project.objects.filter(
-            models.Q(id=original_project.id) | models.Q(original_project=original_project)
-        )
+        all_project_versions = original_project.get_versions()
         
         # Get discussions from all versions
         return Discussion.objects.filter(
@@ -77,17 +69,13 @@ class DiscussionMessageList(generics.ListCreateAPIView):
 
     def get_queryset(self):
         """Get messages from discussions across all versions of the project"""
-        from django.db import models
-        
         current_project = get_object_or_404(Project, id=self.kwargs["project_id"])
         
         # Get the original project to find all versions
         original_project = current_project.original_project or current_project
         
         # Get all versions of this project (including the original)
-        all_project_versions = Project.objects.filter(
-            models.Q(id=original_project.id) | models.Q(original_project=original_project)
-        )
+        all_project_versions = original_project.get_versions()
         
         return DiscussionMessage.objects.filter(
             discussion_id=self.kwargs["discussion_id"],
@@ -96,17 +84,13 @@ class DiscussionMessageList(generics.ListCreateAPIView):
 
     def perform_create(self, serializer):
         """Create a message in a discussion from any version of the project"""
-        from django.db import models
-        
         current_project = get_object_or_404(Project, id=self.kwargs["project_id"])
         
         # Get the original project to find all versions
         original_project = current_project.original_project or current_project
         
         # Get all versions of this project (including the original)
-        all_project_versions = Project.objects.filter(
-            models.Q(id=original_project.id) | models.Q(original_project=original_project)
-        )
+        all_project_versions = original_project.get_versions()
         
         discussion = get_object_or_404(
             Discussion,
@@ -126,17 +110,13 @@ class DiscussionMessageDetail(generics.RetrieveUpdateDestroyAPIView):
 
     def get_queryset(self):
         """Get messages from discussions across all versions of the project"""
-        from django.db import models
-        
         current_project = get_object_or_404(Project, id=self.kwargs["project_id"])
         
         # Get the original project to find all versions
         original_project = current_project.original_project or current_project
         
         # Get all versions of this project (including the original)
-        all_project_versions = Project.objects.filter(
-            models.Q(id=original_project.id) | models.Q(original_project=original_project)
-        )
+        all_project_versions = original_project.get_versions()
         
         return DiscussionMessage.objects.filter(
             discussion_id=self.kwargs["discussion_id"],
@@ -1,23 +1,34 @@
+from celery.utils import uuid
 from django.conf import settings
-from django.db import transaction, models
+from django.core.cache import cache
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, generics, status, views, viewsets
+from rest_framework import filters, generics, serializers, status, views
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
 from projects.models import PerspectiveMember, Project, ManualDiscrepancy, DiscrepancyLabelStat, Perspective, PerspectiveProject, Rule, RuleVote, DiscrepancyComment
+from projects.analytics.matrix import matrix_cache
+from projects.analytics.snapshots import SnapshotMixin
+from projects.analytics.tally import LabelTally
+from projects.analytics.thresholds import get_threshold_profile
+from projects.deletion import ProjectDeleter
 from projects.permissions import IsProjectAdmin, IsProjectStaffAndReadOnly
+from projects.renderers import NDJSONRenderer
 from projects.serializers import PerspectiveMemberSerializer, ProjectPolymorphicSerializer, ManualDiscrepancySerializer, PerspectiveSerializer, RuleSerializer, DiscrepancyCommentSerializer
 
 from rest_framework.views import APIView
 from examples.models import Example
-from labels.models import Category
-from django.db.models import Count
+from labels.models import AnnotationRevision, Category
+from django.db.models import Count, F, Min
+from django.db.models.functions import Length, Substr
 from rest_framework.exceptions import NotFound
 import datetime
+import json
 
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 
 class ProjectList(generics.ListCreateAPIView):
     serializer_class = ProjectPolymorphicSerializer
@@ -36,37 +47,39 @@ class ProjectList(generics.ListCreateAPIView):
         return super().get_permissions()
 
     def get_queryset(self):
-        return Project.objects.filter(role_mappings__user=self.request.user)
+        return Project.objects.filter(role_mappings__user=self.request.user, deleting=False)
 
     def perform_create(self, serializer):
         project = serializer.save(created_by=self.request.user)
         project.add_admin()
 
     def delete(self, request, *args, **kwargs):
-        delete_ids = request.data["ids"]
+        """Hide the selected projects and their versions and delete them in the background.
+
+        The task is enqueued once the projects are hidden, and they are shown
+        again if it cannot be. Returns the id of the deletion task, whose
+        progress is available at `tasks/status/<task_id>`.
+        """
+        from projects.celery_tasks import delete_projects
+
         projects = Project.objects.filter(
             role_mappings__user=self.request.user,
-            pk__in=delete_ids,
+            pk__in=request.data["ids"],
         )
-        
-        # Get all versions of the projects to be deleted
-        all_versions_to_delete = []
-        for project in projects:
-            # Get the original project
-            original_project = project.original_project or project
-            
-            # Get all versions of this project
-            versions = Project.objects.filter(
-                models.Q(id=original_project.id) | 
-                models.Q(original_project=original_project)
-            )
-            all_versions_to_delete.extend(versions)
-        
-        # Delete all versions
-        for version in all_versions_to_delete:
-            version.delete()
-            
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        deleter = ProjectDeleter(projects.values_list("id", flat=True))
+        task_id = uuid()
+
+        def enqueue():
+            try:
+                delete_projects.apply_async(kwargs={"project_ids": deleter.project_ids}, task_id=task_id)
+            except Exception:
+                deleter.unmark()
+                raise
+
+        with transaction.atomic():
+            deleter.mark()
+            transaction.on_commit(enqueue)
+        return Response({"task_id": task_id}, status=status.HTTP_202_ACCEPTED)
 
 
 class ProjectDetail(generics.RetrieveUpdateDestroyAPIView):
@@ -109,12 +122,29 @@ class ReopenProject(APIView):
 
 
 class CloneProject(views.APIView):
+    """Clone a project, optionally with its `labels` and `comments`.
+
+    With `async`, the clone runs in a Celery task whose id is returned; its
+    progress is available at `tasks/status/<task_id>` and its result is the
+    id of the cloned project.
+    """
+
     permission_classes = [IsAuthenticated & IsProjectAdmin]
 
-    @transaction.atomic
     def post(self, request, *args, **kwargs):
         project = get_object_or_404(Project, pk=self.kwargs["project_id"])
-        cloned_project = project.clone()
+        # Parsed as form values too, so "false" and "0" are false.
+        flag = serializers.BooleanField()
+        labels, comments, run_async = (
+            flag.run_validation(request.data.get(name, False)) for name in ("labels", "comments", "async")
+        )
+        if run_async:
+            from projects.celery_tasks import clone_project
+
+            task = clone_project.delay(project_id=project.id, labels=labels, comments=comments)
+            return Response({"task_id": task.task_id})
+        with transaction.atomic():
+            cloned_project = project.clone(labels=labels, comments=comments)
         serializer = ProjectPolymorphicSerializer(cloned_project)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -264,18 +294,18 @@ class GetFilledPerspectives(APIView):
         serializer = PerspectiveMemberSerializer(perspective_members, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-class GetAllFilledValues(APIView):
+
+class GetAllFilledValues(SnapshotMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, project_id):
         project = get_object_or_404(Project, id=project_id)
-        
+        return self.snapshot_response(request, project, lambda: self.get_filled_values(project))
+
+    def get_filled_values(self, project):
         # Get all versions of this project (current and previous versions)
         original_project = project.original_project or project
-        all_project_versions = Project.objects.filter(
-            models.Q(id=original_project.id) | 
-            models.Q(original_project=original_project)
-        ).values_list('id', flat=True)
+        all_project_versions = original_project.get_versions().values_list('id', flat=True)
         
         # Get all perspective members for ALL project versions
         perspective_members = PerspectiveMember.objects.filter(
@@ -292,8 +322,8 @@ class GetAllFilledValues(APIView):
         # Convert sets to lists
         for perspective_id in result:
             result[perspective_id] = list(result[perspective_id])
-            
-        return Response(result, status=status.HTTP_200_OK)
+
+        return result
 
 class GetUsersWithValue(APIView):
     permission_classes = [IsAuthenticated]
@@ -311,10 +341,7 @@ class GetUsersWithValue(APIView):
 
         # Get all versions of this project (current and previous versions)
         original_project = project.original_project or project
-        all_project_versions = Project.objects.filter(
-            models.Q(id=original_project.id) | 
-            models.Q(original_project=original_project)
-        ).values_list('id', flat=True)
+        all_project_versions = original_project.get_versions().values_list('id', flat=True)
 
         # Get all members who have this value for this perspective across ALL project versions
         perspective_members = PerspectiveMember.objects.filter(
@@ -455,86 +482,167 @@ class DeletePerspectiveTotal(APIView):
             status=status.HTTP_200_OK
         )
 
-class DiscrepancyAnalysisView(APIView):
+
+class DiscrepancyAnalysisView(SnapshotMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, project_id):
         project = get_object_or_404(Project, id=project_id)
+        return self.snapshot_response(request, project, lambda: self.get_discrepancies(project))
+
+    def get_discrepancies(self, project):
         discrepancy_threshold = project.discrepancy_percentage
         
         # Get the original project (where examples are stored)
         original_project = project.original_project or project
-        examples = Example.objects.filter(project_id=original_project.id)
+        tally = LabelTally.from_matrix(matrix_cache.get(original_project.id, project.version))
+        discrepancy_ids = tally.discrepancies(discrepancy_threshold)
 
         # Buscar todas as discrepâncias manuais associadas ao projeto
-        manual_discrepancies = ManualDiscrepancy.objects.filter(project_id=project_id)
-        manual_examples = set(md.example_id for md in manual_discrepancies)
+        manual_examples = set(
+            ManualDiscrepancy.objects.filter(project_id=project.id).values_list('example_id', flat=True)
+        )
 
         discrepancies = []
+        examples = Example.objects.filter(id__in=discrepancy_ids).values('id', 'text')
         for example in examples:
-            # Filter annotations by the current project version
-            labels = example.categories.filter(project_version=project.version).values('label', 'label__text').annotate(count=Count('label'))
-            total_labels = sum(label['count'] for label in labels)
-
-            if total_labels > 0:
-                percentages = {label['label__text']: (label['count'] / total_labels) * 100 for label in labels}
-                max_percentage = max(percentages.values())
-
-                if max_percentage < discrepancy_threshold:
-                    # Determinar o status
-                    if example.id in manual_examples:
-                        status = 'Reported'
-                    else:
-                        status = 'Not Reported'
-                    discrepancies.append({
-                        "id": example.id,
-                        "text": example.text,
-                        "percentages": percentages,
-                        "status": status,
-                    })
+            # Determinar o status
+            report_status = 'Reported' if example['id'] in manual_examples else 'Not Reported'
+            discrepancies.append({
+                "id": example['id'],
+                "text": example['text'],
+                "percentages": tally[example['id']].percentages,
+                "status": report_status,
+            })
+
+        return {"discrepancies": discrepancies}
+
+
+class DiscrepancyThresholdView(APIView):
+    """What-if analysis of the discrepancy percentage of a project version.
 
-        return Response({"discrepancies": discrepancies})
+    Returns a histogram of the share of the most voted label of the annotated
+    examples, with the number of examples flagged at each bin edge. Pass
+    `threshold` to also list the examples that would be flagged at that
+    percentage, and `bins` to change the number of bins.
+    """
+
+    permission_classes = [IsAuthenticated]
+    default_bins = 20
+    max_bins = 1000
+
+    def get(self, request, project_id):
+        project = get_object_or_404(Project, id=project_id)
+        original_project = project.original_project or project
+
+        try:
+            bins = int(request.query_params.get('bins', self.default_bins))
+            threshold = request.query_params.get('threshold')
+            threshold = float(threshold) if threshold is not None else None
+        except ValueError:
+            return Response(
+                {"error": "bins must be an integer and threshold a number"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 0 < bins <= self.max_bins:
+            return Response(
+                {"error": f"bins must be between 1 and {self.max_bins}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        profile = get_threshold_profile(original_project.id, project.version)
+        data = {
+            "total": len(profile),
+            "current_threshold": project.discrepancy_percentage,
+            "histogram": profile.histogram(bins),
+        }
+        if threshold is not None:
+            flagged = profile.flagged(threshold)
+            texts = dict(Example.objects.filter(id__in=[item["id"] for item in flagged]).values_list('id', 'text'))
+            for item in flagged:
+                item["text"] = texts.get(item["id"])
+            data["threshold"] = threshold
+            data["discrepancies"] = flagged
+        return Response(data)
 
 
 class AnnotationsByUserView(APIView):
+    """Pivot of the examples of a project by annotator.
+
+    Each row holds the example and the first label given by each user. The
+    examples are paged by id, `limit` (at most `max_limit`, `default_limit`
+    if not given) at a time; pass `cursor` (the `next` value of the previous
+    page) to fetch the following page. The list of annotators is cached
+    under the annotation revision of the project.
+    """
+
     permission_classes = [IsAuthenticated]
+    default_limit = 100
+    max_limit = 1000
 
     def get(self, request, project_id):
         project = get_object_or_404(Project, id=project_id)
-        examples = Example.objects.filter(project_id=project_id)
+        examples = Example.objects.filter(project_id=project_id).order_by('id')
+
+        try:
+            cursor = int(request.query_params.get('cursor', 0))
+            limit = int(request.query_params.get('limit') or self.default_limit)
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {"error": "cursor must be an integer and limit a positive integer"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = min(limit, self.max_limit)
 
         if not examples.exists():
             raise NotFound("No examples found for this project.")
 
-        # Get all unique users who have made annotations
-        users = set()
-        for example in examples:
-            users.update(example.categories.values_list('user__username', flat=True))
-        users = sorted(list(users))
-
-        items = []
-        for example in examples:
-            # Get all annotations for this example
-            annotations = example.categories.select_related('user', 'label')
-            
-            # Create a row with text and annotations for each user
-            row = {
-                "id": example.id,
-                "text": example.text,
-            }
-            
-            # Add each user's annotation as a separate field
-            for user in users:
-                user_annotation = annotations.filter(user__username=user).first()
-                row[user] = user_annotation.label.text if user_annotation else None
-
-            items.append(row)
+        annotations = Category.objects.filter(example__project_id=project_id)
+        users = self.get_annotators(project, annotations)
+
+        page = list(examples.filter(id__gt=cursor).values('id', 'text')[:limit + 1])
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = page[-1]['id']
+
+        # Create a row with text and annotations for each user
+        rows = {}
+        for example in page:
+            rows[example['id']] = {"id": example['id'], "text": example['text'], **dict.fromkeys(users)}
+
+        if rows:
+            # Scan the annotations of the page once, in the order they were created
+            page_annotations = (
+                annotations.filter(example_id__gte=min(rows), example_id__lte=max(rows))
+                .order_by('example_id', 'id')
+                .values_list('example_id', 'user__username', 'label__text')
+            )
+            for example_id, username, label in page_annotations.iterator():
+                row = rows.get(example_id)
+                if row is not None and row.get(username, "") is None:
+                    row[username] = label
 
         return Response({
-            "items": items,
-            "users": users
+            "items": list(rows.values()),
+            "users": users,
+            "next": next_cursor
         }, content_type='application/json')
 
+    def get_annotators(self, project, annotations):
+        """The sorted usernames of the annotators, computed once per annotation revision."""
+        original_project = project.original_project or project
+        tag = AnnotationRevision.objects.current(original_project.id).tag
+        key = f"projects:annotators:{project.id}:{tag}"
+        users = cache.get(key)
+        if users is None:
+            users = sorted(annotations.order_by().values_list('user__username', flat=True).distinct())
+            cache.set(key, users, settings.ANALYTICS_CACHE_TIMEOUT)
+        return users
+
+
 # This class defines API endpoints for retrieving and creating manual discrepancies associated with a
 # specific project.
 class ManualDiscrepancyListCreate(APIView):
@@ -614,34 +722,123 @@ class LabelStatsView(APIView):
         return Response(result, status=status.HTTP_200_OK)
 
 
+class BatchLabelStatsView(APIView):
+    """Label counts and percentages of many examples at once.
+
+    Pass the example ids as a comma-separated `ids` list, or an inclusive
+    range of ids with `start` and `end`. The response maps each example id
+    to the same statistics `LabelStatsView` returns for a single example.
+    """
+
+    permission_classes = [IsAuthenticated]
+    max_examples = 1000
+
+    def get(self, request, project_id):
+        project = get_object_or_404(Project, id=project_id)
+        original_project = project.original_project or project
+
+        try:
+            example_ids = [int(id) for id in request.query_params.get('ids', '').split(',') if id.strip()]
+            start = request.query_params.get('start')
+            end = request.query_params.get('end')
+            example_range = (int(start), int(end)) if start is not None and end is not None else None
+        except ValueError:
+            return Response(
+                {"error": "ids, start and end must be integers"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if bool(example_ids) == bool(example_range):
+            return Response(
+                {"error": "Either ids or start and end are required"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        size = len(example_ids) if example_ids else example_range[1] - example_range[0] + 1
+        if size > self.max_examples:
+            return Response(
+                {"error": f"At most {self.max_examples} examples can be requested at once"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        tally = LabelTally.build(
+            original_project.id,
+            project.version,
+            example_ids=example_ids or None,
+            example_range=example_range,
+        )
+        result = {example_id: {} for example_id in example_ids}
+        for example in tally:
+            counts = {}
+            for label in example.labels.values():
+                counts[label.text] = counts.get(label.text, 0) + label.count
+            total = example.total
+            result[example.example_id] = {
+                text: {
+                    'count': count,
+                    'percentage': (count / total * 100) if total > 0 else 0
+                }
+                for text, count in counts.items()
+            }
+        return Response(result, status=status.HTTP_200_OK)
+
+
 class AnnotatorReportView(APIView):
+    """Report of every category annotation of a project, across its versions.
+
+    By default the whole report is returned at once. For large projects, pass
+    `limit` (and the `next` value of the previous page as `cursor`) to page
+    through the annotations, or `format=ndjson` to stream them one per line.
+    Both modes order the annotations from the newest to the oldest.
+    """
+
     permission_classes = [IsAuthenticated & IsProjectAdmin]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer]
+    text_length = 200
+    display_text_length = 50
+    stream_chunk_size = 2000
 
     def get(self, request, project_id):
         project = get_object_or_404(Project, id=project_id)
         
         # Get all versions of this project (current and previous versions)
         original_project = project.original_project or project
-        all_project_versions = Project.objects.filter(
-            models.Q(id=original_project.id) | 
-            models.Q(original_project=original_project)
-        ).values_list('id', flat=True)
-        
-        # Parse query parameters
-        start_date = request.query_params.get('dateStart')
-        end_date = request.query_params.get('dateEnd')
-        perspective_ids = request.query_params.get('perspectiveId')
-        perspective_values = request.query_params.get('perspectiveValue')
-        username = request.query_params.get('username')
-        example_id = request.query_params.get('exampleId')
-        project_version = request.query_params.get('projectVersion')
-        label_ids = request.query_params.get('labelIds')
+        all_project_versions = original_project.get_versions().values_list('id', flat=True)
         
         # Base queryset for annotations (categories) from ALL project versions
         # Since examples are shared, we need to get annotations from all versions
-        annotations = Category.objects.filter(example__project_id=original_project.id)\
-            .select_related('user', 'example', 'label')\
-            .order_by('-created_at')
+        annotations = Category.objects.filter(example__project_id=original_project.id)
+        annotations = self.filter_annotations(annotations, request.query_params, project, all_project_versions)
+
+        # Only select the columns of the report, with the example text truncated in SQL
+        annotations = annotations.values(
+            'id',
+            'created_at',
+            'example_id',
+            'label_id',
+            'project_version',
+            username=F('user__username'),
+            label_text=F('label__text'),
+            background_color=F('label__background_color'),
+            example_text=Substr('example__text', 1, self.text_length),
+            example_text_length=Length('example__text'),
+        )
+        project_type = original_project.project_type
+
+        if request.accepted_renderer.format == NDJSONRenderer.format:
+            return self.stream_report(annotations, project_type)
+        if request.query_params.get('limit'):
+            return self.paginate_report(annotations, project_type, request.query_params)
+        return self.full_report(annotations, project_type)
+
+    def filter_annotations(self, annotations, query_params, project, all_project_versions):
+        """Filter the annotations by the date, example, version, user and perspective query parameters."""
+        # Parse query parameters
+        start_date = query_params.get('dateStart')
+        end_date = query_params.get('dateEnd')
+        perspective_ids = query_params.get('perspectiveId')
+        perspective_values = query_params.get('perspectiveValue')
+        username = query_params.get('username')
+        example_id = query_params.get('exampleId')
+        project_version = query_params.get('projectVersion')
         
         # Apply date filters if provided
         if start_date:
@@ -685,83 +882,152 @@ class AnnotatorReportView(APIView):
         
         # Apply perspective filters if provided
         if perspective_ids and perspective_values and project.perspective_associated:
-            try:
-                # Parse multiple perspective IDs and values
-                perspective_id_list = [int(pid.strip()) for pid in perspective_ids.split(',') if pid.strip()]
-                perspective_value_list = [pv.strip() for pv in perspective_values.split(',') if pv.strip()]
-                
-                if perspective_id_list and perspective_value_list:
-                    # Find members that match any combination of perspective_id and perspective_value
-                    # Check across all project versions
-                    perspective_members = PerspectiveMember.objects.filter(
-                        perspective_id__in=perspective_id_list,
-                        value__in=perspective_value_list,
-                        member__project_id__in=all_project_versions
-                    ).values_list('member__user_id', flat=True).distinct()
-                    
-                    annotations = annotations.filter(user_id__in=perspective_members)
-            except (ValueError, TypeError):
-                pass
-        
-        # Prepare the response data
+            annotations = self.filter_by_perspectives(
+                annotations, perspective_ids, perspective_values, all_project_versions
+            )
+        return annotations
+
+    def filter_by_perspectives(self, annotations, perspective_ids, perspective_values, all_project_versions):
+        """Keep the annotations of the members with any of the perspective values."""
+        try:
+            # Parse multiple perspective IDs and values
+            perspective_id_list = [int(pid.strip()) for pid in perspective_ids.split(',') if pid.strip()]
+            perspective_value_list = [pv.strip() for pv in perspective_values.split(',') if pv.strip()]
+
+            if perspective_id_list and perspective_value_list:
+                # Find members that match any combination of perspective_id and perspective_value
+                # Check across all project versions
+                perspective_members = PerspectiveMember.objects.filter(
+                    perspective_id__in=perspective_id_list,
+                    value__in=perspective_value_list,
+                    member__project_id__in=all_project_versions
+                ).values_list('member__user_id', flat=True).distinct()
+
+                annotations = annotations.filter(user_id__in=perspective_members)
+        except (ValueError, TypeError):
+            pass
+        return annotations
+
+    def stream_report(self, annotations, project_type):
+        """Stream the annotations as NDJSON, from the newest to the oldest."""
+        rows = annotations.order_by('-id').iterator(chunk_size=self.stream_chunk_size)
+        lines = (json.dumps(self.to_report(row, project_type)) + '\n' for row in rows)
+        return StreamingHttpResponse(lines, content_type='application/x-ndjson')
+
+    def paginate_report(self, annotations, project_type, query_params):
+        """A page of `limit` annotations older than `cursor`, with the cursor of the next page."""
+        try:
+            limit = int(query_params['limit'])
+            cursor = query_params.get('cursor')
+            if cursor:
+                annotations = annotations.filter(id__lt=int(cursor))
+            if limit < 1:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {"error": "limit must be a positive integer and cursor an integer"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        page = list(annotations.order_by('-id')[:limit + 1])
+        next_cursor = page[limit - 1]['id'] if len(page) > limit else None
+        return Response({
+            'annotations': [self.to_report(row, project_type) for row in page[:limit]],
+            'next': next_cursor
+        }, status=status.HTTP_200_OK)
+
+    def full_report(self, annotations, project_type):
+        """Every annotation, with the examples and versions to filter them by."""
         result = []
-        unique_examples = {}  # Para filtro de examples únicos baseado em ID
         project_versions = set()  # Para filtro de versões
-        
-        for annotation in annotations:
+
+        for row in annotations.order_by('-created_at'):
             # Adicionar versão à lista
-            project_versions.add(annotation.project_version)
-            
-            # Adicionar example único baseado no ID
-            if annotation.example.id not in unique_examples:
-                example_text = annotation.example.text[:50] + '...' if len(annotation.example.text) > 50 else annotation.example.text
-                unique_examples[annotation.example.id] = {
-                    'text': annotation.example.text,
-                    'display_text': example_text,
-                    'id': annotation.example.id
-                }
-            
-            result.append({
-                'id': annotation.id,
-                'username': annotation.user.username,
-                'created_at': annotation.created_at.isoformat(),
-                'type': annotation.example.project.project_type,
-                'example_id': annotation.example.id,
-                'example_text': annotation.example.text[:200] + '...' if len(annotation.example.text) > 200 else annotation.example.text,
-                'label_id': annotation.label.id,
-                'label_text': annotation.label.text,
-                'backgroundColor': annotation.label.background_color,
-                'project_version': annotation.project_version
+            project_versions.add(row['project_version'])
+            result.append(self.to_report(row, project_type))
+
+        # Para filtro de examples únicos baseado em ID
+        example_ids = list(dict.fromkeys(row['example_id'] for row in result))
+        texts = dict(Example.objects.filter(id__in=example_ids).values_list('id', 'text'))
+        unique_examples_list = []
+        for example_id in example_ids:
+            text = texts[example_id]
+            display_text = text
+            if text and len(text) > self.display_text_length:
+                display_text = text[:self.display_text_length] + '...'
+            unique_examples_list.append({
+                'text': text,
+                'display_text': display_text,
+                'id': example_id
             })
-        
+
         # Preparar dados de filtros
-        unique_examples_list = list(unique_examples.values())
         project_versions_list = sorted(list(project_versions))
-        
+
         return Response({
             'annotations': result,
             'unique_examples': unique_examples_list,
             'project_versions': project_versions_list
         }, status=status.HTTP_200_OK)
 
-
-class AnnotationStatisticsView(APIView):
-    permission_classes = [IsAuthenticated]
+    def to_report(self, row, project_type):
+        example_text = row['example_text']
+        if example_text and row['example_text_length'] > self.text_length:
+            example_text += '...'
+        return {
+            'id': row['id'],
+            'username': row['username'],
+            'created_at': row['created_at'].isoformat(),
+            'type': project_type,
+            'example_id': row['example_id'],
+            'example_text': example_text,
+            'label_id': row['label_id'],
+            'label_text': row['label_text'],
+            'backgroundColor': row['background_color'],
+            'project_version': row['project_version']
+        }
+
+
+class StatisticsMixin:
+    """Statistics views computed by `get_statistics`, so they can also run in a Celery task."""
+
+    progress_interval = 1000
 
     def get(self, request, project_id):
         project = get_object_or_404(Project, id=project_id)
-        
+        return Response(self.get_statistics(project, request.query_params))
+
+    def get_statistics(self, project, query_params, progress=None):
+        """Compute the statistics of a project.
+
+        Args:
+            project: The project version requested.
+            query_params: The query parameters of the request, a `QueryDict` or `MultiValueDict`.
+            progress: If given, called with the number of processed and total examples from time to time.
+
+        Returns:
+            The data of the response.
+        """
+        raise NotImplementedError
+
+    def report_progress(self, progress, current, total):
+        if progress and (current % self.progress_interval == 0 or current == total):
+            progress(current, total)
+
+
+class AnnotationStatisticsView(StatisticsMixin, APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get_statistics(self, project, query_params, progress=None):
         # Get query parameters matching frontend parameter names
-        annotation_ids = request.query_params.get('exampleId', '').split(',') if request.query_params.get('exampleId') else []
-        perspective_ids = request.query_params.get('perspectiveId', '').split(',') if request.query_params.get('perspectiveId') else []
-        perspective_values = request.query_params.get('perspectiveValue', '').split(',') if request.query_params.get('perspectiveValue') else []
+        annotation_ids = query_params.get('exampleId', '').split(',') if query_params.get('exampleId') else []
+        perspective_ids = query_params.get('perspectiveId', '').split(',') if query_params.get('perspectiveId') else []
+        perspective_values = (
+            query_params.get('perspectiveValue', '').split(',') if query_params.get('perspectiveValue') else []
+        )
 
         original_project = project.original_project or project
-        examples = Example.objects.filter(project_id=original_project.id)
         if annotation_ids:
             annotation_ids = [int(id) for id in annotation_ids if id.strip()]
-            if annotation_ids:
-                examples = examples.filter(id__in=annotation_ids)
 
         users_to_consider = None
         if perspective_ids and perspective_values:
@@ -793,120 +1059,107 @@ class AnnotationStatisticsView(APIView):
                 print(f"Error processing perspective filters: {e}")
                 pass
 
-        result = []
         discrepancy_threshold = project.discrepancy_percentage
-        manual_discrepancies = ManualDiscrepancy.objects.filter(project_id=project.id)
-        manual_examples = set(md.example_id for md in manual_discrepancies)
-        discrepancies_auto = set()
-        for example in examples:
-            labels = example.categories.filter(
-                project_version=project.version
-            ).values('label', 'label__text').annotate(count=Count('label'))
-            total_labels = sum(label['count'] for label in labels)
-            if total_labels > 0:
-                percentages = {label['label__text']: (label['count'] / total_labels) * 100 for label in labels}
-                max_percentage = max(percentages.values())
-                if max_percentage < discrepancy_threshold:
-                    discrepancies_auto.add(example.id)
-        
-        for example in examples:
-            all_labels = example.categories.filter(
-                project_version=project.version
-            ).select_related('label').values(
-                'label__id',
-                'label__text',
-                'label__background_color'
-            ).annotate(count=Count('label')).distinct()
-            
-            total_all_labels = sum(label['count'] for label in all_labels)
-            
-            categories_query = example.categories.filter(project_version=project.version).select_related('label')
-            
-            if users_to_consider is not None:
-                categories_query = categories_query.filter(user_id__in=users_to_consider)
-            
-            filtered_labels = categories_query.values(
-                'label__id',
-                'label__text',
-                'label__background_color'
-            ).annotate(count=Count('label')).distinct()
-
-            total_filtered_labels = sum(label['count'] for label in filtered_labels)
+        manual_examples = set(
+            ManualDiscrepancy.objects.filter(project_id=project.id).values_list('example_id', flat=True)
+        )
+        example_ids = annotation_ids or None
+        matrix = matrix_cache.get(original_project.id, project.version)
+        all_tally = LabelTally.from_matrix(matrix, example_ids=example_ids)
+        discrepancies_auto = all_tally.discrepancies(discrepancy_threshold)
+        if users_to_consider is not None:
+            filtered_tally = LabelTally.from_matrix(matrix, example_ids=example_ids, user_ids=users_to_consider)
+        else:
+            filtered_tally = all_tally
 
-            if total_filtered_labels > 0:
-                others_count = total_all_labels - total_filtered_labels
-                
-                labels_result = [{
-                    'id': label['label__id'],
-                    'text': label['label__text'],
-                    'backgroundColor': label['label__background_color'],
-                    'percentage': (label['count'] / total_all_labels * 100)
-                } for label in filtered_labels]
-                
-                if others_count > 0:
-                    labels_result.append({
-                        'id': -1,
-                        'text': 'Others',
-                        'backgroundColor': '#757575',
-                        'percentage': (others_count / total_all_labels * 100)
-                    })
+        categories_query = Category.objects.filter(
+            example_id__in=filtered_tally.example_ids, project_version=project.version
+        )
+        if users_to_consider is not None:
+            categories_query = categories_query.filter(user_id__in=users_to_consider)
+        users_by_example = {}
+        created_at_by_example = {}
+        annotators = (
+            categories_query.order_by()
+            .values('example_id', 'user__id', 'user__username')
+            .annotate(first_created_at=Min('created_at'))
+        )
+        for annotator in annotators:
+            example_id = annotator['example_id']
+            users_by_example.setdefault(example_id, []).append(
+                {'id': annotator['user__id'], 'username': annotator['user__username']}
+            )
+            created_at = created_at_by_example.get(example_id)
+            if created_at is None or annotator['first_created_at'] < created_at:
+                created_at_by_example[example_id] = annotator['first_created_at']
 
-                is_discrepancy = example.id in discrepancies_auto
-                if is_discrepancy:
-                    discrepancy_status = 'Reported' if example.id in manual_examples else 'Not Reported'
-                else:
-                    discrepancy_status = None
-                users_result = list(categories_query.values(
-                    'user__id',
-                    'user__username'
-                ).distinct())
-                
-                first_annotation = categories_query.first()
-                version = first_annotation.project_version if first_annotation else None
-                created_at = first_annotation.created_at if first_annotation else None
-
-                result.append({
-                    'id': f"{example.id}",
-                    'example_id': example.id,
-                    'text': example.text,
-                    'labels': labels_result,
-                    'version': version,
-                    'users': [{'id': u['user__id'], 'username': u['user__username']} for u in users_result],
-                    'created_at': created_at.isoformat() if created_at else None,
-                    'discrepancy': is_discrepancy,
-                    'discrepancy_status': discrepancy_status
+        result = []
+        examples = list(Example.objects.filter(id__in=filtered_tally.example_ids).values('id', 'text'))
+        for index, example in enumerate(examples, start=1):
+            self.report_progress(progress, index, len(examples))
+            filtered = filtered_tally[example['id']]
+            total_all_labels = all_tally[example['id']].total
+            others_count = total_all_labels - filtered.total
+
+            labels_result = [{
+                'id': label.label_id,
+                'text': label.text,
+                'backgroundColor': label.background_color,
+                'percentage': (label.count / total_all_labels * 100)
+            } for label in filtered.labels.values()]
+
+            if others_count > 0:
+                labels_result.append({
+                    'id': -1,
+                    'text': 'Others',
+                    'backgroundColor': '#757575',
+                    'percentage': (others_count / total_all_labels * 100)
                 })
 
-        return Response({
+            is_discrepancy = example['id'] in discrepancies_auto
+            if is_discrepancy:
+                discrepancy_status = 'Reported' if example['id'] in manual_examples else 'Not Reported'
+            else:
+                discrepancy_status = None
+            created_at = created_at_by_example.get(example['id'])
+
+            result.append({
+                'id': f"{example['id']}",
+                'example_id': example['id'],
+                'text': example['text'],
+                'labels': labels_result,
+                'version': project.version,
+                'users': users_by_example.get(example['id'], []),
+                'created_at': created_at.isoformat() if created_at else None,
+                'discrepancy': is_discrepancy,
+                'discrepancy_status': discrepancy_status
+            })
+
+        return {
             'annotations': result
-        })
+        }
 
-class AllVersionsStatisticsView(APIView):
+
+class AllVersionsStatisticsView(StatisticsMixin, APIView):
     permission_classes = [IsAuthenticated]
 
-    def get(self, request, project_id):
-        project = get_object_or_404(Project, id=project_id)
-        
+    def get_statistics(self, project, query_params, progress=None):
         # Get query parameters
-        annotation_ids = request.query_params.getlist('annotation_ids', [])
-        perspective_ids = request.query_params.getlist('perspective_ids', [])
-        perspective_values = request.query_params.getlist('perspective_values', [])
-        version_ids = request.query_params.getlist('version_ids', [])
+        annotation_ids = query_params.getlist('annotation_ids', [])
+        perspective_ids = query_params.getlist('perspective_ids', [])
+        perspective_values = query_params.getlist('perspective_values', [])
+        version_ids = query_params.getlist('version_ids', [])
 
         # Get all versions to consider and order them by version number
         if version_ids:
-            versions = Project.objects.filter(id__in=version_ids).order_by('version')
+            versions = list(Project.objects.filter(id__in=version_ids).order_by('version'))
         else:
             # If no versions specified, use current project
             versions = [project]
 
-        # Base query for examples - get examples from the original project
+        # Examples are stored in the original project and shared by all of its versions
         original_project = project.original_project or project
-        examples = Example.objects.filter(project_id=original_project.id)
-        
-        # Apply annotation filter if provided
-        if annotation_ids:
-            examples = examples.filter(id__in=annotation_ids)
+        example_ids = annotation_ids or None
             
         # Filter by perspectives if provided
         users_to_consider = None
@@ -934,31 +1187,35 @@ class AllVersionsStatisticsView(APIView):
                     member_id__in=valid_members
                 ).values_list('member__user_id', flat=True).distinct()
 
+        # Count the labels of every requested version at once
+        version_numbers = {version.version for version in versions}
+        all_tallies = LabelTally.build_many(original_project.id, version_numbers, example_ids=example_ids)
+        if users_to_consider is not None:
+            filtered_tallies = LabelTally.build_many(
+                original_project.id, version_numbers, example_ids=example_ids, user_ids=users_to_consider
+            )
+        else:
+            filtered_tallies = all_tallies
+
+        # Buscar discrepâncias manuais de todas as versões
+        manual_examples = {version.id: set() for version in versions}
+        manual_discrepancies = ManualDiscrepancy.objects.filter(project__in=versions).values_list(
+            'project_id', 'example_id'
+        )
+        for version_id, example_id in manual_discrepancies:
+            manual_examples[version_id].add(example_id)
+
+        annotated_ids = {example_id for tally in filtered_tallies.values() for example_id in tally.example_ids}
+        examples = list(Example.objects.filter(id__in=annotated_ids).values_list('id', 'text'))
+
         # Get annotations with their labels, organized by version
         result = []
+        processed = 0
+        total = len(examples) * len(versions)
         for version in versions:
-            # Buscar discrepâncias automáticas e manuais para esta versão
-            discrepancy_threshold = version.discrepancy_percentage
-            manual_discrepancies = ManualDiscrepancy.objects.filter(project_id=version.id)
-            manual_examples = set(md.example_id for md in manual_discrepancies)
-            discrepancies_auto = set()
-            
-            # Get annotations for this version
-            version_annotations = examples.filter(
-                categories__project_version=version.version
-            ).distinct()
-            
-            for example in version_annotations:
-                labels = example.categories.filter(
-                    project_version=version.version
-                ).values('label', 'label__text').annotate(count=Count('label'))
-                
-                total_labels = sum(label['count'] for label in labels)
-                if total_labels > 0:
-                    percentages = {label['label__text']: (label['count'] / total_labels) * 100 for label in labels}
-                    max_percentage = max(percentages.values())
-                    if max_percentage < discrepancy_threshold:
-                        discrepancies_auto.add(example.id)
+            all_tally = all_tallies[version.version]
+            filtered_tally = filtered_tallies[version.version]
+            discrepancies_auto = all_tally.discrepancies(version.discrepancy_percentage)
             
             version_data = {
                 'version_id': version.id,
@@ -967,64 +1224,44 @@ class AllVersionsStatisticsView(APIView):
                 'annotations': []
             }
             
-            for example in version_annotations:
-                # Get all labels for this example in this version
-                all_labels = example.categories.filter(
-                    project_version=version.version
-                ).select_related('label').values(
-                    'label__id',
-                    'label__text',
-                    'label__background_color'
-                ).annotate(count=Count('label')).distinct()
-                
-                total_all_labels = sum(label['count'] for label in all_labels)
-                
-                # Base query for filtered categories
-                categories_query = example.categories.filter(project_version=version.version).select_related('label')
-                
-                if users_to_consider is not None:
-                    categories_query = categories_query.filter(user_id__in=users_to_consider)
-                
-                filtered_labels = categories_query.values(
-                    'label__id',
-                    'label__text',
-                    'label__background_color'
-                ).annotate(count=Count('label')).distinct()
-
-                total_filtered_labels = sum(label['count'] for label in filtered_labels)
-
-                if total_filtered_labels > 0:
-                    others_count = total_all_labels - total_filtered_labels
+            for example_id, text in examples:
+                processed += 1
+                self.report_progress(progress, processed, total)
+                filtered = filtered_tally.get(example_id)
+                if filtered is None:
+                    continue
+                total_all_labels = all_tally[example_id].total
+                others_count = total_all_labels - filtered.total
                     
-                    labels_result = [{
-                        'id': label['label__id'],
-                        'text': label['label__text'],
-                        'backgroundColor': label['label__background_color'],
-                        'percentage': (label['count'] / total_all_labels * 100)
-                    } for label in filtered_labels]
+                labels_result = [{
+                    'id': label.label_id,
+                    'text': label.text,
+                    'backgroundColor': label.background_color,
+                    'percentage': (label.count / total_all_labels * 100)
+                } for label in filtered.labels.values()]
                     
-                    if others_count > 0:
-                        labels_result.append({
-                            'id': -1,
-                            'text': 'Others',
-                            'backgroundColor': '#757575',
-                            'percentage': (others_count / total_all_labels * 100)
-                        })
-
-                    # Adicionar info de discrepância
-                    is_discrepancy = example.id in discrepancies_auto
-                    if is_discrepancy:
-                        discrepancy_status = 'Reported' if example.id in manual_examples else 'Not Reported'
-                    else:
-                        discrepancy_status = None
-
-                    version_data['annotations'].append({
-                        'id': example.id,
-                        'text': example.text,
-                        'labels': labels_result,
-                        'discrepancy': is_discrepancy,
-                        'discrepancy_status': discrepancy_status
+                if others_count > 0:
+                    labels_result.append({
+                        'id': -1,
+                        'text': 'Others',
+                        'backgroundColor': '#757575',
+                        'percentage': (others_count / total_all_labels * 100)
                     })
+
+                # Adicionar info de discrepância
+                is_discrepancy = example_id in discrepancies_auto
+                if is_discrepancy:
+                    discrepancy_status = 'Reported' if example_id in manual_examples[version.id] else 'Not Reported'
+                else:
+                    discrepancy_status = None
+
+                version_data['annotations'].append({
+                    'id': example_id,
+                    'text': text,
+                    'labels': labels_result,
+                    'discrepancy': is_discrepancy,
+                    'discrepancy_status': discrepancy_status
+                })
             
             if version_data['annotations']:
                 result.append(version_data)
@@ -1032,9 +1269,9 @@ class AllVersionsStatisticsView(APIView):
         # Sort the result by version number
         result.sort(key=lambda x: x['version_number'])
 
-        return Response({
+        return {
             'versions': result
-        })
+        }
         
 
 class RuleListCreate(generics.ListCreateAPIView):
@@ -1156,10 +1393,7 @@ class ProjectVersionsList(APIView):
         original_project = project.original_project or project
         
         # Get all versions of the project
-        versions = Project.objects.filter(
-            models.Q(id=original_project.id) | 
-            models.Q(original_project=original_project)
-        ).order_by('version')
+        versions = original_project.get_versions().order_by('version')
         
         serializer = ProjectPolymorphicSerializer(versions, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -1208,92 +1442,14 @@ class ReopenRuleVote(APIView):
             return Response({'detail': 'Database unavailable. Please try again later.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         
 
-class AnnotationLabelTableView(APIView):
+class AnnotationLabelTableView(SnapshotMixin, APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, project_id):
         from django.db import DatabaseError
         try:
             project = get_object_or_404(Project, id=project_id)
-            original_project = project.original_project or project
-            examples = Example.objects.filter(project_id=original_project.id)
-
-            # Obter todas as labels possíveis no projeto
-            all_labels = set()
-            for example in examples:
-                labels = example.categories.filter(project_version=project.version).values_list('label__text', flat=True)
-                all_labels.update(labels)
-            all_labels = sorted(list(all_labels))
-
-            # Cálculo de discrepância
-            discrepancy_threshold = project.discrepancy_percentage
-            manual_discrepancies = ManualDiscrepancy.objects.filter(project_id=project.id)
-            manual_examples = set(md.example_id for md in manual_discrepancies)
-            discrepancies_auto = set()
-            for example in examples:
-                labels = example.categories.filter(project_version=project.version).values('label', 'label__text').annotate(count=Count('label'))
-                total_labels = sum(label['count'] for label in labels)
-                if total_labels > 0:
-                    percentages = {label['label__text']: (label['count'] / total_labels) * 100 for label in labels}
-                    max_percentage = max(percentages.values())
-                    if max_percentage < discrepancy_threshold:
-                        discrepancies_auto.add(example.id)
-
-            # Montar a tabela
-            table = []
-            for example in examples:
-                row = {
-                    'id': example.id,
-                    'text': example.text,
-                }
-                # Contagem de labels
-                label_counts = {label: 0 for label in all_labels}
-                labels = example.categories.filter(project_version=project.version).values('label__text').annotate(count=Count('label'))
-                for label in labels:
-                    label_counts[label['label__text']] = label['count']
-                row['labels'] = label_counts
-                # Discrepância e reportado
-                is_discrepancy = example.id in discrepancies_auto
-                is_reported = example.id in manual_examples
-                row['discrepancy'] = is_discrepancy
-                row['reported'] = is_reported
-                # Adicionar valores de perspetiva igual ao Annotation Statistics
-                # Buscar utilizadores que anotaram este exemplo
-                user_ids = example.categories.filter(project_version=project.version).values_list('user_id', flat=True).distinct()
-                perspectives_dict = {}
-                if user_ids:
-                    # Usar o primeiro utilizador que anotou
-                    user_id = user_ids[0]
-                    member = project.role_mappings.filter(user_id=user_id).first()
-                    if member:
-                        member_perspectives = PerspectiveMember.objects.filter(member=member)
-                        for pm in member_perspectives:
-                            perspectives_dict[str(pm.perspective_id)] = pm.value
-                row['perspectives'] = dict(perspectives_dict)
-                table.append(row)
-
-            # Adicionar valores possíveis de perspetiva (igual ao GetAllFilledValues)
-            # Obter todos os membros de perspetiva deste projeto (todas as versões)
-            all_project_versions = Project.objects.filter(
-                models.Q(id=original_project.id) | 
-                models.Q(original_project=original_project)
-            ).values_list('id', flat=True)
-            perspective_members = PerspectiveMember.objects.filter(
-                member__project_id__in=all_project_versions
-            ).select_related('perspective')
-            perspective_values_dict = {}
-            for member in perspective_members:
-                if member.perspective_id not in perspective_values_dict:
-                    perspective_values_dict[member.perspective_id] = set()
-                perspective_values_dict[member.perspective_id].add(member.value)
-            # Converter sets em listas
-            for perspective_id in perspective_values_dict:
-                perspective_values_dict[perspective_id] = list(perspective_values_dict[perspective_id])
-            return Response({
-                'labels': all_labels,
-                'rows': table,
-                'perspective_values': perspective_values_dict
-            })
+            return self.snapshot_response(request, project, lambda: self.get_table(project))
         except DatabaseError:
             return Response(
                 {"detail": "Sorry, we couldn't load the label table right now. Please try again in a few moments."},
@@ -1305,6 +1461,72 @@ class AnnotationLabelTableView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def get_table(self, project):
+        original_project = project.original_project or project
+        matrix = matrix_cache.get(original_project.id, project.version)
+        tally = LabelTally.from_matrix(matrix)
+
+        # Obter todas as labels possíveis no projeto
+        all_labels = tally.label_texts
+
+        # Cálculo de discrepância
+        discrepancies_auto = tally.discrepancies(project.discrepancy_percentage)
+        manual_examples = set(
+            ManualDiscrepancy.objects.filter(project_id=project.id).values_list('example_id', flat=True)
+        )
+
+        # Perspetivas do primeiro utilizador que anotou cada exemplo
+        first_user_by_example = matrix.first_annotators()
+        perspectives_by_user = {}
+        member_perspectives = PerspectiveMember.objects.filter(
+            member__project=project,
+            member__user_id__in=set(first_user_by_example.values()),
+        ).values_list('member__user_id', 'perspective_id', 'value')
+        for user_id, perspective_id, value in member_perspectives:
+            perspectives_by_user.setdefault(user_id, {})[str(perspective_id)] = value
+
+        # Montar a tabela
+        table = []
+        for example in Example.objects.filter(project_id=original_project.id).values('id', 'text'):
+            row = {
+                'id': example['id'],
+                'text': example['text'],
+            }
+            # Contagem de labels
+            label_counts = {label: 0 for label in all_labels}
+            example_tally = tally.get(example['id'])
+            if example_tally:
+                for label in example_tally.labels.values():
+                    label_counts[label.text] += label.count
+            row['labels'] = label_counts
+            # Discrepância e reportado
+            row['discrepancy'] = example['id'] in discrepancies_auto
+            row['reported'] = example['id'] in manual_examples
+            # Adicionar valores de perspetiva igual ao Annotation Statistics
+            user_id = first_user_by_example.get(example['id'])
+            row['perspectives'] = dict(perspectives_by_user.get(user_id, {}))
+            table.append(row)
+
+        # Adicionar valores possíveis de perspetiva (igual ao GetAllFilledValues)
+        # Obter todos os membros de perspetiva deste projeto (todas as versões)
+        all_project_versions = original_project.get_versions().values_list('id', flat=True)
+        perspective_members = PerspectiveMember.objects.filter(
+            member__project_id__in=all_project_versions
+        ).select_related('perspective')
+        perspective_values_dict = {}
+        for member in perspective_members:
+            if member.perspective_id not in perspective_values_dict:
+                perspective_values_dict[member.perspective_id] = set()
+            perspective_values_dict[member.perspective_id].add(member.value)
+        # Converter sets em listas
+        for perspective_id in perspective_values_dict:
+            perspective_values_dict[perspective_id] = list(perspective_values_dict[perspective_id])
+        return {
+            'labels': all_labels,
+            'rows': table,
+            'perspective_values': perspective_values_dict
+        }
+
 class DiscrepancyCommentListCreate(APIView):
     permission_classes = [IsAuthenticated]
 
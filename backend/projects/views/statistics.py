@@ -0,0 +1,56 @@
+import os
+
+from celery.result import AsyncResult
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from projects.celery_tasks import compute_statistics, statistics_dir
+from projects.models import Project
+from projects.permissions import IsProjectMember
+
+
+class StatisticsTaskAPI(APIView):
+    """Compute statistics in a Celery task instead of the request.
+
+    POST takes the same query parameters as the synchronous endpoint and
+    returns the id of the task, whose progress is available at
+    `tasks/status/<task_id>`. Once it is ready, project members can download
+    the statistics as a JSON file with GET and `taskId`.
+    """
+
+    permission_classes = [IsAuthenticated & IsProjectMember]
+    statistics = None
+
+    def get(self, request, *args, **kwargs):
+        task_id = request.GET.get("taskId")
+        if not task_id:
+            return Response({"detail": "taskId is required."}, status=status.HTTP_400_BAD_REQUEST)
+        task = AsyncResult(task_id)
+        if not task.ready():
+            return Response({"status": "Not ready"})
+        if not task.successful():
+            return Response({"detail": "The statistics could not be computed."}, status=status.HTTP_400_BAD_REQUEST)
+        # Only serve the files of this project, whatever task id is given.
+        directory = os.path.realpath(statistics_dir(self.kwargs["project_id"]))
+        if not isinstance(task.result, str) or os.path.dirname(os.path.realpath(task.result)) != directory:
+            raise Http404
+        return FileResponse(open(task.result, mode="rb"), as_attachment=True, content_type="application/json")
+
+    def post(self, request, *args, **kwargs):
+        project = get_object_or_404(Project, pk=self.kwargs["project_id"])
+        task = compute_statistics.delay(
+            project_id=project.id, statistics=self.statistics, query_params=dict(request.query_params.lists())
+        )
+        return Response({"task_id": task.task_id})
+
+
+class AnnotationStatisticsTaskAPI(StatisticsTaskAPI):
+    statistics = "annotation-statistics"
+
+
+class AllVersionsStatisticsTaskAPI(StatisticsTaskAPI):
+    statistics = "all-versions-statistics"